@@ -3,6 +3,10 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve with: uvicorn backend.asgi:application --workers 4
+Async views (product/async_views.py) then await Stellar / Intersend calls instead of
+holding a worker; the rest of the API runs in Django's thread pool as under WSGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so its timings cover the whole stack (see product/metrics.py)
+    'product.metrics.RequestMetricsMiddleware',
+    # Throttles and sheds before any other work is done (see product/ratelimit.py)
+    'product.ratelimit.RateLimitMiddleware',
+    # gzip/brotli; inside the metrics middleware so response sizes are bytes on the wire
+    'product.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -82,9 +89,63 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # SQLite ignores select_for_update; BEGIN IMMEDIATE takes the write lock up front
+            # so concurrent escrow transitions queue instead of failing mid-transaction.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # File-backed test DB so threaded concurrency tests use real, separate connections
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
+# Every new SQLite connection gets the pragmas in product/sqlite_tuning.py (WAL so readers
+# don't block behind a write, a busy timeout so writers queue instead of failing).
+# SQLITE_PRAGMAS overrides single values over those defaults, e.g. {'cache_size': -16000}.
+
+# Production database profile: KAZI_DB=postgres (see README). Connection settings come
+# from the standard libpq variables; POSTGRES_REPLICA_HOST adds a read replica that the
+# read-only list views use (product/db_router.py).
+#   KAZI_DB_POOL=persistent  keep connections open for DB_CONN_MAX_AGE seconds, health-checked (default)
+#   KAZI_DB_POOL=pgbouncer   connect through PgBouncer in transaction pooling mode
+#   KAZI_DB_POOL=native      psycopg connection pool inside each worker process
+if os.environ.get('KAZI_DB') == 'postgres':
+    DB_POOL_MODE = os.environ.get('KAZI_DB_POOL', 'persistent')
+
+    def _postgres(host):
+        db = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('PGDATABASE', 'kazi_trust'),
+            'USER': os.environ.get('PGUSER', 'kazi'),
+            'PASSWORD': os.environ.get('PGPASSWORD', ''),
+            'HOST': host,
+            'PORT': os.environ.get('PGPORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 300)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'connect_timeout': 5},
+        }
+        if DB_POOL_MODE == 'pgbouncer':
+            # Transaction pooling hands each transaction to any server connection:
+            # no server-side cursors (iterator() then fetches each query in full)
+            db['DISABLE_SERVER_SIDE_CURSORS'] = True
+        elif DB_POOL_MODE == 'native':
+            db['CONN_MAX_AGE'] = 0  # the pool owns connection lifetime
+            db['OPTIONS']['pool'] = {
+                'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+            }
+        return db
+
+    DATABASES = {'default': _postgres(os.environ.get('PGHOST', 'localhost'))}
+    if os.environ.get('POSTGRES_REPLICA_HOST'):
+        DATABASES['replica'] = _postgres(os.environ['POSTGRES_REPLICA_HOST'])
+        DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['product.db_router.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -138,6 +199,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson with a stdlib fallback; views may return datetime/Decimal/UUID values as-is
+    'DEFAULT_RENDERER_CLASSES': (
+        'product.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'product.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
@@ -148,6 +219,51 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
 ]
 
+# HMAC-SHA256 key Intersend signs payout callbacks with (x-intersend-signature); callbacks
+# are rejected while it is unset
+INTERSEND_WEBHOOK_SECRET = os.environ.get('INTERSEND_WEBHOOK_SECRET', '')
+
+# Request metrics (/metrics, product/metrics.py). Set METRICS_TOKEN to require
+# 'Authorization: Bearer <token>' on /metrics; METRICS_SLOW_REQUEST_MS samples slow requests with their SQL.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_SLOW_REQUEST_MS = int(os.environ.get('METRICS_SLOW_REQUEST_MS', 0)) or None
+
+# Cache: local memory per process by default; REDIS_URL shares it between workers and
+# hosts (escrow status cache, matching versions and rate limit buckets). The escrow status
+# cache is only used with a shared cache (ESCROW_STATUS_CACHING overrides, see escrow_cache.py)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
+# Rate limits per endpoint class (product/ratelimit.py); URL names map to classes in
+# product/urls.py. rate: sustained requests per caller; burst: bucket size; key: user, phone
+# or ip; shed_at: requests in flight in this process at which the class gets 503s.
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+RATE_LIMITS = {
+    'auth': {'rate': '10/min', 'burst': 5, 'key': 'ip', 'shed_at': 32},
+    'ussd': {'rate': '30/min', 'burst': 10, 'key': 'phone', 'shed_at': 96},
+    'webhooks': {'rate': '600/min', 'burst': 100, 'key': 'ip', 'shed_at': 128},
+    'reads': {'rate': '300/min', 'burst': 60, 'key': 'user', 'shed_at': 48},
+    'writes': {'rate': '60/min', 'burst': 20, 'key': 'user', 'shed_at': 64},
+}
+RATE_LIMIT_CACHE = 'default'
+RATE_LIMIT_PROXY_HOPS = int(os.environ.get('RATE_LIMIT_PROXY_HOPS', 0))
+RATE_LIMIT_MAX_QUEUE_MS = int(os.environ.get('RATE_LIMIT_MAX_QUEUE_MS', 0)) or None
+
+# Archival (product/archival.py, python manage.py archive_data): closed USSD sessions and the
+# messages of completed/cancelled jobs move out of the hot tables after these many days
+ARCHIVE_USSD_AFTER_DAYS = 30
+ARCHIVE_MESSAGES_AFTER_DAYS = 90
+ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', str(BASE_DIR / 'archive'))  # for archive_data --to files
+
+# Response compression (product/compression.py): brotli when installed and accepted, else gzip
+COMPRESSION_MIN_BYTES = 512
+COMPRESSION_BROTLI_QUALITY = 5
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -1,9 +1,11 @@
 
 from django.contrib import admin
 from django.urls import path,include
+from product.views import prometheus_metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-  path('api/', include('product.urls'))
+  path('api/', include('product.urls')),
+  path('metrics', prometheus_metrics, name='metrics'),
 
 ]
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'product'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import escrow_service  # noqa: F401  registers retry queue handlers
+        from . import sqlite_tuning  # noqa: F401  SQLite pragmas on connect
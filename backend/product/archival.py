@@ -0,0 +1,207 @@
+"""
+Archival Module
+Moves cold rows out of the hot USSDTransaction and JobMessage tables.
+
+Closed USSD sessions (no update for ARCHIVE_USSD_AFTER_DAYS; gateways drop a session after
+a few minutes) and the messages of jobs completed or cancelled more than
+ARCHIVE_MESSAGES_AFTER_DAYS ago are moved in chunks. Each chunk is its own short
+transaction (copy, then delete by id), so no lock is held for longer than one chunk and
+the hot tables keep only live rows; their indexes stop growing with history.
+
+Rows go to the archive tables (ArchivedUSSDTransaction, ArchivedJobMessage; original ids
+kept), or with target='files' to gzipped JSONL files under ARCHIVE_DIR, one file per
+chunk, written and synced before the chunk is deleted. Archived messages are still served
+by GET /api/jobs/<id>/messages/ (job_messages() merges both tables for completed and
+cancelled jobs); messages archived to files are not.
+
+On Postgres the archive tables are range-partitioned by month on created_at (migration
+0015): partitions are created before each chunk is inserted, and drop_partitions() drops
+whole months past retention without a DELETE. Elsewhere the archive tables are plain.
+
+Run with: python manage.py archive_data --loop
+"""
+import gzip
+import heapq
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from . import renderers
+from .models import ArchivedJobMessage, ArchivedUSSDTransaction, JobListing, JobMessage, USSDTransaction
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+ARCHIVABLE_JOB_STATUSES = ('completed', 'cancelled')
+TARGETS = ('table', 'files')
+
+USSD_FIELDS = ['id', 'user_id', 'session_id', 'phone_number', 'text', 'stage', 'created_at', 'updated_at']
+MESSAGE_FIELDS = ['id', 'job_listing_id', 'sender_id', 'text', 'created_at']
+
+
+def ussd_cutoff():
+    return timezone.now() - timedelta(days=getattr(settings, 'ARCHIVE_USSD_AFTER_DAYS', 30))
+
+
+def messages_cutoff():
+    return timezone.now() - timedelta(days=getattr(settings, 'ARCHIVE_MESSAGES_AFTER_DAYS', 90))
+
+
+def archive_dir():
+    return getattr(settings, 'ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive'))
+
+
+# ==================== READS ====================
+
+def job_messages(job_listing):
+    """A job's messages in time order (sender loaded); archived ones included for completed/cancelled jobs."""
+    hot = JobMessage.objects.filter(job_listing=job_listing).select_related('sender').order_by('created_at', 'id')
+    if job_listing.status not in ARCHIVABLE_JOB_STATUSES:
+        return list(hot)
+    archived = (ArchivedJobMessage.objects.filter(job_listing=job_listing)
+                .select_related('sender').order_by('created_at', 'id'))
+    return list(heapq.merge(archived, hot, key=lambda m: (m.created_at, m.id)))
+
+
+# ==================== PARTITIONS (Postgres) ====================
+
+def _month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _next_month(month):
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def months_between(first, last):
+    """Month starts (UTC) covering first..last."""
+    month, end = _month_start(first.astimezone(dt_timezone.utc)), last.astimezone(dt_timezone.utc)
+    months = []
+    while month <= end:
+        months.append(month)
+        month = _next_month(month)
+    return months
+
+
+def partitioned():
+    return connection.vendor == 'postgresql'
+
+
+def ensure_partitions(model, first, last):
+    """Create the monthly partitions rows created between first and last go to."""
+    if not partitioned():
+        return
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        for month in months_between(first, last):
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table}_p{month:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+            )
+
+
+def drop_partitions(model, before):
+    """Drop whole monthly partitions that end on or before `before`. Returns the dropped names."""
+    if not partitioned():
+        return []
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid WHERE parent.relname = %s", [table]
+        )
+        dropped = []
+        for (name,) in cursor.fetchall():
+            month = datetime.strptime(name.rsplit('_p', 1)[1], '%Y%m').replace(tzinfo=dt_timezone.utc)
+            if _next_month(month) <= before:
+                cursor.execute(f'DROP TABLE {name}')
+                dropped.append(name)
+    if dropped:
+        logger.info(f"Dropped archive partitions: {', '.join(sorted(dropped))}")
+    return sorted(dropped)
+
+
+# ==================== MOVING ROWS ====================
+
+def _write_file(kind, rows):
+    """One gzipped JSONL file per chunk, named by its id range; replaced whole if a chunk is redone."""
+    directory = os.path.join(archive_dir(), kind)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{kind}-{rows[0]['id']:012d}-{rows[-1]['id']:012d}.jsonl.gz")
+    partial = path + '.partial'
+    with open(partial, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as out:
+            for row in rows:
+                out.write(renderers.dumps(row) + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+    return path
+
+
+def _move(kind, eligible, fields, archive_model, target):
+    """Move one chunk of `eligible` (a queryset of ids picked by the caller). Returns rows moved."""
+    if target == 'table' and partitioned():
+        # Creating a partition locks the parent table: do it before the chunk's transaction
+        bounds = eligible.aggregate(first=Min('created_at'), last=Max('created_at'))
+        if bounds['first'] is not None:
+            ensure_partitions(archive_model, bounds['first'], bounds['last'])
+    with transaction.atomic():
+        rows = list(eligible.order_by('id').values(*fields))
+        if not rows:
+            return 0
+        if target == 'files':
+            _write_file(kind, rows)
+        else:
+            archive_model.objects.bulk_create([archive_model(**row) for row in rows], ignore_conflicts=True)
+        eligible.model.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_ussd_sessions(cutoff=None, target='table', chunk_size=CHUNK_SIZE, max_chunks=None, pause=0):
+    """
+    Move USSD sessions not updated since cutoff. Sessions are picked oldest id first: old
+    sessions sit at the head of the primary key, so no index on updated_at is needed.
+    pause: seconds to sleep between chunks, to leave the database to live traffic.
+    """
+    cutoff = cutoff or ussd_cutoff()
+    moved = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        ids = list(USSDTransaction.objects.filter(updated_at__lt=cutoff)
+                   .order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        eligible = USSDTransaction.objects.filter(id__in=ids, updated_at__lt=cutoff)
+        moved += _move('ussd_sessions', eligible, USSD_FIELDS, ArchivedUSSDTransaction, target)
+        chunks += 1
+        time.sleep(pause)
+    if moved:
+        logger.info(f"Archived {moved} USSD session(s) to {target}")
+    return moved
+
+
+def archive_job_messages(cutoff=None, target='table', chunk_size=CHUNK_SIZE, max_chunks=None, pause=0):
+    """Move the messages of jobs completed or cancelled (last updated) before cutoff."""
+    cutoff = cutoff or messages_cutoff()
+    jobs = JobListing.objects.filter(status__in=ARCHIVABLE_JOB_STATUSES, updated_at__lt=cutoff)
+    moved = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        job_ids = list(jobs.filter(Exists(JobMessage.objects.filter(job_listing=OuterRef('pk'))))
+                       .order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not job_ids:
+            break
+        ids = list(JobMessage.objects.filter(job_listing__in=job_ids)
+                   .order_by('id').values_list('id', flat=True)[:chunk_size])
+        eligible = JobMessage.objects.filter(id__in=ids, job_listing__status__in=ARCHIVABLE_JOB_STATUSES,
+                                             job_listing__updated_at__lt=cutoff)
+        moved += _move('job_messages', eligible, MESSAGE_FIELDS, ArchivedJobMessage, target)
+        chunks += 1
+        time.sleep(pause)
+    if moved:
+        logger.info(f"Archived {moved} job message(s) to {target}")
+    return moved
@@ -0,0 +1,95 @@
+"""
+Async Views Module
+Endpoints that wait on Stellar / Intersend, as native async views for ASGI servers.
+
+Under gunicorn sync workers a request that waits 2s on an upstream holds its worker for
+those 2s. Served through backend/asgi.py (uvicorn backend.asgi:application), an async view
+awaits the upstream call instead, so one process keeps accepting requests while many are
+in flight. Under WSGI these views still work (Django runs them in an event loop per request).
+
+DRF's APIView is synchronous, so these are plain Django views. They keep the DRF pieces
+that matter: authentication classes and parsers from REST_FRAMEWORK (so JWT, and
+force_authenticate in tests, behave as on the DRF views), the same JSON errors and the
+FastJSONRenderer for responses.
+
+Only complete_work blocks on upstream calls. The payment callbacks only write to the webhook
+inbox, and job creation leaves the Stellar contract to provisioning.py, so those stay sync.
+Compare capacity with: python manage.py benchmark_async_views
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import JobListing
+from . import escrow_service, renderers
+from .views import completion_response
+
+logger = logging.getLogger(__name__)
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(renderers.FastJSONRenderer().render(data), status=status_code,
+                        content_type='application/json')
+
+
+async def api_request(request):
+    """
+    Wrap a Django request like APIView does and authenticate it off the event loop.
+    Returns (drf_request, None), or (None, error response) when the user is not authenticated.
+    """
+    drf_request = Request(
+        request,
+        parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+    except exceptions.APIException as e:
+        return None, json_response({"detail": e.detail}, e.status_code)
+    if not user or not user.is_authenticated:
+        return None, json_response({"detail": exceptions.NotAuthenticated.default_detail},
+                                   status.HTTP_401_UNAUTHORIZED)
+    return drf_request, None
+
+
+# ==================== WORK COMPLETION ====================
+
+@csrf_exempt
+@require_POST
+async def complete_work(request, job_id):
+    """
+    Mark work as complete and release escrow funds to the employee: completes the job,
+    releases the Stellar escrow and triggers the mobile money payout.
+    Body: {"work_summary": "..."} (optional; shown in the worker's verified work history).
+    """
+    request, denied = await api_request(request)
+    if denied:
+        return denied
+    try:
+        job_listing = await JobListing.objects.filter(pk=job_id).afirst()
+        if job_listing is None:
+            return json_response({"detail": "No JobListing matches the given query."}, status.HTTP_404_NOT_FOUND)
+        if job_listing.employer_id != request.user.id:
+            return json_response({"error": "Only the employer can mark work as complete"}, status.HTTP_403_FORBIDDEN)
+        try:
+            work_summary = (request.data.get('work_summary') or '').strip() or None
+        except exceptions.APIException as e:  # malformed body (400), unsupported media type (415)
+            return json_response({"detail": e.detail}, e.status_code)
+        try:
+            escrow_contract, payout = await escrow_service.acomplete_work(job_listing, work_summary=work_summary)
+        except escrow_service.EscrowNotFound as e:
+            return json_response({"error": str(e)}, status.HTTP_404_NOT_FOUND)
+        except escrow_service.ReleaseError as e:
+            return json_response({"error": str(e)}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except escrow_service.TransitionError as e:
+            return json_response({"error": str(e)}, status.HTTP_400_BAD_REQUEST)
+        return json_response(*completion_response(job_listing, escrow_contract, payout))
+    except Exception as e:
+        logger.error(f"Work completion error: {str(e)}")
+        return json_response({"error": "Failed to complete work"}, status.HTTP_500_INTERNAL_SERVER_ERROR)
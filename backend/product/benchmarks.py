@@ -0,0 +1,350 @@
+"""
+API Benchmark Module
+End-to-end benchmarks of the main endpoints against a seeded scratch database.
+
+run_benchmarks() seeds a throwaway database (seeding.seed), then requests each scenario
+through the Django test client and/or a real HTTP server (a threaded WSGI server on a free
+local port). Per-scenario throughput, latency percentiles and query counts are reported.
+Query counts come from RequestMetricsMiddleware (metrics.py), so both modes measure
+them the same way.
+
+Results are plain JSON, so a run on one commit can be diffed against another; compare()
+flags scenarios whose p50 latency or query count went up. Entry point:
+python manage.py benchmark_api (see --help).
+"""
+import hashlib
+import hmac
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import django
+import requests
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import metrics, seeding
+from .models import CustomUser, JobListing
+
+RESULT_VERSION = 1
+
+
+# ==================== SCRATCH DATABASE & SERVER ====================
+
+@contextmanager
+def scratch_database():
+    """
+    Create a migrated throwaway database (like the test runner does) and drop it afterwards.
+    Rate limiting is off inside: benchmarks send thousands of requests as one caller.
+    """
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    original_name = test_settings.get('NAME')
+    old_name = connection.settings_dict['NAME']
+    with tempfile.TemporaryDirectory() as scratch, override_settings(RATE_LIMIT_ENABLED=False):
+        if connection.vendor == 'sqlite':
+            test_settings['NAME'] = os.path.join(scratch, 'benchmark.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            test_settings['NAME'] = original_name
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    # Without TCP_NODELAY, keep-alive responses stall on delayed ACKs (~40 ms per request)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def live_server():
+    """Serve the project over HTTP on a free local port; yields the base URL."""
+    server = ThreadedWSGIServer(('127.0.0.1', 0), _QuietRequestHandler, allow_reuse_address=False)
+    server.set_app(get_internal_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+# ==================== PAYLOADS ====================
+
+def ussd_payload(tag, i):
+    """A USSD hop: four hops per session, walking one menu level deeper each time."""
+    return {'sessionId': f"{tag}-{i // 4}", 'phoneNumber': f"+2547{i // 4:08d}", 'text': '*'.join('1' * (i % 4))}
+
+
+def paystack_payload(tag, i):
+    """A signed charge.success webhook body and its headers (signature only when a secret is set)."""
+    body = json.dumps({
+        'event': 'charge.success',
+        'data': {'id': f"{tag}-{i}", 'reference': f"ESCROW_BENCH_{i}", 'amount': 100000},
+    }).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    secret = getattr(settings, 'PAYSTACK_SECRET_KEY', '') or getattr(settings, 'PAYSTACK_SECRET', '')
+    if secret:
+        headers['X-Paystack-Signature'] = hmac.new(secret.encode('utf-8'), body, hashlib.sha512).hexdigest()
+    return body, headers
+
+
+# ==================== SCENARIOS ====================
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    user: object = None
+    payload: object = None  # callable(i) -> form dict, or (bytes, headers)
+    token: str = field(default='', repr=False)
+
+
+def build_scenarios(tag='bench'):
+    """Scenarios for the busiest seeded employer and worker, one or more per main endpoint."""
+    employer = (
+        CustomUser.objects.filter(user_type='employer').annotate(n=Count('job_listings')).order_by('-n', 'id').first()
+    )
+    worker = (
+        CustomUser.objects.filter(user_type='employee').annotate(n=Count('job_applications')).order_by('-n', 'id').first()
+    )
+    jobs = JobListing.objects.filter(employer=employer).annotate(n=Count('applications'))
+    job = jobs.exclude(employee=None).exclude(escrow_contract_id=None).order_by('-n', 'id').first() \
+        or jobs.order_by('-n', 'id').first()
+    scenarios = [
+        Scenario('jobs (employer)', 'GET', '/api/jobs/', employer),
+        Scenario('jobs (worker)', 'GET', '/api/jobs/', worker),
+        Scenario('job_detail', 'GET', f'/api/jobs/{job.id}/', employer),
+        Scenario('job_applicants', 'GET', f'/api/jobs/{job.id}/applicants/', employer),
+        Scenario('job_escrow', 'GET', f'/api/jobs/{job.id}/escrow/', employer),
+        Scenario('job_messages', 'GET', f'/api/jobs/{job.id}/messages/', employer),
+        Scenario('my_chats', 'GET', '/api/chats/', employer),
+        Scenario('transactions', 'GET', '/api/transactions/', employer),
+        Scenario('employer_workers_overview', 'GET', '/api/employer/workers-overview/', employer),
+        Scenario('employer_summary', 'GET', '/api/employer/summary/', employer),
+        Scenario('my_applications', 'GET', '/api/employee/my-applications/', worker),
+        Scenario('employee_work_history', 'GET', '/api/employee/work-history/', worker),
+        Scenario('recommended_jobs', 'GET', '/api/employee/recommended-jobs/', worker),
+        Scenario('employee_summary', 'GET', '/api/employee/summary/', worker),
+        Scenario('ussd_callback', 'POST', '/api/ussd/', payload=lambda i: ussd_payload(tag, i)),
+        Scenario('paystack_deposit_callback', 'POST', '/api/callbacks/paystack/deposit/',
+                 payload=lambda i: paystack_payload(tag, i)),
+    ]
+    tokens = {}
+    for scenario in scenarios:
+        if scenario.user is not None:
+            if scenario.user.pk not in tokens:
+                tokens[scenario.user.pk] = str(RefreshToken.for_user(scenario.user).access_token)
+            scenario.token = tokens[scenario.user.pk]
+    return scenarios
+
+
+# ==================== DRIVERS ====================
+
+class ClientDriver:
+    """In-process requests through django.test.Client (no sockets)."""
+    mode = 'client'
+
+    def __init__(self):
+        self.client = Client()
+
+    def request(self, scenario, i):
+        extra = {'HTTP_AUTHORIZATION': f"Bearer {scenario.token}"} if scenario.token else {}
+        payload = scenario.payload(i) if scenario.payload else None
+        if scenario.method == 'GET':
+            return self.client.get(scenario.path, **extra).status_code
+        if isinstance(payload, tuple):
+            body, headers = payload
+            extra.update({f"HTTP_{k.upper().replace('-', '_')}": v for k, v in headers.items() if k != 'Content-Type'})
+            return self.client.post(scenario.path, body, content_type=headers['Content-Type'], **extra).status_code
+        return self.client.post(scenario.path, payload or {}, **extra).status_code
+
+
+class ServerDriver:
+    """Real HTTP requests (keep-alive session) against live_server()."""
+    mode = 'server'
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def request(self, scenario, i):
+        headers = {'Authorization': f"Bearer {scenario.token}"} if scenario.token else {}
+        payload = scenario.payload(i) if scenario.payload else None
+        url = self.base_url + scenario.path
+        if scenario.method == 'GET':
+            return self.session.get(url, headers=headers, timeout=30).status_code
+        if isinstance(payload, tuple):
+            body, extra = payload
+            return self.session.post(url, data=body, headers={**headers, **extra}, timeout=30).status_code
+        return self.session.post(url, data=payload or {}, headers=headers, timeout=30).status_code
+
+
+# ==================== RUNNING ====================
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(q / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+def run_scenario(make_driver, scenario, iterations, warmup=0, concurrency=1, offset=0):
+    """Request one scenario `iterations` times (after `warmup` untimed calls); returns its stats."""
+    driver = make_driver()
+    for i in range(warmup):
+        driver.request(scenario, offset + i)
+    metrics.reset_metrics()
+
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    counter = iter(range(offset + warmup, offset + warmup + iterations))
+
+    def worker(d):
+        nonlocal errors
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            try:
+                ok = d.request(scenario, i) < 400
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                errors += 0 if ok else 1
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker, make_driver()) for _ in range(concurrency)]:
+                future.result()
+    else:
+        worker(driver)
+    wall = time.perf_counter() - started
+
+    queries = [s for s in metrics.DB_QUERIES.snapshot().values()]
+    db_time = [s for s in metrics.DB_SECONDS.snapshot().values()]
+    requests_seen = sum(s['count'] for s in queries)
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 2)  # noqa: E731
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'latency_ms': {
+            'mean': ms(statistics.fmean(latencies)) if latencies else 0.0,
+            'p50': ms(percentile(latencies, 50)),
+            'p90': ms(percentile(latencies, 90)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1]) if latencies else 0.0,
+        },
+        'queries_per_request': round(sum(s['sum'] for s in queries) / requests_seen, 2) if requests_seen else None,
+        'db_ms_per_request': ms(sum(s['sum'] for s in db_time) / requests_seen) if requests_seen else None,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(scale=None, seed=0, modes=('client', 'server'), iterations=50, warmup=5,
+                   concurrency=1, only=None, log=None):
+    """
+    Seed a scratch database and benchmark every scenario in each mode.
+    Returns a JSON-serialisable dict: {'meta': {...}, 'seeded': {...}, 'results': {mode: {scenario: stats}}}.
+    """
+    log = log or (lambda message: None)
+    with scratch_database():
+        started = time.perf_counter()
+        seeded = seeding.seed(scale, seed=seed)
+        log(f"Seeded scratch database in {time.perf_counter() - started:.1f}s")
+        scenarios = [s for s in build_scenarios() if not only or s.name in only]
+        results = {}
+        for m, mode in enumerate(modes):
+            results[mode] = {}
+            with (live_server() if mode == 'server' else _no_server()) as base_url:
+                make_driver = (lambda: ServerDriver(base_url)) if mode == 'server' else ClientDriver
+                for n, scenario in enumerate(scenarios):
+                    stats = run_scenario(make_driver, scenario, iterations, warmup, concurrency,
+                                         offset=(m * len(scenarios) + n) * 10_000)
+                    results[mode][scenario.name] = stats
+                    log(format_line(mode, scenario.name, stats))
+        metrics.reset_metrics()
+    return {
+        'version': RESULT_VERSION,
+        'meta': {
+            'commit': _git_commit(), 'database': connection.vendor, 'python': platform.python_version(),
+            'django': django.get_version(), 'seed': seed, 'scale': {**seeding.DEFAULT_SCALE, **(scale or {})},
+            'iterations': iterations, 'warmup': warmup, 'concurrency': concurrency,
+        },
+        'seeded': seeded,
+        'results': results,
+    }
+
+
+@contextmanager
+def _no_server():
+    yield None
+
+
+def format_line(mode, name, stats):
+    latency = stats['latency_ms']
+    queries = stats['queries_per_request']
+    return (
+        f"[{mode}] {name:<28} {stats['throughput_rps']:>8.1f} req/s  p50 {latency['p50']:>7.2f} ms  "
+        f"p90 {latency['p90']:>7.2f} ms  p99 {latency['p99']:>7.2f} ms  "
+        f"{'-' if queries is None else queries:>6} queries  {stats['errors']} errors"
+    )
+
+
+def compare(baseline, current, tolerance=0.2):
+    """
+    Regressions of `current` against `baseline` results: p50 latency up by more than
+    `tolerance` (fraction), any increase in queries per request, or new errors.
+    Returns a list of human-readable lines (empty when nothing regressed).
+    """
+    regressions = []
+    for mode, scenarios in current['results'].items():
+        for name, stats in scenarios.items():
+            before = baseline.get('results', {}).get(mode, {}).get(name)
+            if not before:
+                continue
+            old_p50, new_p50 = before['latency_ms']['p50'], stats['latency_ms']['p50']
+            if old_p50 and new_p50 > old_p50 * (1 + tolerance):
+                regressions.append(f"[{mode}] {name}: p50 {old_p50} -> {new_p50} ms (+{new_p50 / old_p50 - 1:.0%})")
+            old_q, new_q = before.get('queries_per_request'), stats.get('queries_per_request')
+            if old_q is not None and new_q is not None and new_q > old_q:
+                regressions.append(f"[{mode}] {name}: queries/request {old_q} -> {new_q}")
+            if stats['errors'] > before['errors']:
+                regressions.append(f"[{mode}] {name}: errors {before['errors']} -> {stats['errors']}")
+    return regressions
@@ -0,0 +1,201 @@
+"""
+Circuit Breaker Module
+Fail-fast protection for upstream calls (Stellar contract service / Soroban, Intersend).
+
+Each upstream endpoint has its own breaker, e.g. 'stellar:release' or 'intersend:send':
+
+    closed --N consecutive failures--> open --reset timeout--> half_open
+    half_open --probe succeeds--> closed
+    half_open --probe fails-----> open
+
+While a breaker is open, calls raise CircuitOpenError immediately instead of waiting
+for the request timeout. Write operations let that error reach the caller, which
+defers the work to the retry queue (retry_queue.py); reads just return None.
+
+Breakers live in process memory: each worker process trips and recovers on its own.
+Async views (async_views.py) use the same breakers through acall() / arequest(); arequest
+uses httpx when it is installed and otherwise runs requests in a worker thread.
+"""
+import asyncio
+import logging
+import threading
+import time
+import requests
+from django.conf import settings
+
+try:
+    import httpx
+except ImportError:  # arequest falls back to requests in a thread
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = getattr(settings, 'CIRCUIT_BREAKER_FAILURE_THRESHOLD', 5)
+RESET_TIMEOUT = getattr(settings, 'CIRCUIT_BREAKER_RESET_TIMEOUT', 30.0)  # seconds open before probing
+HALF_OPEN_MAX_CALLS = 1
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Upstream endpoint is failing; the call was not attempted."""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit {name} is open; retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Thread-safe breaker for one upstream endpoint."""
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None,
+                 half_open_max_calls=HALF_OPEN_MAX_CALLS, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold or FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout if reset_timeout is not None else RESET_TIMEOUT
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self.trips = 0
+        self.rejected = 0
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _current_state(self):
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def retry_after(self):
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self.clock() - self._opened_at))
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return
+            self.rejected += 1
+            remaining = self.reset_timeout - (self.clock() - self._opened_at) if state == OPEN else 0.0
+        raise CircuitOpenError(self.name, max(0.0, remaining))
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self._probes = 0
+                self.trips += 1
+                logger.warning(f"Circuit {self.name} opened after {self._failures} failure(s)")
+
+    def call(self, fn, *args, is_failure=None, **kwargs):
+        """
+        Run fn through the breaker. Exceptions count as failures and are re-raised;
+        is_failure(result) lets callers count bad results (e.g. HTTP 5xx) as failures too.
+        """
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        return self._settle(result, is_failure)
+
+    async def acall(self, fn, *args, is_failure=None, **kwargs):
+        """call() for a coroutine function."""
+        self.before_call()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        return self._settle(result, is_failure)
+
+    def _settle(self, result, is_failure):
+        if is_failure is not None and is_failure(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._failures,
+                "trips": self.trips,
+                "rejected_calls": self.rejected,
+                "retry_in_seconds": round(max(0.0, self.reset_timeout - (self.clock() - self._opened_at)), 3)
+                if state == OPEN else 0.0,
+            }
+
+
+# ==================== REGISTRY ====================
+
+_breakers = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name):
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states():
+    with _registry_lock:
+        breakers = sorted(_breakers.values(), key=lambda b: b.name)
+    return [b.snapshot() for b in breakers]
+
+
+def reset_breakers():
+    with _registry_lock:
+        _breakers.clear()
+
+
+def request(breaker_name, method, url, **kwargs):
+    """requests.request through the named breaker; connection errors, timeouts and 5xx count as failures."""
+    return get_breaker(breaker_name).call(
+        requests.request, method, url, is_failure=lambda r: r.status_code >= 500, **kwargs
+    )
+
+
+async def _async_request(method, url, **kwargs):
+    if httpx is None:
+        return await asyncio.to_thread(requests.request, method, url, **kwargs)
+    async with httpx.AsyncClient() as client:
+        return await client.request(method, url, **kwargs)
+
+
+async def arequest(breaker_name, method, url, **kwargs):
+    """Async request(): same breaker, same failure rules; the response has .status_code/.json()/.text."""
+    return await get_breaker(breaker_name).acall(
+        _async_request, method, url, is_failure=lambda r: r.status_code >= 500, **kwargs
+    )
@@ -0,0 +1,109 @@
+"""
+Response Compression Module
+gzip / brotli for API responses, for workers on 2G/3G connections.
+
+Replaces django.middleware.gzip.GZipMiddleware: brotli ("br") is preferred when the client
+accepts it and the brotli package is installed, gzip otherwise. Responses smaller than
+COMPRESSION_MIN_BYTES go out as they are (the framing overhead isn't worth it on tiny
+bodies), as do responses that are already encoded or that would not get smaller.
+Streaming responses (the CSV/JSONL exports) are compressed chunk by chunk.
+
+gzip keeps Django's random-bytes BREACH mitigation. The API authenticates with bearer
+tokens, not cookies, so a cross-site page cannot make a victim's browser send an
+authenticated request to probe a compressed body.
+
+Settings: COMPRESSION_MIN_BYTES (default 512), COMPRESSION_BROTLI_QUALITY (0-11, default 5;
+higher is smaller but slower on every response).
+"""
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+DEFAULT_MIN_BYTES = 512
+DEFAULT_BROTLI_QUALITY = 5
+
+_accepts_br = re.compile(r"\bbr\b")
+_accepts_gzip = re.compile(r"\bgzip\b")
+
+
+def choose_encoding(accept_encoding):
+    """'br', 'gzip' or None for an Accept-Encoding header."""
+    if brotli is not None and _accepts_br.search(accept_encoding):
+        return 'br'
+    if _accepts_gzip.search(accept_encoding):
+        return 'gzip'
+    return None
+
+
+def _brotli_quality():
+    return getattr(settings, 'COMPRESSION_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+
+
+def compress_brotli(content):
+    return brotli.compress(content, quality=_brotli_quality())
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=_brotli_quality())
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def _brotli_async_sequence(sequence):
+    compressor = brotli.Compressor(quality=_brotli_quality())
+    async for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        min_bytes = getattr(settings, 'COMPRESSION_MIN_BYTES', DEFAULT_MIN_BYTES)
+        if not response.streaming and len(response.content) < min_bytes:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding == 'gzip':
+                # GZipMiddleware handles sync and async streaming gzip
+                return super().process_response(request, response)
+            if response.is_async:
+                response.streaming_content = _brotli_async_sequence(response.streaming_content)
+            else:
+                response.streaming_content = _brotli_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'gzip':
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            else:
+                compressed = compress_brotli(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # An encoded body is a different representation: strong ETags become weak (RFC 9110 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
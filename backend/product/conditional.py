@@ -0,0 +1,232 @@
+"""
+Conditional Requests Module
+ETag / Last-Modified for the list endpoints, checked before the view does any work.
+
+The frontend re-fetches its lists on every page navigation. Each list view declares a
+fingerprint: one aggregate query over the rows it lists, scoped to the requesting user
+(row count, latest updated_at / created_at / completed_at, and per-status counts for
+rows that change status without a timestamp). The ETag hashes the fingerprint with the
+user, the view, the full path (query string included) and the Accept header. A GET whose
+If-None-Match still matches gets 304 Not Modified after that single query; the view's
+own queries and serialization never run.
+
+Responses carry "Cache-Control: private, no-cache": browsers keep them and revalidate
+every time, shared caches never store them. Last-Modified (the latest timestamp in the
+fingerprint) is informational only: it has one-second resolution and cannot see deleted
+rows, so If-Modified-Since alone never produces a 304.
+
+Fingerprints only see the rows they aggregate: a name or phone number change on another
+user's profile shows up once something in the list itself changes. Bulk .update() calls
+on JobListing must set updated_at (auto_now only applies to save()). Bump ETAG_VERSION
+when the format of a list response changes, so clients drop their copies.
+"""
+import functools
+import hashlib
+from datetime import datetime
+
+from django.db.models import Count, DateTimeField, Func, IntegerField, Max, Q, Subquery
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import JobListing, JobApplication, EscrowContract, MobileMoneyPayout
+from . import matching
+
+ETAG_VERSION = 1
+
+
+def etag_for(request, view_name, fingerprint):
+    raw = repr((
+        ETAG_VERSION, view_name, request.user.pk, request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''), sorted(fingerprint.items()),
+    ))
+    return f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+
+
+def _last_modified(fingerprint):
+    stamps = [value for value in fingerprint.values() if isinstance(value, datetime)]
+    return http_date(max(stamps).timestamp()) if stamps else None
+
+
+def _add_validators(response, tag, last_modified):
+    response['ETag'] = tag
+    if last_modified:
+        response['Last-Modified'] = last_modified
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def etag(fingerprint):
+    """
+    Decorator for GET list views (inside @api_view/@permission_classes, so the user is
+    authenticated). fingerprint(request, *args, **kwargs) returns a dict of aggregate values,
+    or None when the user can't see the list, in which case the view answers (403/404).
+    """
+    def decorator(view):
+        view_name = view.__qualname__
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            values = fingerprint(request, *args, **kwargs)
+            if values is None:
+                return view(request, *args, **kwargs)
+            tag, last_modified = etag_for(request, view_name, values), _last_modified(values)
+            response = get_conditional_response(request, etag=tag)
+            if response is not None:  # 304 (or 412 for a failed If-Match)
+                return _add_validators(response, tag, last_modified)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                _add_validators(response, tag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+# ==================== FINGERPRINTS ====================
+# Each is a single aggregate query mirroring the filters of the view it guards.
+
+def _status_counts(relation, statuses):
+    prefix = f"{relation}__" if relation else ""
+    return {
+        f"{relation or 'rows'}_{status}": Count(f"{prefix}id", filter=Q(**{f"{prefix}status": status}), distinct=True)
+        for status in statuses
+    }
+
+
+def _job_in_chat(request, job_id):
+    return JobListing.objects.filter(Q(employer=request.user) | Q(employee=request.user), pk=job_id)
+
+
+def _found(values):
+    return values if values.pop('found') else None
+
+
+def job_list(request):
+    user = request.user
+    if user.user_type == 'employer':
+        listings = JobListing.objects.filter(employer=user)
+    elif user.user_type == 'employee':
+        listings = JobListing.objects.filter(Q(status='open') | Q(employee=user))
+    else:
+        listings = JobListing.objects.all()
+    return listings.aggregate(jobs=Count('id'), updated=Max('updated_at'))
+
+
+def _over(queryset, function, field, output_field):
+    """
+    function(field) over a whole queryset as a scalar subquery, usable inside aggregate():
+    the rows it reads are not joined to, and multiplied by, the rows being aggregated.
+    """
+    rows = queryset.order_by().annotate(value=Func(field, function=function, output_field=output_field))
+    return Max(Subquery(rows.values('value')[:1]))
+
+
+def _applicant_histories(applications):
+    """Latest change to, and number of, the completed jobs behind the work histories the view attaches."""
+    completed = JobListing.objects.filter(employee__in=applications.values('employee_id'), status='completed')
+    return {
+        'history': _over(completed, 'MAX', 'updated_at', DateTimeField()),
+        'history_jobs': _over(completed, 'COUNT', 'id', IntegerField()),
+    }
+
+
+def job_applicants(request, job_id):
+    return _found(JobListing.objects.filter(pk=job_id, employer=request.user).aggregate(
+        found=Count('id', distinct=True),
+        n_applications=Count('applications', distinct=True),
+        pending=Count('applications', filter=Q(applications__status='pending'), distinct=True),
+        applied=Max('applications__created_at'),
+        **_applicant_histories(JobApplication.objects.filter(job_listing_id=job_id, status='pending')),
+    ))
+
+
+def job_messages(request, job_id):
+    return _found(_job_in_chat(request, job_id).aggregate(
+        found=Count('id', distinct=True), n_messages=Count('messages', distinct=True), sent=Max('messages__created_at'),
+    ))
+
+
+def job_escrow_history(request, job_id):
+    return _found(_job_in_chat(request, job_id).aggregate(
+        found=Count('id', distinct=True),
+        n_events=Count('escrow_contract__events', distinct=True),
+        recorded=Max('escrow_contract__events__created_at'),
+    ))
+
+
+def transactions(request):
+    user = request.user
+    if user.user_type == 'employer':
+        statuses = ('pending', 'completed', 'failed')
+        return EscrowContract.objects.filter(employer=user).aggregate(
+            jobs=Max('job_listing__updated_at'),
+            mpesa_created=Max('mpesa_deposits__created_at'),
+            mpesa_completed=Max('mpesa_deposits__completed_at'),
+            paystack_created=Max('paystack_deposits__created_at'),
+            paystack_completed=Max('paystack_deposits__completed_at'),
+            **_status_counts('mpesa_deposits', statuses),
+            **_status_counts('paystack_deposits', statuses),
+        )
+    if user.user_type == 'employee':
+        return MobileMoneyPayout.objects.filter(employee=user).aggregate(
+            jobs=Max('escrow_contract__job_listing__updated_at'),
+            created=Max('created_at'),
+            submitted=Max('submitted_at'),
+            completed=Max('completed_at'),
+            **_status_counts(None, ('pending', 'processing', 'completed', 'failed')),
+        )
+    return {}
+
+
+def my_applications(request):
+    return JobApplication.objects.filter(employee=request.user).aggregate(
+        applied=Max('created_at'), **_status_counts(None, ('pending', 'accepted', 'rejected')),
+    )
+
+
+def employee_work_history(request):
+    return JobListing.objects.filter(employee=request.user, status='completed').aggregate(
+        jobs=Count('id'), updated=Max('updated_at'),
+    )
+
+
+def recommended_jobs(request):
+    # Scoped to the worker: their applications, and the listings in their cached ranking
+    # (see matching.py), which changes whenever the listings version is bumped
+    user = request.user
+    ranked = matching.recommended_job_ids(user)
+    listings = JobListing.objects.filter(id__in=[job_id for job_id, _ in ranked])
+    values = JobApplication.objects.filter(employee=user).aggregate(
+        applied=Count('id'),
+        applied_at=Max('created_at'),
+        **({
+            'open': _over(listings.filter(status='open'), 'COUNT', 'id', IntegerField()),
+            'updated': _over(listings, 'MAX', 'updated_at', DateTimeField()),
+        } if ranked else {}),
+    )
+    return {**values, 'ranked': ranked, 'listings_version': matching.listings_version()}
+
+
+def my_chats(request):
+    return (
+        JobListing.objects.filter(Q(employer=request.user) | Q(employee=request.user))
+        .exclude(employee=None).exclude(status='cancelled')
+        .aggregate(jobs=Count('id'), updated=Max('updated_at'))
+    )
+
+
+def employer_workers_overview(request):
+    values = JobListing.objects.filter(employer=request.user).aggregate(
+        jobs=Count('id', distinct=True),
+        updated=Max('updated_at'),
+        n_applications=Count('applications', distinct=True),
+        pending=Count('applications', filter=Q(applications__status='pending'), distinct=True),
+        applied=Max('applications__created_at'),
+        **_applicant_histories(JobApplication.objects.filter(
+            job_listing__employer=request.user, job_listing__status='open', status='pending',
+        )),
+    )
+    # duration_days of unfinished jobs grows with the clock: reuse a copy for at most an hour
+    return {**values, 'hour': timezone.now().replace(minute=0, second=0, microsecond=0).isoformat()}
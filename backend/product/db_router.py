@@ -0,0 +1,62 @@
+"""
+Database Router
+Sends the read-only list views to the 'replica' database when one is configured
+(KAZI_DB=postgres with POSTGRES_REPLICA_HOST, see backend/settings.py).
+
+Views opt in with @replica_reads (or `with read_replica():`); everything else, and
+every write, uses 'default'. Replicas lag slightly, so only lists that tolerate a
+moment's staleness opt in: never a read that decides an escrow transition.
+Without a replica the router is a no-op.
+"""
+import contextvars
+import functools
+from contextlib import contextmanager
+from django.conf import settings
+
+REPLICA = 'replica'
+
+_reading_replica = contextvars.ContextVar('reading_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def read_db():
+    """Alias for explicit .using() reads that may be served by the replica (e.g. streamed exports)."""
+    return REPLICA if replica_configured() else 'default'
+
+
+@contextmanager
+def read_replica():
+    token = _reading_replica.set(True)
+    try:
+        yield
+    finally:
+        _reading_replica.reset(token)
+
+
+def replica_reads(view):
+    """Run a read-only view's queries against the replica."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with read_replica():
+            return view(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _reading_replica.get() and replica_configured():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as default
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
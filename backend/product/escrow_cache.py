@@ -0,0 +1,160 @@
+"""
+Escrow Status Cache
+Read-through cache behind GET /api/jobs/<id>/escrow/, which both dashboards poll.
+
+The status payload for a job is built with one query and cached under its job id.
+Escrow transitions (assign, fund, complete, release, payout, on-chain provisioning)
+call invalidate() / invalidate_escrows(), which drop the entry after the transaction
+commits. STATUS_TIMEOUT bounds staleness should an invalidation be missed.
+
+Transitions also happen in the background commands (process_webhooks, poll_payouts,
+process_retries, provision_escrows), which can only invalidate a cache they share with
+the web workers. So status is cached only when the cache is shared between processes
+(REDIS_URL); with a per-process backend (local memory, the default) every request builds
+it. ESCROW_STATUS_CACHING = True / False overrides the detection.
+
+With ?live=1 the response also carries the escrow's on-chain balance. Balances are
+cached separately and refreshed in a background thread (stale-while-revalidate): a
+request returns the last known balance immediately and, if it is older than
+BALANCE_FRESH_SECONDS, schedules one refresh. Requests never wait on the RPC.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+
+from .models import JobListing, EscrowContract
+from .stellar_integration import get_stellar_client
+
+logger = logging.getLogger(__name__)
+
+STATUS_TIMEOUT = 300
+BALANCE_FRESH_SECONDS = 30
+BALANCE_TIMEOUT = 3600
+REFRESH_LOCK_SECONDS = 30
+
+# Backends whose entries live in one process: invalidations from other processes never reach them
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='escrow-balance')
+
+
+def _status_key(job_id):
+    return f"escrow_status:job:{job_id}"
+
+
+def _balance_key(contract_id):
+    return f"escrow_balance:{contract_id}"
+
+
+# ==================== STATUS ====================
+
+def build_status(job_id):
+    """Escrow status payload for a job, plus who may see it. Raises Http404."""
+    job = (
+        JobListing.objects.select_related('escrow_contract', 'escrow_contract__payout')
+        .filter(pk=job_id)
+        .first()
+    )
+    if job is None:
+        raise Http404("No JobListing matches the given query.")
+    escrow = getattr(job, 'escrow_contract', None)
+    if escrow is None:
+        data = {
+            "job_id": job.pk,
+            "job_title": job.title,
+            "contract_id": "",
+            "amount_held": "0",
+            "amount_held_kes": "0",
+            "amount_held_xlm": "0",
+            "status": "pending_deposit",
+            "chain_status": None,
+            "payout_status": None,
+            "funded_at": None,
+            "released_at": None,
+            "when_release": None,
+        }
+    else:
+        amount = str(escrow.amount)
+        payout = getattr(escrow, 'payout', None)
+        data = {
+            "job_id": job.pk,
+            "job_title": job.title,
+            "contract_id": escrow.contract_id,
+            "amount_held": amount,
+            "amount_held_kes": amount,
+            "amount_held_xlm": amount,
+            "status": escrow.status,
+            "chain_status": escrow.chain_status,
+            "payout_status": payout.status if payout else None,
+            "funded_at": escrow.funded_at.isoformat() if escrow.funded_at else None,
+            "released_at": escrow.released_at.isoformat() if escrow.released_at else None,
+            "when_release": "When employer marks work done" if escrow.status == "funded" else (escrow.released_at.isoformat() if escrow.released_at else None),
+        }
+    return {"employer_id": job.employer_id, "employee_id": job.employee_id, "data": data}
+
+
+def status_caching():
+    """Whether status entries may be cached: only in a cache every process shares."""
+    enabled = getattr(settings, 'ESCROW_STATUS_CACHING', None)
+    if enabled is None:
+        enabled = settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_BACKENDS
+    return enabled
+
+
+def get_status(job_id):
+    """Cached status entry for a job (see build_status)."""
+    if not status_caching():
+        return build_status(job_id)
+    key = _status_key(job_id)
+    entry = cache.get(key)
+    if entry is None:
+        entry = build_status(job_id)
+        cache.set(key, entry, STATUS_TIMEOUT)
+    return entry
+
+
+def invalidate(*job_ids):
+    """Drop cached status for these jobs once the current transaction commits."""
+    keys = [_status_key(job_id) for job_id in job_ids if job_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_escrows(escrow_ids):
+    invalidate(*EscrowContract.objects.filter(pk__in=list(escrow_ids)).values_list('job_listing_id', flat=True))
+
+
+# ==================== ON-CHAIN BALANCE ====================
+
+def _refresh_balance(contract_id):
+    try:
+        stroops = get_stellar_client().get_balances([contract_id]).get(contract_id)
+        cache.set(_balance_key(contract_id), {"stroops": stroops, "fetched_at": timezone.now()}, BALANCE_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Balance refresh failed for {contract_id}: {str(e)}")
+    finally:
+        cache.delete(f"{_balance_key(contract_id)}:refreshing")
+
+
+def onchain_balance(contract_id):
+    """
+    Last known on-chain balance, never blocking: schedules a background refresh when the
+    value is missing or older than BALANCE_FRESH_SECONDS (at most one refresh in flight).
+    """
+    if not contract_id:
+        return {"onchain_balance_stroops": None, "onchain_balance_as_of": None}
+    cached = cache.get(_balance_key(contract_id))
+    stale = cached is None or (timezone.now() - cached["fetched_at"]).total_seconds() > BALANCE_FRESH_SECONDS
+    if stale and cache.add(f"{_balance_key(contract_id)}:refreshing", True, REFRESH_LOCK_SECONDS):
+        _refresher.submit(_refresh_balance, contract_id)
+    return {
+        "onchain_balance_stroops": cached["stroops"] if cached else None,
+        "onchain_balance_as_of": cached["fetched_at"].isoformat() if cached else None,
+    }
@@ -0,0 +1,204 @@
+"""
+Escrow Event Ledger
+Append-only history of every escrow transition, with periodic per-escrow snapshots.
+
+escrow_service and provisioning call record() / record_many() in the same transaction
+as the UPDATE that performs a transition, so an event exists exactly when the
+transition happened. Each event stores the fields it set; folding an escrow's events
+in id order rebuilds its state.
+
+take_snapshots() (python manage.py snapshot_escrows) walks new events in id order and
+stores the folded state of an escrow every SNAPSHOT_EVERY events. It stops short of events
+younger than SNAPSHOT_LAG: ids are allocated before commit, so a slower transaction can
+still commit an event below the newest visible id, and a snapshot (or the checkpoint)
+past it would leave it out for good. state_at() starts from the latest snapshot at or
+before the requested time and folds only the events after it; history() is a range scan
+on (escrow_contract, created_at).
+
+Escrows that predate the ledger get one 'imported' event: snapshot_escrows --backfill.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import takewhile
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import EscrowContract, EscrowEvent, EscrowSnapshot, ReconciliationCheckpoint
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_EVERY = 50
+CHUNK_SIZE = 5000
+CHECKPOINT_NAME = 'escrow_snapshots'
+# Longer than any transaction that records an event takes to commit
+SNAPSHOT_LAG = timedelta(seconds=getattr(settings, 'ESCROW_SNAPSHOT_LAG_SECONDS', 300))
+
+
+def _json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, 'pk'):
+        return value.pk
+    return value
+
+
+def _changes(values):
+    return {
+        (f"{field}_id" if hasattr(value, 'pk') else field): _json(value)
+        for field, value in values.items() if field not in ('status', 'updated_at')
+    }
+
+
+def record(escrow_pk, kind, new_status, **changes):
+    """Append one event ('' new_status: status unchanged). Call inside the transaction that applied the change."""
+    return EscrowEvent.objects.create(
+        escrow_contract_id=escrow_pk, kind=kind, status=new_status, changes=_changes(changes)
+    )
+
+
+def record_many(escrow_pks, kind, new_status, **changes):
+    """Append the same event for many escrows (bulk transitions)."""
+    now = timezone.now()
+    payload = _changes(changes)
+    EscrowEvent.objects.bulk_create([
+        EscrowEvent(escrow_contract_id=pk, kind=kind, status=new_status, changes=payload, created_at=now)
+        for pk in escrow_pks
+    ])
+
+
+def opened(escrow):
+    return record(
+        escrow.pk, 'opened', escrow.status,
+        contract_id=escrow.contract_id, job_listing_id=escrow.job_listing_id, employer_id=escrow.employer_id,
+        amount=escrow.amount, chain_status=escrow.chain_status,
+    )
+
+
+def backfill(chunk_size=1000):
+    """Record an 'imported' event with the current state of escrows that predate the ledger."""
+    count = 0
+    escrows = EscrowContract.objects.filter(events=None).order_by('id')
+    for escrow in escrows.iterator(chunk_size=chunk_size):
+        EscrowEvent.objects.create(
+            escrow_contract_id=escrow.pk, kind='imported', status=escrow.status,
+            created_at=escrow.updated_at or escrow.created_at,
+            changes=_changes({
+                'contract_id': escrow.contract_id, 'job_listing_id': escrow.job_listing_id,
+                'employer_id': escrow.employer_id, 'employee_id': escrow.employee_id, 'amount': escrow.amount,
+                'chain_status': escrow.chain_status,
+                'funded_at': escrow.funded_at, 'released_at': escrow.released_at,
+            }),
+        )
+        count += 1
+    return count
+
+
+# ==================== READS ====================
+
+def fold(state, events):
+    """Apply events (in id order) to a state dict. Returns (state, last event or None, count)."""
+    state = dict(state)
+    last, count = None, 0
+    for event in events:
+        state.update(event.changes)
+        if event.status:
+            state['status'] = event.status
+        last, count = event, count + 1
+    return state, last, count
+
+
+def history(escrow_id, start=None, end=None):
+    """Events of one escrow in time order, optionally within [start, end]."""
+    events = EscrowEvent.objects.filter(escrow_contract_id=escrow_id)
+    if start:
+        events = events.filter(created_at__gte=start)
+    if end:
+        events = events.filter(created_at__lte=end)
+    return events.order_by('created_at', 'id')
+
+
+def state_at(escrow_id, moment):
+    """
+    The escrow's state as of `moment` (None if it did not exist yet): the latest snapshot
+    at or before it plus the events since.
+    """
+    snapshot = (
+        EscrowSnapshot.objects.filter(escrow_contract_id=escrow_id, as_of__lte=moment)
+        .order_by('-as_of', '-last_event_id').first()
+    )
+    events = EscrowEvent.objects.filter(escrow_contract_id=escrow_id, created_at__lte=moment)
+    if snapshot:
+        events = events.filter(id__gt=snapshot.last_event_id)
+    state, last, _ = fold(snapshot.state if snapshot else {}, events.order_by('id'))
+    if snapshot is None and last is None:
+        return None
+    return state
+
+
+# ==================== SNAPSHOTS ====================
+
+def take_snapshots(every=SNAPSHOT_EVERY, chunk_size=CHUNK_SIZE, lag=SNAPSHOT_LAG):
+    """
+    Snapshot every escrow that gained `every` events since its last snapshot, walking
+    events recorded since the previous run up to the first one younger than `lag`.
+    Returns the number of snapshots written.
+    """
+    checkpoint, _ = ReconciliationCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+    cutoff = timezone.now() - lag
+    written = 0
+    while True:
+        chunk = list(
+            EscrowEvent.objects.filter(id__gt=checkpoint.last_id).order_by('id')
+            .values_list('id', 'escrow_contract_id', 'created_at')[:chunk_size]
+        )
+        chunk = list(takewhile(lambda event: event[2] <= cutoff, chunk))
+        if not chunk:
+            break
+        high = chunk[-1][0]
+        escrow_ids = {escrow_id for _, escrow_id, _ in chunk}
+        latest_ids = (
+            EscrowSnapshot.objects.filter(escrow_contract_id__in=escrow_ids)
+            .values('escrow_contract_id').annotate(last=Max('last_event_id')).values_list('last', flat=True)
+        )
+        latest = {
+            s.escrow_contract_id: s
+            for s in EscrowSnapshot.objects.filter(escrow_contract_id__in=escrow_ids, last_event_id__in=latest_ids)
+        }
+        # Each escrow resumes from its own snapshot; replay is bounded by `every` + the chunk
+        low = min((latest[e].last_event_id if e in latest else 0) for e in escrow_ids)
+        progress = {
+            e: {'state': dict(latest[e].state), 'count': latest[e].event_count, 'since': 0,
+                'after': latest[e].last_event_id}
+            if e in latest else {'state': {}, 'count': 0, 'since': 0, 'after': 0}
+            for e in escrow_ids
+        }
+        snapshots = []
+        for event in (
+            EscrowEvent.objects.filter(escrow_contract_id__in=escrow_ids, id__gt=low, id__lte=high)
+            .order_by('id').iterator(chunk_size=chunk_size)
+        ):
+            p = progress[event.escrow_contract_id]
+            if event.id <= p['after']:
+                continue
+            p['state'].update(event.changes)
+            if event.status:
+                p['state']['status'] = event.status
+            p['count'] += 1
+            p['since'] += 1
+            if p['since'] >= every:
+                snapshots.append(EscrowSnapshot(
+                    escrow_contract_id=event.escrow_contract_id, state=dict(p['state']),
+                    last_event_id=event.id, as_of=event.created_at, event_count=p['count'],
+                ))
+                p['since'] = 0
+        EscrowSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+        written += len(snapshots)
+        checkpoint.last_id = high
+        checkpoint.save(update_fields=['last_id', 'updated_at'])
+    if written:
+        logger.info(f"Wrote {written} escrow snapshot(s)")
+    return written
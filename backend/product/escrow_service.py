@@ -0,0 +1,705 @@
+"""
+Escrow State Machine
+All escrow transitions (assign, fund, complete, release, payout) go through here.
+
+    pending_deposit --assign--> in_progress --fund--> funded
+    pending_deposit --fund----> funded      --assign--> funded (employee set)
+    funded --complete--> completed --release--> released
+    payout: pending --send--> processing --settle--> completed / failed   (see payouts.py)
+
+Each transition runs inside transaction.atomic() with the escrow row locked
+(select_for_update) and is applied as a conditional UPDATE ... WHERE status IN (...).
+If no row matches, the transition was already applied (e.g. a retried callback or a
+double-clicked "complete") and its side effects - Stellar and Intersend calls - are skipped.
+
+New escrows are opened locally (open_escrow) and created on Stellar in the background
+(provisioning.py); funding and release wait for that. When an upstream circuit breaker
+is open, side effects are deferred to the retry queue instead of blocking: on-chain
+funding, the release of a completed escrow (it stays completed until released), and
+payout sends (the payout stays pending).
+"""
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, When, Value, F, TextField
+from django.utils import timezone
+
+from .models import JobListing, JobApplication, EscrowContract, MobileMoneyPayout
+from .stellar_integration import get_stellar_client
+from .mobile_money_integration import UNCONFIRMED, get_intersend_client
+from .money import Money
+from .payouts import next_check_delay
+from .circuit_breaker import CircuitOpenError
+from . import retry_queue, escrow_cache, rollups, escrow_events, reconciliation
+
+logger = logging.getLogger(__name__)
+
+FUNDABLE_STATUSES = ('pending_deposit', 'in_progress')
+COMPLETABLE_JOB_STATUSES = ('in_progress', 'assigned')
+BULK_COMPLETE_MAX = getattr(settings, 'BULK_COMPLETE_MAX', 500)
+
+
+class TransitionError(Exception):
+    """Transition not allowed from the current state. Message is safe to show to the user."""
+
+
+class EscrowNotFound(TransitionError):
+    pass
+
+
+class ReleaseError(TransitionError):
+    """On-chain release failed; local state was rolled back to funded."""
+
+
+def _locked_escrow(**lookup):
+    return EscrowContract.objects.select_for_update().get(**lookup)
+
+
+def _transition(escrow_pk, from_statuses, event=None, **values):
+    """
+    Conditional UPDATE; returns True if this call performed the transition, and then
+    appends it to the escrow event ledger (kind `event`, default the new status).
+    """
+    values.setdefault('updated_at', timezone.now())
+    if EscrowContract.objects.filter(pk=escrow_pk, status__in=from_statuses).update(**values) != 1:
+        return False
+    if event is not False:
+        escrow_events.record(escrow_pk, event or values['status'], values['status'], **values)
+    return True
+
+
+def _changed(*job_ids):
+    """Drop cached escrow status and dashboard totals for jobs whose escrow or status changed."""
+    escrow_cache.invalidate(*job_ids)
+    rollups.mark_stale(job_ids=job_ids)
+
+
+# ==================== ASSIGN ====================
+
+def assign_job(job_listing, employee, application=None):
+    """Accept an application (optional) and assign the employee to an open job. Returns False if no longer open."""
+    with transaction.atomic():
+        job = JobListing.objects.select_for_update().get(pk=job_listing.pk)
+        if job.status != 'open':
+            return False
+        if application is not None:
+            JobApplication.objects.filter(pk=application.pk, status='pending').update(status='accepted')
+        now = timezone.now()
+        job.employee = employee
+        job.status = 'assigned'
+        job.assigned_at = now
+        job.save()
+        escrow = EscrowContract.objects.select_for_update().filter(job_listing=job).first()
+        if escrow:
+            EscrowContract.objects.filter(pk=escrow.pk).update(employee=employee, updated_at=now)
+            # Keep a funded escrow funded so the job can be completed
+            started = _transition(escrow.pk, ('pending_deposit',), event=False, status='in_progress')
+            escrow_events.record(escrow.pk, 'assigned', 'in_progress' if started else escrow.status, employee=employee)
+        _changed(job.pk)
+    job_listing.refresh_from_db()
+    return True
+
+
+# ==================== FUND ====================
+
+def fund_escrow(escrow_contract, amount, transaction_hash=None):
+    """
+    Mark escrow funded and fund the Stellar contract. Only the call that performs the
+    transition talks to Stellar; repeats return False without side effects. The Stellar
+    call runs once the caller's transaction commits (right away outside one), so no row
+    lock is held while it waits on the network.
+    """
+    with transaction.atomic():
+        escrow = _locked_escrow(pk=escrow_contract.pk)
+        if not _transition(escrow.pk, FUNDABLE_STATUSES, status='funded', funded_at=timezone.now()):
+            logger.info(f"Escrow {escrow.contract_id} already {escrow.status}; skipping funding")
+            return False
+        if escrow.job_listing_id:
+            JobListing.objects.filter(pk=escrow.job_listing_id).exclude(
+                escrow_contract_id=escrow.contract_id
+            ).update(escrow_contract_id=escrow.contract_id, updated_at=timezone.now())
+        _changed(escrow.job_listing_id)
+    transaction.on_commit(lambda: _fund_on_chain(escrow, amount, transaction_hash))
+    escrow_contract.refresh_from_db()
+    return True
+
+
+def _fund_on_chain(escrow, amount, transaction_hash):
+    """Fund the committed escrow's Stellar contract, or queue the call for later."""
+    stellar_funded = False
+    if escrow.chain_status == 'created':
+        try:
+            stellar_funded = get_stellar_client().fund_escrow_contract(
+                contract_id=escrow.contract_id,
+                amount=amount,
+                transaction_hash=transaction_hash
+            )
+        except CircuitOpenError as e:
+            logger.warning(f"Stellar unavailable ({e})")
+        except Exception as e:
+            # The deposit is committed: defer the chain call rather than lose it
+            logger.error(f"Stellar escrow funding error for contract {escrow.contract_id}: {str(e)}")
+    if not stellar_funded:
+        # Deposit was received; keep local status funded and fund on chain later
+        logger.warning(f"Stellar escrow funding deferred for contract: {escrow.contract_id}")
+        amount = Money.parse(amount)
+        retry_queue.enqueue('stellar.fund', f"stellar.fund:{escrow.pk}", {
+            'contract_id': escrow.contract_id,
+            'amount': str(amount),
+            'currency': amount.currency,
+            'transaction_hash': transaction_hash,
+        })
+
+
+@retry_queue.handler('stellar.fund')
+def _retry_stellar_funding(payload):
+    if EscrowContract.objects.filter(contract_id=payload['contract_id']).exclude(chain_status='created').exists():
+        return False  # provisioning re-arms this once the contract exists
+    return get_stellar_client().fund_escrow_contract(
+        contract_id=payload['contract_id'],
+        amount=Money.parse(payload['amount'], payload['currency']),
+        transaction_hash=payload.get('transaction_hash'),
+    )
+
+
+# ==================== OPEN ====================
+
+def open_escrow(job_listing, employer):
+    """
+    Create the pending escrow for a new job inside the caller's transaction. The local
+    contract id (ESCROW_J<job id>) accepts deposits right away; the contract itself is
+    created on Stellar in the background by provisioning.provision_pending().
+    """
+    contract_id = f"ESCROW_J{job_listing.pk}"
+    escrow = EscrowContract.objects.create(
+        job_listing=job_listing,
+        contract_id=contract_id,
+        employer=employer,
+        amount=job_listing.budget,
+        status='pending_deposit',
+        chain_status='provisioning',
+    )
+    escrow_events.opened(escrow)
+    JobListing.objects.filter(pk=job_listing.pk).update(escrow_contract_id=contract_id, updated_at=timezone.now())
+    job_listing.escrow_contract_id = contract_id
+    return escrow
+
+
+# ==================== COMPLETE & RELEASE ====================
+
+def normalize_payout_phone(phone_number):
+    phone = (phone_number or "").strip()
+    if not phone:
+        return ""
+    if phone.startswith('0'):
+        return '254' + phone[1:]
+    if not phone.startswith('254'):
+        return '254' + phone
+    return phone
+
+
+def complete_work(job_listing, work_summary=None):
+    """
+    Complete a job, release its escrow on Stellar and pay the worker via mobile money.
+    Returns (escrow_contract, payout). Raises TransitionError if the job/escrow is not in a
+    completable state, including when a concurrent call already completed it.
+    """
+    job, escrow, payout_phone, previous_job_status = _start_completion(job_listing, work_summary)
+    if escrow.chain_status != 'created':
+        return _release_not_provisioned(escrow, job_listing)
+    try:
+        released = release_stellar_escrow(escrow)
+    except CircuitOpenError as e:
+        return _release_unavailable(escrow, job_listing, e)
+    if not released:
+        _release_failed(job, escrow, previous_job_status)
+    payout, created = _record_release(escrow, job.employee, payout_phone)
+    if created:
+        send_payout(payout)
+    job_listing.refresh_from_db()
+    return escrow, payout
+
+
+async def acomplete_work(job_listing, work_summary=None):
+    """
+    complete_work for async views: the Stellar release and the Intersend send are awaited,
+    so the request holds no thread while they are in flight. The transactional steps (row
+    locks, conditional updates) are shared with complete_work and run in a worker thread,
+    as the async ORM has no transactions or select_for_update.
+    """
+    job, escrow, payout_phone, previous_job_status = await sync_to_async(_start_completion)(job_listing, work_summary)
+    if escrow.chain_status != 'created':
+        return await sync_to_async(_release_not_provisioned)(escrow, job_listing)
+    try:
+        released = await arelease_stellar_escrow(escrow)
+    except CircuitOpenError as e:
+        return await sync_to_async(_release_unavailable)(escrow, job_listing, e)
+    if not released:
+        await sync_to_async(_release_failed)(job, escrow, previous_job_status)
+    payout, created = await sync_to_async(_record_release)(escrow, job.employee, payout_phone)
+    if created:
+        await asend_payout(payout)
+    await job_listing.arefresh_from_db()
+    return escrow, payout
+
+
+def _start_completion(job_listing, work_summary):
+    """Lock, check and move the job to completed and the escrow funded -> completed."""
+    with transaction.atomic():
+        job = JobListing.objects.select_for_update().select_related('employee').get(pk=job_listing.pk)
+        if job.status not in COMPLETABLE_JOB_STATUSES:
+            raise TransitionError(f"Job must be in progress or assigned. Current status: {job.status}")
+        try:
+            escrow = _locked_escrow(job_listing=job)
+        except EscrowContract.DoesNotExist:
+            raise EscrowNotFound("Escrow contract not found")
+        if escrow.status != 'funded':
+            raise TransitionError(f"Escrow not funded. Current status: {escrow.status}")
+        payout_phone = normalize_payout_phone(job.employee.phone_number if job.employee else None)
+        if not payout_phone:
+            raise TransitionError("Worker has no M-Pesa number. They must set a phone number for payment.")
+        previous_job_status = job.status
+        now = timezone.now()
+        job.status = 'completed'
+        job.completed_at = now
+        if work_summary:
+            job.work_summary = work_summary
+        job.save()
+        if not _transition(escrow.pk, ('funded',), status='completed'):
+            raise TransitionError("Work is already being completed")
+        _changed(job.pk)
+    # Loaded now: the release step may run on the event loop, where lazy loads are not allowed
+    escrow.employee = job.employee if escrow.employee_id == job.employee_id else escrow.employee
+    return job, escrow, payout_phone, previous_job_status
+
+
+def _release_not_provisioned(escrow, job_listing):
+    # Contract not on Stellar yet: keep the work completed and release once provisioned
+    logger.info(f"Release of {escrow.contract_id} deferred until the contract is created on chain")
+    return _defer_release(escrow, job_listing)
+
+
+def _release_unavailable(escrow, job_listing, error):
+    # Stellar is down: keep the work completed and release (then pay) from the retry queue
+    logger.warning(f"Stellar unavailable ({error}); release of {escrow.contract_id} deferred")
+    return _defer_release(escrow, job_listing, delay=error.retry_after)
+
+
+def _release_failed(job, escrow, previous_job_status):
+    """Roll back to funded so the employer can retry, then raise ReleaseError."""
+    with transaction.atomic():
+        if _transition(escrow.pk, ('completed',), event='release_failed', status='funded'):
+            JobListing.objects.filter(pk=job.pk, status='completed').update(
+                status=previous_job_status, completed_at=None, updated_at=timezone.now()
+            )
+            _changed(job.pk)
+    raise ReleaseError("Failed to release funds from Stellar contract")
+
+
+def _defer_release(escrow, job_listing, delay=0):
+    retry_queue.enqueue('escrow.release', f"escrow.release:{escrow.pk}", {'escrow_id': escrow.pk}, delay=delay)
+    escrow.refresh_from_db()
+    job_listing.refresh_from_db()
+    return escrow, None
+
+
+def _record_release(escrow, employee, payout_phone):
+    """completed -> released and create the payout (once). Returns (payout, created); the caller sends it."""
+    with transaction.atomic():
+        _transition(escrow.pk, ('completed',), status='released', released_at=timezone.now())
+        payout, created = MobileMoneyPayout.objects.get_or_create(
+            escrow_contract=escrow,
+            defaults={
+                'employee': employee,
+                'phone_number': payout_phone,
+                'amount': escrow.amount,
+                'status': 'pending',
+            }
+        )
+        _changed(escrow.job_listing_id)
+    escrow.refresh_from_db()
+    return payout, created
+
+
+@retry_queue.handler('escrow.release')
+def _retry_release(payload):
+    escrow = EscrowContract.objects.select_related('employee').get(pk=payload['escrow_id'])
+    if escrow.status != 'completed':
+        return True
+    if escrow.chain_status != 'created':
+        return False
+    if not release_stellar_escrow(escrow):
+        return False
+    payout, created = _record_release(escrow, escrow.employee, normalize_payout_phone(escrow.employee.phone_number))
+    if created:
+        send_payout(payout)
+    return True
+
+
+def complete_jobs(employer, items):
+    """
+    Complete many of an employer's jobs at once. items: [(job_id, work_summary or None)].
+
+    Same transitions as complete_work, batched: all jobs are validated in one query, the
+    Stellar releases go out as one batch, and payouts are sent through Intersend's bulk
+    disbursement. Jobs that fail validation or release are left untouched (or rolled back
+    to funded). Returns one result dict per distinct job id, in request order.
+    """
+    summaries = {}
+    for job_id, work_summary in items:
+        summaries.setdefault(job_id, work_summary)
+    results = {job_id: {"job_id": job_id, "success": False} for job_id in summaries}
+    now = timezone.now()
+
+    with transaction.atomic():
+        jobs = list(
+            JobListing.objects.select_for_update(of=('self',))
+            .select_related('employee', 'escrow_contract')
+            .filter(pk__in=list(summaries))
+        )
+        for job_id in set(summaries) - {job.pk for job in jobs}:
+            results[job_id]["error"] = "Job not found"
+        candidates = {}
+        for job in jobs:
+            escrow = getattr(job, 'escrow_contract', None)
+            if job.employer_id != employer.pk:
+                error = "Only the employer can mark work as complete"
+            elif job.status not in COMPLETABLE_JOB_STATUSES:
+                error = f"Job must be in progress or assigned. Current status: {job.status}"
+            elif escrow is None:
+                error = "Escrow contract not found"
+            elif escrow.status != 'funded':
+                error = f"Escrow not funded. Current status: {escrow.status}"
+            elif escrow.chain_status != 'created':
+                error = "Escrow is still being set up on Stellar"
+            elif not normalize_payout_phone(job.employee.phone_number if job.employee else None):
+                error = "Worker has no M-Pesa number. They must set a phone number for payment."
+            else:
+                candidates[escrow.pk] = job
+                continue
+            results[job.pk]["error"] = error
+
+        # Lock the escrows and keep those still funded
+        locked = set(
+            EscrowContract.objects.select_for_update()
+            .filter(pk__in=list(candidates), status='funded')
+            .values_list('pk', flat=True)
+        )
+        for escrow_pk in set(candidates) - locked:
+            results[candidates.pop(escrow_pk).pk]["error"] = "Work is already being completed"
+        if not candidates:
+            return list(results.values())
+
+        job_ids = [job.pk for job in candidates.values()]
+        values = {'status': 'completed', 'completed_at': now, 'updated_at': now}
+        with_summary = [When(pk=pk, then=Value(summaries[pk])) for pk in job_ids if summaries[pk]]
+        if with_summary:
+            values['work_summary'] = Case(*with_summary, default=F('work_summary'), output_field=TextField())
+        JobListing.objects.filter(pk__in=job_ids).update(**values)
+        EscrowContract.objects.filter(pk__in=list(candidates)).update(status='completed', updated_at=now)
+        escrow_events.record_many(candidates, 'completed', 'completed')
+        _changed(*job_ids)
+
+    # One batched release for escrows whose worker has a Stellar account
+    escrows = {job.escrow_contract.pk: job.escrow_contract for job in candidates.values()}
+    releases = [
+        (escrow.contract_id, candidates[pk].employee.stellar_account_id, Money.from_decimal(escrow.amount))
+        for pk, escrow in escrows.items()
+        if candidates[pk].employee.stellar_account_id
+    ]
+    try:
+        released = get_stellar_client().release_escrow_contracts(releases)
+    except Exception as e:
+        logger.error(f"Stellar batch release error: {str(e)}")
+        released = {}
+    failed = [
+        pk for pk, escrow in escrows.items()
+        if candidates[pk].employee.stellar_account_id and not released.get(escrow.contract_id)
+    ]
+
+    with transaction.atomic():
+        _changed(*job_ids)
+        # Lock the escrows still completed: only those are rolled back or released
+        completed = set(
+            EscrowContract.objects.select_for_update()
+            .filter(pk__in=list(candidates), status='completed')
+            .values_list('pk', flat=True)
+        )
+        if failed:
+            # Roll back to funded so the employer can retry these jobs
+            rolled_back = [pk for pk in failed if pk in completed]
+            EscrowContract.objects.filter(pk__in=rolled_back).update(status='funded', updated_at=timezone.now())
+            escrow_events.record_many(rolled_back, 'release_failed', 'funded')
+            for previous_status in COMPLETABLE_JOB_STATUSES:
+                JobListing.objects.filter(
+                    pk__in=[candidates[pk].pk for pk in failed if candidates[pk].status == previous_status],
+                    status='completed',
+                ).update(status=previous_status, completed_at=None, updated_at=timezone.now())
+            for pk in failed:
+                results[candidates.pop(pk).pk]["error"] = "Failed to release funds from Stellar contract"
+        for escrow_pk in set(candidates) - completed:
+            results[candidates.pop(escrow_pk).pk]["error"] = "Escrow changed while completing"
+        if not candidates:
+            return list(results.values())
+        released_at = timezone.now()
+        EscrowContract.objects.filter(pk__in=list(candidates)).update(
+            status='released', released_at=released_at, updated_at=released_at
+        )
+        escrow_events.record_many(candidates, 'released', 'released', released_at=released_at)
+        new_payouts = MobileMoneyPayout.objects.bulk_create([
+            MobileMoneyPayout(
+                escrow_contract_id=pk,
+                employee=job.employee,
+                phone_number=normalize_payout_phone(job.employee.phone_number),
+                amount=escrows[pk].amount,
+                status='pending',
+            )
+            for pk, job in candidates.items()
+        ])
+
+    send_payouts(new_payouts)
+    payout_status = {p.escrow_contract_id: p.status for p in new_payouts}
+    for pk, job in candidates.items():
+        results[job.pk].update({
+            "success": True,
+            "escrow_status": 'released',
+            "payout_status": payout_status[pk],
+            "amount": str(escrows[pk].amount),
+        })
+    return list(results.values())
+
+
+def send_payout(payout, defer=True):
+    """
+    Send a pending payout via Intersend exactly once. An accepted payout stays processing
+    until the status callback or poller confirms settlement; a rejected send fails it.
+    If Intersend's breaker is open the payout goes back to pending and, with defer=True,
+    is queued for retry (otherwise CircuitOpenError is raised).
+    Returns True if Intersend accepted (or already settled) the payout.
+    """
+    if not _claim_payout(payout):
+        return payout.status in ('processing', 'completed')
+    try:
+        accepted = trigger_mobile_money_payout(payout)
+    except CircuitOpenError as e:
+        return _payout_unavailable(payout, e, defer)
+    return _payout_sent(payout, accepted)
+
+
+async def asend_payout(payout, defer=True):
+    """send_payout with the Intersend call awaited."""
+    if not await sync_to_async(_claim_payout)(payout):
+        return payout.status in ('processing', 'completed')
+    try:
+        accepted = await atrigger_mobile_money_payout(payout)
+    except CircuitOpenError as e:
+        return await sync_to_async(_payout_unavailable)(payout, e, defer)
+    return await sync_to_async(_payout_sent)(payout, accepted)
+
+
+def _claim_payout(payout):
+    """pending -> processing; False (with payout refreshed) if another call already sent it."""
+    if MobileMoneyPayout.objects.filter(pk=payout.pk, status='pending').update(status='processing') != 1:
+        payout.refresh_from_db()
+        return False
+    payout.status = 'processing'
+    return True
+
+
+def _payout_unavailable(payout, error, defer):
+    MobileMoneyPayout.objects.filter(pk=payout.pk, status='processing').update(status='pending')
+    payout.status = 'pending'
+    escrow_cache.invalidate_escrows([payout.escrow_contract_id])
+    if not defer:
+        raise error
+    logger.warning(f"Intersend unavailable ({error}); payout {payout.pk} deferred")
+    retry_queue.enqueue('payout.send', f"payout.send:{payout.pk}", {'payout_id': payout.pk},
+                        delay=error.retry_after)
+    return False
+
+
+def _payout_sent(payout, accepted):
+    if accepted:
+        now = timezone.now()
+        payout.submitted_at = now
+        payout.next_check_at = now + next_check_delay(0)
+        payout.save(update_fields=['transaction_reference', 'submitted_at', 'next_check_at'])
+    else:
+        payout.status = 'failed'
+        payout.failure_reason = "Failed to process mobile money payout"
+        with transaction.atomic():
+            payout.save(update_fields=['status', 'failure_reason'])
+            reconciliation.mark_changed([payout.escrow_contract_id])
+    escrow_cache.invalidate_escrows([payout.escrow_contract_id])
+    return bool(accepted)
+
+
+@retry_queue.handler('payout.send')
+def _retry_payout(payload):
+    payout = MobileMoneyPayout.objects.get(pk=payload['payout_id'])
+    if payout.status == 'pending':
+        send_payout(payout, defer=False)
+    return True
+
+
+def send_payouts(payouts):
+    """
+    Bulk version of send_payout: every pending payout in the list goes out in as few
+    Intersend bulk requests as possible. Updates the payout objects in place.
+    Only payouts Intersend rejects fail. When the outcome is unknown (a timeout after the
+    batch may have been taken, a 5xx) they stay processing under their PAYOUT_ reference,
+    and payouts.poll_due() settles them.
+    """
+    if not payouts:
+        return
+    now = timezone.now()
+    MobileMoneyPayout.objects.filter(pk__in=[p.pk for p in payouts], status='pending').update(status='processing')
+    by_reference = {f"PAYOUT_{p.escrow_contract_id}_{p.pk}": p for p in payouts}
+    try:
+        results = get_intersend_client().send_bulk_mobile_money(
+            [{'phone_number': p.phone_number, 'amount': Money.from_decimal(p.amount), 'reference': ref}
+             for ref, p in by_reference.items()],
+            currency='KES',
+            callback_url=getattr(settings, 'INTERSEND_CALLBACK_URL', None),
+        )
+    except CircuitOpenError as e:
+        logger.warning(f"Intersend unavailable ({e}); {len(payouts)} payout(s) deferred")
+        MobileMoneyPayout.objects.filter(pk__in=[p.pk for p in payouts], status='processing').update(status='pending')
+        for payout in payouts:
+            payout.status = 'pending'
+            retry_queue.enqueue('payout.send', f"payout.send:{payout.pk}", {'payout_id': payout.pk},
+                                delay=e.retry_after)
+        escrow_cache.invalidate_escrows([p.escrow_contract_id for p in payouts])
+        return
+    except Exception as e:
+        # Intersend may have taken the batch: leave the payouts for the poller to settle
+        logger.error(f"Bulk mobile money payout error: {str(e)}")
+        results = {reference: {'status': UNCONFIRMED} for reference in by_reference}
+    accepted, rejected, unconfirmed = [], [], 0
+    for reference, payout in by_reference.items():
+        result = results.get(reference)
+        if result:
+            # Unconfirmed payouts are checked by our reference until Intersend reports them
+            unconfirmed += result.get('status') == UNCONFIRMED
+            payout.status = 'processing'
+            payout.transaction_reference = result.get('transaction_id') or reference
+            payout.submitted_at = now
+            payout.next_check_at = now + next_check_delay(0)
+            accepted.append(payout)
+        else:
+            payout.status = 'failed'
+            payout.failure_reason = "Failed to process mobile money payout"
+            rejected.append(payout)
+    MobileMoneyPayout.objects.bulk_update(accepted, ['transaction_reference', 'submitted_at', 'next_check_at'])
+    if rejected:
+        with transaction.atomic():
+            MobileMoneyPayout.objects.filter(pk__in=[p.pk for p in rejected], status='processing').update(
+                status='failed', failure_reason="Failed to process mobile money payout"
+            )
+            reconciliation.mark_changed([p.escrow_contract_id for p in rejected])
+    escrow_cache.invalidate_escrows([p.escrow_contract_id for p in payouts])
+    logger.info(f"Bulk payout: {len(accepted)} accepted ({unconfirmed} unconfirmed), {len(rejected)} failed")
+
+
+# ==================== SIDE EFFECTS ====================
+
+def release_stellar_escrow(escrow_contract):
+    """
+    Call Stellar Rust contract to release escrow funds
+    """
+    try:
+        employee_account = _employee_account(escrow_contract)
+        if not employee_account:
+            return True  # Still allow mobile money payout
+        success = get_stellar_client().release_escrow_contract(
+            contract_id=escrow_contract.contract_id,
+            employee_account=employee_account,
+            amount=Money.from_decimal(escrow_contract.amount)
+        )
+        if success:
+            logger.info(f"Stellar escrow released: {escrow_contract.contract_id} -> {employee_account}")
+        return success
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"Stellar escrow release error: {str(e)}")
+        return False
+
+
+async def arelease_stellar_escrow(escrow_contract):
+    """release_stellar_escrow with the Stellar call awaited."""
+    try:
+        employee_account = _employee_account(escrow_contract)
+        if not employee_account:
+            return True
+        success = await get_stellar_client().arelease_escrow_contract(
+            contract_id=escrow_contract.contract_id,
+            employee_account=employee_account,
+            amount=Money.from_decimal(escrow_contract.amount)
+        )
+        if success:
+            logger.info(f"Stellar escrow released: {escrow_contract.contract_id} -> {employee_account}")
+        return success
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"Stellar escrow release error: {str(e)}")
+        return False
+
+
+def _employee_account(escrow_contract):
+    """Employee's Stellar account; None means pay out via mobile money only."""
+    employee_account = escrow_contract.employee.stellar_account_id if escrow_contract.employee else None
+    if not employee_account:
+        logger.warning(f"No Stellar account for employee; skipping on-chain release, payout via mobile money only")
+    return employee_account
+
+
+def trigger_mobile_money_payout(payout):
+    """
+    Trigger mobile money payout via Intersend API
+    """
+    try:
+        result = get_intersend_client().send_mobile_money(**_payout_request(payout))
+        return _payout_accepted(payout, result)
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"Mobile money payout error: {str(e)}")
+        return False
+
+
+async def atrigger_mobile_money_payout(payout):
+    """trigger_mobile_money_payout with the Intersend call awaited."""
+    try:
+        result = await get_intersend_client().asend_mobile_money(**_payout_request(payout))
+        return _payout_accepted(payout, result)
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        logger.error(f"Mobile money payout error: {str(e)}")
+        return False
+
+
+def _payout_request(payout):
+    return {
+        'phone_number': payout.phone_number,
+        'amount': Money.from_decimal(payout.amount),
+        'currency': 'KES',
+        'reference': payout.transaction_reference,
+        'callback_url': getattr(settings, 'INTERSEND_CALLBACK_URL', None),
+    }
+
+
+def _payout_accepted(payout, result):
+    if result:
+        payout.transaction_reference = result.get('transaction_id', payout.transaction_reference)
+        logger.info(f"Mobile money payout accepted: {payout.transaction_reference}")
+        return True
+    logger.error(f"Failed to initiate mobile money payout")
+    return False
@@ -0,0 +1,183 @@
+"""
+Ledger Export Module
+Streams deposits, payouts and work history as CSV or JSONL in constant memory.
+
+Rows come from .iterator(chunk_size=...) querysets ordered by (created_at, id); deposits
+and payouts are merged into one time-ordered stream with heapq.merge, so no export ever
+holds more than a chunk per source. Rows keep datetime/Decimal values: to_jsonl and the
+API renderer encode them (renderers.py), to_csv writes isoformat() / str(). The same
+generators back the export endpoints (StreamingHttpResponse) and the export_ledger
+management command.
+
+Run an offline export with: python manage.py export_ledger --kind transactions --format csv -o ledger.csv
+"""
+import csv
+import heapq
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import renderers
+from .fast_serializers import full_name
+from .models import JobListing, MpesaDeposit, PaystackDeposit, MobileMoneyPayout
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+TRANSACTION_FIELDS = [
+    'type', 'id', 'job_id', 'job_title', 'amount', 'currency', 'reference', 'status', 'created_at', 'completed_at',
+]
+WORK_HISTORY_FIELDS = [
+    'job_id', 'job_title', 'employer_name', 'completed_at', 'duration_days', 'work_summary', 'budget',
+]
+
+
+class ExportError(ValueError):
+    """Bad export parameters. Message is safe to show to the user."""
+
+
+def parse_bound(value, end=False):
+    """
+    Parse a from/to filter (ISO date or datetime) into an aware datetime, or None.
+    Ranges are half-open: a bare end date is taken as midnight after it, so the whole day is included.
+    """
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+    if day:
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    elif moment is None:
+        raise ExportError(f"Invalid date: {value}. Use YYYY-MM-DD or an ISO datetime.")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _in_range(queryset, field, start=None, end=None):
+    if start:
+        queryset = queryset.filter(**{f"{field}__gte": start})
+    if end:
+        queryset = queryset.filter(**{f"{field}__lt": end})
+    return queryset
+
+
+# ==================== ROWS ====================
+
+def _deposit_rows(model, start, end, chunk_size, using, **lookup):
+    queryset = _in_range(model.objects.using(using).filter(**lookup), 'created_at', start, end).order_by('created_at', 'id')
+    currency = 'currency' if model is PaystackDeposit else None
+    fields = ['id', 'escrow_contract__job_listing_id', 'escrow_contract__job_listing__title', 'amount',
+              'transaction_reference', 'status', 'created_at', 'completed_at'] + ([currency] if currency else [])
+    for row in queryset.values(*fields).iterator(chunk_size=chunk_size):
+        yield {
+            "type": "deposit",
+            "id": row['id'],
+            "job_id": row['escrow_contract__job_listing_id'],
+            "job_title": row['escrow_contract__job_listing__title'],
+            "amount": row['amount'],
+            "currency": row[currency] if currency else "KES",
+            "reference": row['transaction_reference'],
+            "status": row['status'],
+            "created_at": row['created_at'],
+            "completed_at": row['completed_at'],
+        }
+
+
+def _payout_rows(start, end, chunk_size, using, **lookup):
+    queryset = _in_range(MobileMoneyPayout.objects.using(using).filter(**lookup), 'created_at', start, end).order_by('created_at', 'id')
+    fields = ['id', 'escrow_contract__job_listing_id', 'escrow_contract__job_listing__title', 'amount',
+              'transaction_reference', 'status', 'created_at', 'completed_at']
+    for row in queryset.values(*fields).iterator(chunk_size=chunk_size):
+        yield {
+            "type": "payout",
+            "id": row['id'],
+            "job_id": row['escrow_contract__job_listing_id'],
+            "job_title": row['escrow_contract__job_listing__title'],
+            "amount": row['amount'],
+            "currency": "KES",
+            "reference": row['transaction_reference'] or "",
+            "status": row['status'],
+            "created_at": row['created_at'],
+            "completed_at": row['completed_at'],
+        }
+
+
+def transaction_rows(user=None, start=None, end=None, chunk_size=CHUNK_SIZE, using=None):
+    """
+    Deposits (employers) or payouts (workers) for a user, oldest first; every user's when
+    user is None. start/end come from parse_bound(); using picks the database alias.
+    """
+    streams = []
+    if user is None or user.user_type == 'employer':
+        lookup = {'escrow_contract__employer': user} if user else {}
+        streams.append(_deposit_rows(MpesaDeposit, start, end, chunk_size, using, **lookup))
+        streams.append(_deposit_rows(PaystackDeposit, start, end, chunk_size, using, **lookup))
+    if user is None or user.user_type == 'employee':
+        lookup = {'employee': user} if user else {}
+        streams.append(_payout_rows(start, end, chunk_size, using, **lookup))
+    yield from heapq.merge(*streams, key=lambda r: r['created_at'])
+
+
+def work_history_rows(employee=None, start=None, end=None, chunk_size=CHUNK_SIZE, using=None):
+    """Completed jobs (a worker's, or everyone's when employee is None), oldest completion first."""
+    queryset = JobListing.objects.using(using).filter(status='completed')
+    if employee is not None:
+        queryset = queryset.filter(employee=employee)
+    queryset = _in_range(queryset, 'completed_at', start, end).order_by('completed_at', 'id')
+    fields = ['id', 'title', 'created_at', 'assigned_at', 'completed_at', 'work_summary', 'budget',
+              'employer__first_name', 'employer__last_name', 'employer__email', 'employer__phone_number']
+    for row in queryset.values(*fields).iterator(chunk_size=chunk_size):
+        start_at = row['assigned_at'] or row['created_at']
+        yield {
+            "job_id": row['id'],
+            "job_title": row['title'],
+            "employer_name": full_name(
+                row['employer__first_name'], row['employer__last_name'],
+                row['employer__email'], row['employer__phone_number'],
+            ),
+            "completed_at": row['completed_at'],
+            "duration_days": (row['completed_at'] - start_at).days if start_at and row['completed_at'] else 0,
+            "work_summary": row['work_summary'],
+            "budget": row['budget'],
+        }
+
+
+# ==================== FORMATS ====================
+
+class _Line:
+    """File-like object whose write() returns the line instead of storing it (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def _text(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def to_csv(rows, fields):
+    writer = csv.DictWriter(_Line(), fieldnames=fields, extrasaction='ignore')
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow({key: _text(value) for key, value in row.items()})
+
+
+def to_jsonl(rows):
+    for row in rows:
+        yield renderers.dumps(row).decode('utf-8') + "\n"
+
+
+def render(rows, fmt, fields):
+    """Encode a row stream as an iterator of text chunks."""
+    if fmt == 'csv':
+        return to_csv(rows, fields)
+    if fmt == 'jsonl':
+        return to_jsonl(rows)
+    raise ExportError(f"Unsupported format: {fmt}. Use one of: {', '.join(FORMATS)}.")
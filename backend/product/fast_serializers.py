@@ -0,0 +1,138 @@
+"""
+Fast Serializers Module
+Read-only list serialization straight from values_list() rows.
+
+DRF ModelSerializer builds a model instance per row, then walks its fields (and
+source='employee.*' attribute chains) one by one. For list responses of hundreds of
+rows that dominates the request. A FastSerializer is declared as (output key, lookup(s),
+converter) triples; at import each field is resolved to its row indexes (an
+operator.itemgetter) and converter, so serializing a row is one getter and at most one
+converter call per key.
+
+Output matches the DRF serializers byte for byte (same keys, order and formatting):
+JOB_LISTING for JobListingSerializer, JOB_APPLICATION for JobApplicationSerializer.
+tests.py checks this; any field added to those serializers must be added here too.
+Measure with: python manage.py benchmark_serializers
+"""
+from operator import itemgetter
+
+from django.utils import timezone
+
+from .money import Money, DEFAULT_CURRENCY
+
+
+def full_name(first_name, last_name, email, phone_number):
+    """CustomUser.get_full_name() from column values."""
+    if first_name and last_name:
+        return f"{first_name} {last_name}"
+    if first_name:
+        return first_name
+    if email:
+        return email
+    return phone_number
+
+
+def optional_full_name(pk, first_name, last_name, email, phone_number):
+    return None if pk is None else full_name(first_name, last_name, email, phone_number)
+
+
+def money(value):
+    """MoneyField representation ("2500.00")."""
+    return str(Money.from_decimal(value, DEFAULT_CURRENCY))
+
+
+def drf_datetime(value, tz):
+    """DRF DateTimeField representation: ISO 8601 in the current time zone, 'Z' for UTC."""
+    if value is None:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+drf_datetime.takes_timezone = True  # resolved once per serialize() call, not per row
+
+
+def _user_columns(relation):
+    return tuple(f"{relation}__{column}" for column in ('first_name', 'last_name', 'email', 'phone_number'))
+
+
+def _reader(indexes, convert):
+    """(row, tz) -> value of one output key: the row's columns at indexes, through convert if given."""
+    get = itemgetter(*indexes)
+    if convert is None:
+        return lambda row, tz: get(row)
+    takes_timezone = getattr(convert, 'takes_timezone', False)
+    if len(indexes) > 1:
+        if takes_timezone:
+            return lambda row, tz: convert(*get(row), tz)
+        return lambda row, tz: convert(*get(row))
+    if takes_timezone:
+        return lambda row, tz: convert(get(row), tz)
+    return lambda row, tz: convert(get(row))
+
+
+class FastSerializer:
+    """
+    fields: (key, lookup, converter=None) in output order. lookup is a values_list() lookup,
+    or a tuple of them passed to the converter as positional arguments.
+    """
+
+    def __init__(self, fields):
+        lookups = []
+        for _, source, *_ in fields:
+            for lookup in (source if isinstance(source, tuple) else (source,)):
+                if lookup not in lookups:
+                    lookups.append(lookup)
+        self.lookups = tuple(lookups)
+        self.keys = tuple(key for key, *_ in fields)
+
+        readers = tuple(
+            _reader(
+                [self.lookups.index(lookup) for lookup in (source if isinstance(source, tuple) else (source,))],
+                convert[0] if convert else None,
+            )
+            for _, source, *convert in fields
+        )
+        keys = self.keys
+
+        def to_dict(row, tz):
+            return {key: read(row, tz) for key, read in zip(keys, readers)}
+
+        self.to_dict = to_dict
+
+    def serialize(self, queryset):
+        """List of response dicts for a queryset (its filters and ordering are kept)."""
+        to_dict, tz = self.to_dict, timezone.get_current_timezone()
+        return [to_dict(row, tz) for row in queryset.values_list(*self.lookups)]
+
+
+JOB_LISTING = FastSerializer([
+    ('id', 'id'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('budget', 'budget', money),
+    ('status', 'status'),
+    ('employer', 'employer_id'),
+    ('employer_name', _user_columns('employer'), full_name),
+    ('employee', 'employee_id'),
+    ('employee_name', ('employee_id',) + _user_columns('employee'), optional_full_name),
+    ('employee_phone', 'employee__phone_number'),
+    ('created_at', 'created_at', drf_datetime),
+    ('updated_at', 'updated_at', drf_datetime),
+    ('assigned_at', 'assigned_at', drf_datetime),
+    ('completed_at', 'completed_at', drf_datetime),
+    ('escrow_contract_id', 'escrow_contract_id'),
+])
+
+JOB_APPLICATION = FastSerializer([
+    ('id', 'id'),
+    ('job_listing', 'job_listing_id'),
+    ('employee', 'employee_id'),
+    ('employee_name', _user_columns('employee'), full_name),
+    ('employee_phone', 'employee__phone_number'),
+    ('employee_email', 'employee__email'),
+    ('status', 'status'),
+    ('created_at', 'created_at', drf_datetime),
+])
@@ -0,0 +1,60 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from product import archival
+from product.models import ArchivedJobMessage, ArchivedUSSDTransaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Move closed USSD sessions and the messages of old completed/cancelled jobs out of the hot "
+        "tables, in short chunked transactions, into the archive tables or gzipped JSONL files"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', choices=['ussd', 'messages'], help="Archive one kind only")
+        parser.add_argument('--to', dest='target', choices=archival.TARGETS, default='table',
+                            help="files: gzipped JSONL under ARCHIVE_DIR (archived messages are then no longer served)")
+        parser.add_argument('--ussd-days', type=int, help="Override ARCHIVE_USSD_AFTER_DAYS")
+        parser.add_argument('--message-days', type=int, help="Override ARCHIVE_MESSAGES_AFTER_DAYS")
+        parser.add_argument('--chunk-size', type=int, default=archival.CHUNK_SIZE)
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between chunks")
+        parser.add_argument('--drop-before', type=int, metavar='DAYS',
+                            help="Postgres: also drop archive partitions older than DAYS")
+        parser.add_argument('--loop', action='store_true', help="Keep archiving")
+        parser.add_argument('--interval', type=float, default=3600.0, help="Seconds to sleep between runs")
+
+    def handle(self, *args, **options):
+        if options['drop_before'] is not None and not archival.partitioned():
+            raise CommandError("--drop-before needs the partitioned archive tables (Postgres)")
+        while True:
+            self.run_once(options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def run_once(self, options):
+        now = timezone.now()
+        kinds = []
+        if options['only'] in (None, 'ussd'):
+            days = options['ussd_days']
+            kinds.append(('USSD session(s)', archival.archive_ussd_sessions, days))
+        if options['only'] in (None, 'messages'):
+            days = options['message_days']
+            kinds.append(('job message(s)', archival.archive_job_messages, days))
+
+        for label, archive, days in kinds:
+            moved = archive(
+                cutoff=now - timedelta(days=days) if days is not None else None,
+                target=options['target'], chunk_size=options['chunk_size'], pause=options['pause'],
+            )
+            self.stdout.write(f"Archived {moved} {label} to {options['target']}")
+
+        if options['drop_before'] is not None:
+            before = now - timedelta(days=options['drop_before'])
+            for model in (ArchivedUSSDTransaction, ArchivedJobMessage):
+                for name in archival.drop_partitions(model, before):
+                    self.stdout.write(f"Dropped partition {name}")
@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product import benchmarks, seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the main API endpoints on a seeded scratch database, through the Django test client "
+        "and a real HTTP server. Reports throughput, latency percentiles and queries per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in seeding.DEFAULT_SCALE.items():
+            parser.add_argument(f'--{name}', type=int, default=default, help=f"Seeded {name} (default {default})")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the dataset")
+        parser.add_argument('--mode', choices=['client', 'server', 'both'], default='both')
+        parser.add_argument('--iterations', type=int, default=50, help="Timed requests per endpoint")
+        parser.add_argument('--warmup', type=int, default=5, help="Untimed requests per endpoint first")
+        parser.add_argument('--concurrency', type=int, default=1, help="Parallel clients per endpoint")
+        parser.add_argument('--only', nargs='*', help="Only these scenarios (names as printed)")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+        parser.add_argument('--compare', help="Baseline JSON from an earlier run; exit non-zero on regressions")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p50 slowdown vs the baseline")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+
+        modes = ('client', 'server') if options['mode'] == 'both' else (options['mode'],)
+        report = benchmarks.run_benchmarks(
+            scale={name: options[name] for name in seeding.DEFAULT_SCALE}, seed=options['seed'], modes=modes,
+            iterations=options['iterations'], warmup=options['warmup'], concurrency=options['concurrency'],
+            only=options['only'], log=self.stdout.write,
+        )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+        if baseline is not None:
+            regressions = benchmarks.compare(baseline, report, options['tolerance'])
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(line))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) vs {options['compare']}")
+            self.stdout.write(self.style.SUCCESS(f"No regressions vs {options['compare']}"))
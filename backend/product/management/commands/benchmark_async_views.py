@@ -0,0 +1,152 @@
+import asyncio
+import itertools
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import path
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from product import async_views, benchmarks, circuit_breaker
+from product.mobile_money_integration import IntersendClient
+from product.models import CustomUser, EscrowContract, JobListing
+from product.stellar_integration import StellarEscrowClient
+
+UPSTREAM = 'http://upstream.invalid'
+
+# This module is the URLconf while the benchmark runs: the one completion view, served both ways
+urlpatterns = [
+    path('jobs/<int:job_id>/complete/', async_views.complete_work),
+]
+
+
+class _UpstreamResponse:
+    status_code = 200
+    text = ''
+    _ids = itertools.count(1)
+
+    def json(self):
+        return {'transaction_id': f'TX-BENCH-{next(self._ids)}', 'status': 'pending'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests in flight per process for jobs/<id>/complete/ when Stellar and Intersend each take "
+        "--latency seconds: served over WSGI on a pool of --threads threads (a gthread worker, each "
+        "request holding its thread) against ASGI on one event loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency', type=float, default=2.0, help="Seconds per upstream call")
+        parser.add_argument('--threads', type=int, default=8, help="Threads serving WSGI requests")
+        parser.add_argument('--requests', type=int, default=64, help="Completions per mode, all sent at once")
+
+    def handle(self, *args, **options):
+        latency, total = options['latency'], options['requests']
+
+        def upstream(*args, **kwargs):
+            time.sleep(latency)
+            return _UpstreamResponse()
+
+        async def aupstream(*args, **kwargs):
+            await asyncio.sleep(latency)
+            return _UpstreamResponse()
+
+        patches = [
+            override_settings(ROOT_URLCONF=__name__),
+            mock.patch.object(circuit_breaker.requests, 'request', upstream),
+            mock.patch.object(circuit_breaker, '_async_request', aupstream),
+            mock.patch('product.escrow_service.get_stellar_client',
+                       return_value=StellarEscrowClient(service_url=UPSTREAM, use_python=False)),
+            mock.patch('product.escrow_service.get_intersend_client',
+                       return_value=IntersendClient(api_url=UPSTREAM)),
+        ]
+        with benchmarks.scratch_database():
+            employer, jobs = self.seed(total * 2)
+            auth = {'Authorization': f"Bearer {RefreshToken.for_user(employer).access_token}"}
+            with ExitStack() as stack:
+                for patch in patches:
+                    stack.enter_context(patch)
+                self.stdout.write(f"{total} completions per mode, {latency:g}s per upstream call (2 per completion)")
+                sync = self.run_sync(jobs[:total], auth, options['threads'])
+                self.report(f"WSGI, {options['threads']} threads", sync)
+                asynchronous = asyncio.run(self.run_async(jobs[total:], auth))
+                self.report("ASGI, 1 event loop", asynchronous)
+            connections.close_all()
+        if sync['throughput']:
+            self.stdout.write(f"Throughput change: {asynchronous['throughput'] / sync['throughput']:.1f}x")
+
+    def seed(self, n):
+        employer = CustomUser.objects.create_user(
+            email='bench-employer@kazi.test', password=None, phone_number='0799000000', user_type='employer')
+        jobs = []
+        for i in range(n):
+            worker = CustomUser.objects.create_user(
+                email=f'bench-worker-{i}@kazi.test', password=None, phone_number=f'07990{i + 1:05d}',
+                user_type='employee', stellar_account_id='G' * 56)
+            job = JobListing.objects.create(employer=employer, employee=worker, title=f'Bench job {i}',
+                                            description='', budget='1000.00', status='assigned')
+            EscrowContract.objects.create(job_listing=job, contract_id=f'BENCH_J{job.id}', employer=employer,
+                                          employee=worker, amount=job.budget, status='funded', chain_status='created')
+            jobs.append(job.id)
+        return employer, jobs
+
+    def run_sync(self, jobs, auth, threads):
+        statuses, latencies = [], []
+        lock = threading.Lock()
+
+        def complete(job_id):
+            try:
+                code = Client().post(f'/jobs/{job_id}/complete/', {}, content_type='application/json',
+                                     headers=auth).status_code
+            finally:
+                connections.close_all()
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                statuses.append(code)
+
+        # All requests are sent at once: latency includes the wait for a free thread
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(complete, jobs))
+        return self.stats(statuses, latencies, time.perf_counter() - started)
+
+    async def run_async(self, jobs, auth):
+        client = AsyncClient()
+
+        async def complete(job_id):
+            started = time.perf_counter()
+            response = await client.post(f'/jobs/{job_id}/complete/', {}, content_type='application/json',
+                                         headers=auth)
+            return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(complete(job_id) for job_id in jobs))
+        wall = time.perf_counter() - started
+        return self.stats([code for code, _ in results], [elapsed for _, elapsed in results], wall)
+
+    @staticmethod
+    def stats(statuses, latencies, wall):
+        latencies.sort()
+        return {
+            'requests': len(statuses),
+            'errors': sum(1 for code in statuses if code != 200),
+            'wall': wall,
+            'throughput': len(statuses) / wall if wall else 0.0,
+            'p50': benchmarks.percentile(latencies, 50),
+            'max': latencies[-1] if latencies else 0.0,
+            'mean': statistics.fmean(latencies) if latencies else 0.0,
+        }
+
+    def report(self, label, stats):
+        self.stdout.write(
+            f"  {label:<22} {stats['requests']} requests in {stats['wall']:.1f}s: "
+            f"{stats['throughput']:.1f} req/s, latency p50 {stats['p50']:.2f}s / max {stats['max']:.2f}s, "
+            f"{stats['errors']} errors"
+        )
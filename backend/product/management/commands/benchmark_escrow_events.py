@@ -0,0 +1,107 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from product import escrow_events
+from product.models import CustomUser, JobListing, EscrowContract, EscrowEvent
+
+CYCLE = ['funded', 'completed', 'release_failed']
+STATUS_AFTER = {'funded': 'funded', 'completed': 'completed', 'release_failed': 'funded'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the escrow event ledger: load synthetic events, snapshot them and time history "
+        "and as-of-time queries against a full replay. Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1_000_000)
+        parser.add_argument('--escrows', type=int, default=1_000)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--every', type=int, default=escrow_events.SNAPSHOT_EVERY)
+
+    def timed(self, label, fn, repeat=1):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = fn()
+        elapsed = time.perf_counter() - started
+        per = f" ({elapsed / repeat * 1000:.2f} ms each)" if repeat > 1 else ""
+        self.stdout.write(f"{label}: {elapsed:.2f}s{per}")
+        return result
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+        self.stdout.write("Rolled back benchmark data")
+
+    def run(self, options):
+        n_escrows, n_events = options['escrows'], options['events']
+        per_escrow = max(n_events // n_escrows, 1)
+        start = timezone.now() - timedelta(days=365)
+        step = timedelta(seconds=365 * 24 * 3600 // per_escrow)
+
+        def load():
+            user = CustomUser.objects.create_user(
+                email='bench@kazi.test', password='bench', phone_number='0799999999', user_type='employer'
+            )
+            jobs = JobListing.objects.bulk_create(
+                [JobListing(employer=user, title=f"Bench {i}", description='', budget=Decimal('100.00'))
+                 for i in range(n_escrows)], batch_size=2000
+            )
+            escrows = EscrowContract.objects.bulk_create(
+                [EscrowContract(job_listing=job, contract_id=f"BENCH_{job.pk}", employer=user, amount=job.budget)
+                 for job in jobs], batch_size=2000
+            )
+            batch = []
+            for escrow in escrows:
+                for i in range(per_escrow):
+                    kind = 'opened' if i == 0 else CYCLE[(i - 1) % len(CYCLE)]
+                    batch.append(EscrowEvent(
+                        escrow_contract_id=escrow.pk, kind=kind,
+                        status='pending_deposit' if i == 0 else STATUS_AFTER[kind],
+                        changes={'amount': '100.00', 'step': i}, created_at=start + step * i,
+                    ))
+                if len(batch) >= 20_000:
+                    EscrowEvent.objects.bulk_create(batch)
+                    batch = []
+            EscrowEvent.objects.bulk_create(batch)
+            return [e.pk for e in escrows]
+
+        escrow_ids = self.timed(f"Loaded {per_escrow * n_escrows} events for {n_escrows} escrows", load)
+        written = self.timed("Snapshots", lambda: escrow_events.take_snapshots(every=options['every']))
+        self.stdout.write(f"  {written} snapshot(s) written")
+
+        rng = random.Random(42)
+        samples = [
+            (rng.choice(escrow_ids), start + step * rng.randrange(per_escrow))
+            for _ in range(options['queries'])
+        ]
+        queue = iter(samples * 3)
+
+        def as_of():
+            escrow_id, moment = next(queue)
+            return escrow_events.state_at(escrow_id, moment)
+
+        def replay():
+            escrow_id, moment = next(queue)
+            events = EscrowEvent.objects.filter(escrow_contract_id=escrow_id, created_at__lte=moment).order_by('id')
+            return escrow_events.fold({}, events)[0]
+
+        def timeline():
+            escrow_id, moment = next(queue)
+            return list(escrow_events.history(escrow_id, moment - step * 10, moment))
+
+        repeat = len(samples)
+        self.timed("State as of T (snapshot + tail)", as_of, repeat)
+        self.timed("State as of T (full replay)", replay, repeat)
+        self.timed("Timeline range (10 events)", timeline, repeat)
+        escrow_id, moment = samples[0]
+        events = EscrowEvent.objects.filter(escrow_contract_id=escrow_id, created_at__lte=moment).order_by('id')
+        assert escrow_events.state_at(escrow_id, moment) == escrow_events.fold({}, events)[0]
@@ -0,0 +1,50 @@
+from django.db.models import Count, Q
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from product import benchmarks, compression, seeding
+from product.models import CustomUser
+
+URL = '/api/employer/workers-overview/'
+FIND_WORKERS_FIELDS = 'job_id,job_title,applicant_count,applicants.employee_id,applicants.employee_name'
+
+
+class Command(BaseCommand):
+    help = (
+        "Bytes on the wire for the employer Find Workers page (workers overview) for the "
+        "busiest employer of a seeded scratch database: plain, ?normalize=1, ?fields=, gzip and brotli."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=3000)
+        parser.add_argument('--applications', type=int, default=12000)
+
+    def handle(self, *args, **options):
+        with benchmarks.scratch_database():
+            seeding.seed({'employers': 30, 'workers': 400, 'jobs': options['jobs'],
+                          'applications': options['applications'], 'messages': 0, 'deposits': 0})
+            employer = CustomUser.objects.annotate(
+                pending=Count('job_listings__applications', filter=Q(
+                    job_listings__status='open', job_listings__applications__status='pending'))
+            ).order_by('-pending').first()
+            api = APIClient()
+            api.force_authenticate(employer)
+            variants = [
+                ('as is', ''),
+                ('?normalize=1', '?normalize=1'),
+                ('?normalize=1&fields= (list view)', f'?normalize=1&fields={FIND_WORKERS_FIELDS}'),
+            ]
+            encodings = ['identity', 'gzip'] + (['br'] if compression.brotli is not None else [])
+            self.stdout.write(f"{URL} for employer {employer.pk} ({employer.pending} pending applications)")
+            self.stdout.write(f"  {'':<36}" + "".join(f"{e:>12}" for e in encodings))
+            baseline = None
+            for label, query in variants:
+                sizes = []
+                for encoding in encodings:
+                    response = api.get(URL + query, HTTP_ACCEPT_ENCODING=encoding)
+                    sizes.append(len(response.content))
+                baseline = baseline or sizes[0]
+                self.stdout.write(f"  {label:<36}" + "".join(f"{size:>12,}" for size in sizes))
+                self.stdout.write(f"  {'':<36}" + "".join(f"{baseline / size:>11.1f}x" for size in sizes))
+            if compression.brotli is None:
+                self.stdout.write(self.style.WARNING("brotli is not installed; gzip only"))
@@ -0,0 +1,72 @@
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from product import benchmarks, exports, renderers, seeding
+
+
+def _stringified(rows):
+    """What the views did before the renderer encoded datetime/Decimal itself."""
+    out = []
+    for row in rows:
+        row = dict(row)
+        row['amount'] = str(row['amount'])
+        row['created_at'] = row['created_at'].isoformat()
+        row['completed_at'] = row['completed_at'].isoformat() if row['completed_at'] else None
+        out.append(row)
+    return out
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering a transactions payload with DRF's JSONRenderer (views converting "
+        "datetime/Decimal per row) against FastJSONRenderer, and check the JSON is identical."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help="Deposit/payout rows in the payload")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def timed(self, fn, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = fn()
+            best = min(best, time.perf_counter() - started)
+        return output, best
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        with benchmarks.scratch_database():
+            seeding.seed({'employers': 20, 'workers': 200, 'jobs': rows * 2, 'applications': 0,
+                          'messages': 0, 'deposits': rows})
+            data = list(exports.transaction_rows())[:rows]
+            drf, fast = JSONRenderer(), renderers.FastJSONRenderer()
+
+            def fallback():
+                with mock.patch.object(renderers, 'orjson', None):
+                    return fast.render(data)
+
+            variants = [
+                ('JSONRenderer + per-row str()/isoformat()', lambda: drf.render(_stringified(data))),
+                ('FastJSONRenderer (stdlib fallback)', fallback),
+            ]
+            if renderers.orjson is not None:
+                variants.append(('FastJSONRenderer (orjson)', lambda: fast.render(data)))
+            else:
+                self.stdout.write(self.style.WARNING("orjson is not installed; timing the fallback only"))
+
+            self.stdout.write(f"transactions: {len(data)} rows, best of {repeat}")
+            reference = baseline = None
+            for label, fn in variants:
+                output, seconds = self.timed(fn, repeat)
+                reference = reference or output
+                if output != reference:
+                    raise CommandError(f"{label} output differs from {variants[0][0]}")
+                baseline = baseline or seconds
+                self.stdout.write(
+                    f"  {label:<42} {seconds * 1000:>8.1f} ms  {len(output) / 1024:>7.0f} KiB  ({baseline / seconds:.1f}x)"
+                )
+            self.stdout.write(self.style.SUCCESS("Outputs are byte-identical"))
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from product import benchmarks, fast_serializers, seeding
+from product.models import JobListing, JobApplication
+from product.serializers import JobListingSerializer, JobApplicationSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of the fast values_list() serializers with JobListingSerializer and "
+        "JobApplicationSerializer on a seeded scratch database, and check the JSON is identical."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Job listings (and ~2x applications) to serialize")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def timed(self, fn, rows, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = fn()
+            best = min(best, time.perf_counter() - started)
+        return data, rows / best
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        with benchmarks.scratch_database():
+            seeding.seed({'employers': 20, 'workers': 200, 'jobs': rows, 'applications': rows * 2,
+                          'messages': 0, 'deposits': 0})
+            jobs = JobListing.objects.order_by('id')
+            applications = JobApplication.objects.order_by('id')
+            cases = [
+                ('JobListing', jobs.count(), [
+                    ('JobListingSerializer', lambda: JobListingSerializer(jobs.all(), many=True).data),
+                    ('JobListingSerializer + select_related',
+                     lambda: JobListingSerializer(jobs.select_related('employer', 'employee'), many=True).data),
+                    ('fast_serializers.JOB_LISTING', lambda: fast_serializers.JOB_LISTING.serialize(jobs.all())),
+                ]),
+                ('JobApplication', applications.count(), [
+                    ('JobApplicationSerializer',
+                     lambda: JobApplicationSerializer(applications.select_related('employee'), many=True).data),
+                    ('fast_serializers.JOB_APPLICATION',
+                     lambda: fast_serializers.JOB_APPLICATION.serialize(applications.all())),
+                ]),
+            ]
+            render = JSONRenderer().render
+            for model, count, variants in cases:
+                self.stdout.write(f"{model}: {count} rows, best of {repeat}")
+                reference = baseline = None
+                for label, fn in variants:
+                    data, rate = self.timed(fn, count, repeat)
+                    output = render(data)
+                    reference = reference or output
+                    if output != reference:
+                        raise CommandError(f"{label} output differs from {variants[0][0]}")
+                    baseline = baseline or rate
+                    self.stdout.write(f"  {label:<40} {rate:>10.0f} rows/s  ({rate / baseline:.1f}x)")
+            self.stdout.write(self.style.SUCCESS("Outputs are byte-identical"))
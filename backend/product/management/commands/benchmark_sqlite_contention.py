@@ -0,0 +1,96 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+
+from product import benchmarks, sqlite_tuning
+
+USSD_URL = '/api/ussd/'
+PAYSTACK_URL = '/api/callbacks/paystack/deposit/'
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer ussd/ and callbacks/paystack/deposit/ from many threads against a scratch SQLite "
+        "database, once with SQLite's default journal and once with SQLITE_PRAGMAS, and compare throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per run, split across threads")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("This benchmark is for SQLite deployments")
+        with benchmarks.scratch_database():
+            runs = [
+                ('default journal', sqlite_tuning.BASELINE_PRAGMAS),
+                ('tuned (SQLITE_PRAGMAS)', sqlite_tuning.pragmas()),
+            ]
+            results = [self.run(label, pragmas, options) for label, pragmas in runs]
+        (_, before), (_, after) = results
+        if before:
+            self.stdout.write(f"Throughput change: {after / before:.2f}x")
+
+    def run(self, label, pragmas, options):
+        connections.close_all()
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            mode = sqlite_tuning.apply_pragmas(connection).get('journal_mode')
+            total, threads = options['requests'], options['threads']
+            counter = iter(range(total))
+            lock = threading.Lock()
+            latencies, errors = [], []
+
+            def next_index():
+                with lock:
+                    return next(counter, None)
+
+            def worker():
+                client = Client()
+                try:
+                    while (i := next_index()) is not None:
+                        started = time.perf_counter()
+                        try:
+                            response = self.ussd(client, label, i) if i % 2 else self.paystack(client, label, i)
+                            ok = response.status_code == 200
+                        except Exception as e:
+                            ok, response = False, e
+                        elapsed = time.perf_counter() - started
+                        with lock:
+                            latencies.append(elapsed)
+                            if not ok:
+                                errors.append(response)
+                finally:
+                    connections.close_all()
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                for _ in range(threads):
+                    pool.submit(worker)
+            elapsed = time.perf_counter() - started
+        connections.close_all()
+
+        rate = total / elapsed if elapsed else 0
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f"{label} (journal_mode={mode}): {total} requests, {threads} threads in {elapsed:.2f}s "
+            f"= {rate:.0f} req/s, p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {p95 * 1000:.1f} ms, {len(errors)} error(s)"
+        )
+        if errors:
+            self.stdout.write(f"  first error: {errors[0]}")
+        return label, rate
+
+    def ussd(self, client, label, i):
+        return client.post(USSD_URL, benchmarks.ussd_payload(label, i))
+
+    def paystack(self, client, label, i):
+        body, headers = benchmarks.paystack_payload(label, i)
+        signature = headers.get('X-Paystack-Signature')
+        extra = {'HTTP_X_PAYSTACK_SIGNATURE': signature} if signature else {}
+        return client.post(PAYSTACK_URL, body, content_type='application/json', **extra)
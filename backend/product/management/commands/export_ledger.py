@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from product import exports
+from product.models import CustomUser
+
+KINDS = {
+    'transactions': (exports.transaction_rows, exports.TRANSACTION_FIELDS),
+    'work-history': (exports.work_history_rows, exports.WORK_HISTORY_FIELDS),
+}
+
+
+class Command(BaseCommand):
+    help = "Export deposits and payouts (or completed work) as CSV or JSONL, streamed in constant memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=list(KINDS), default='transactions')
+        parser.add_argument('--format', dest='fmt', choices=list(exports.FORMATS), default='csv')
+        parser.add_argument('--from', dest='start', help="Start date (YYYY-MM-DD or ISO datetime)")
+        parser.add_argument('--to', dest='end', help="End date, inclusive when given as YYYY-MM-DD")
+        parser.add_argument('--user', help="Only this user's rows (id or phone number); default: everyone")
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+        parser.add_argument('-o', '--output', help="Write to this file instead of stdout")
+
+    def handle(self, *args, **options):
+        rows_for, fields = KINDS[options['kind']]
+        user = None
+        if options['user']:
+            lookup = {'pk': options['user']} if options['user'].isdigit() else {'phone_number': options['user']}
+            user = CustomUser.objects.filter(**lookup).first()
+            if user is None:
+                raise CommandError(f"No user {options['user']}")
+        try:
+            start = exports.parse_bound(options['start'])
+            end = exports.parse_bound(options['end'], end=True)
+        except exports.ExportError as e:
+            raise CommandError(str(e))
+        rows = rows_for(user, start, end, chunk_size=options['chunk_size'])
+
+        count = 0
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+                for chunk in exports.render(rows, options['fmt'], fields):
+                    out.write(chunk)
+                    count += 1
+            records = count - 1 if options['fmt'] == 'csv' else count
+            self.stderr.write(f"Wrote {records} row(s) to {options['output']}")
+        else:
+            for chunk in exports.render(rows, options['fmt'], fields):
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product import payouts
+
+
+class Command(BaseCommand):
+    help = "Check outstanding mobile money payouts with Intersend and settle or fail them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help="Keep polling for due payouts")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep when no payout is due")
+
+    def handle(self, *args, **options):
+        while True:
+            counts = payouts.poll_due(batch_size=options['batch_size'])
+            if counts['checked']:
+                self.stdout.write(
+                    f"Checked {counts['checked']} payout(s): {counts['completed']} completed, "
+                    f"{counts['failed']} failed, {counts['processing']} still processing"
+                )
+            if not options['loop']:
+                break
+            if counts['checked'] < options['batch_size']:
+                time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product import retry_queue
+
+
+class Command(BaseCommand):
+    help = "Run deferred Stellar/Intersend operations from the retry queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help="Keep running due operations")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep when nothing is due")
+        parser.add_argument('--stats', action='store_true', help="Print queue depth, then exit")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(str(retry_queue.queue_stats()))
+            return
+        while True:
+            counts = retry_queue.process_due(batch_size=options['batch_size'])
+            ran = sum(counts.values())
+            if ran:
+                self.stdout.write(
+                    f"Ran {ran} deferred operation(s): {counts['done']} done, "
+                    f"{counts['pending']} rescheduled, {counts['failed']} failed"
+                )
+            if not options['loop']:
+                break
+            if ran < options['batch_size']:
+                time.sleep(options['interval'])
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product import webhooks
+
+
+class Command(BaseCommand):
+    help = "Apply pending payment webhooks from the inbox (M-Pesa, Paystack deposits)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new events")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to sleep when the inbox is empty")
+        parser.add_argument('--stats', action='store_true', help="Print backlog depth and lag, then exit")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(str(webhooks.backlog_stats()))
+            return
+        while True:
+            handled = webhooks.process_pending(batch_size=options['batch_size'])
+            if handled:
+                self.stdout.write(f"Processed {handled} webhook event(s)")
+            if not options['loop']:
+                break
+            if handled < options['batch_size']:
+                time.sleep(options['interval'])
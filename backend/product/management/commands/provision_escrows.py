@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product import provisioning
+
+
+class Command(BaseCommand):
+    help = "Create pending escrow contracts on Stellar in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=provisioning.BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help="Keep provisioning new escrows")
+        parser.add_argument('--interval', type=float, default=1.0, help="Seconds to sleep when nothing is due")
+
+    def handle(self, *args, **options):
+        while True:
+            counts = provisioning.provision_pending(batch_size=options['batch_size'])
+            handled = sum(counts.values())
+            if handled:
+                self.stdout.write(
+                    f"Provisioned {counts['created']} escrow(s): {counts['retrying']} retrying, {counts['failed']} failed"
+                )
+            if not options['loop']:
+                break
+            if handled < options['batch_size']:
+                time.sleep(options['interval'])
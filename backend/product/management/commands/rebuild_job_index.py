@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from product.models import JobListing, JobListingTerm
+from product import matching
+
+
+class Command(BaseCommand):
+    help = "Rebuild the job matching inverted index from all open job listings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        JobListingTerm.objects.all().delete()
+        count = 0
+        listings = JobListing.objects.filter(status='open').only('id', 'title', 'description', 'status')
+        for job_listing in listings.iterator(chunk_size=options['chunk_size']):
+            matching.index_job_listing(job_listing)
+            count += 1
+        matching.bump_listings_version()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} open job listings"))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from product import reconciliation
+from product.stellar_integration import StellarEscrowClient
+
+
+class Command(BaseCommand):
+    help = "Compare local escrows, deposits and payouts with on-chain balances and record discrepancies"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Check every escrow, not only those changed since the last run")
+        parser.add_argument('--chunk-size', type=int, default=reconciliation.DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=reconciliation.DEFAULT_WORKERS,
+                            help="Concurrent balance lookups")
+        parser.add_argument('--local', action='store_true',
+                            help="Use the offline Python client (no RPC); unknown balances are reported as unverified")
+
+    def handle(self, *args, **options):
+        client = StellarEscrowClient(use_python=True) if options['local'] else None
+        stats = reconciliation.reconcile(
+            full=options['full'],
+            chunk_size=options['chunk_size'],
+            max_workers=options['workers'],
+            stellar_client=client,
+        )
+        self.stdout.write(
+            f"Checked {stats['checked']} escrow(s): {stats['opened']} new, {stats['still_open']} still open, "
+            f"{stats['resolved']} resolved discrepancies ({stats['unverified']} balance(s) unverified)"
+        )
@@ -0,0 +1,45 @@
+import time
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand, CommandError
+
+from product import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate synthetic users, jobs, applications, escrows, deposits, payouts and messages "
+        "for scale testing. Deterministic for a given --seed; adds to whatever is already in the database."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in seeding.DEFAULT_SCALE.items():
+            help_text = "Mean applications per job x jobs" if name == 'applications' else f"{name.title()} to create"
+            parser.add_argument(f'--{name}', type=int, default=default, help=f"{help_text} (default {default})")
+        for f in fields(seeding.Shape):
+            parser.add_argument(f"--{f.name.replace('_', '-')}", type=f.type,
+                                default=f.default, help=f"Shape.{f.name} (default {f.default})")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=seeding.CHUNK_SIZE, help="Jobs per transaction")
+
+    def handle(self, *args, **options):
+        shape = seeding.Shape(**{f.name: options[f.name] for f in fields(seeding.Shape)})
+        if shape.applicant_skew <= 1:
+            raise CommandError("--applicant-skew must be greater than 1")
+        scale = {name: options[name] for name in seeding.DEFAULT_SCALE}
+        started = time.perf_counter()
+
+        def progress(counts):
+            elapsed = time.perf_counter() - started
+            rows = sum(counts.values())
+            self.stdout.write(
+                f"  {counts['jobs']}/{scale['jobs']} jobs, {rows} rows in {elapsed:.0f}s ({rows / elapsed:.0f} rows/s)"
+            )
+
+        counts = seeding.seed(scale, seed=options['seed'], chunk_size=options['chunk_size'], shape=shape,
+                              progress=progress if scale['jobs'] > options['chunk_size'] else None)
+        elapsed = time.perf_counter() - started
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {summary} in {elapsed:.1f}s. Every seeded user's password is '{seeding.SEED_PASSWORD}'."
+        ))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from product import escrow_events
+
+
+class Command(BaseCommand):
+    help = "Snapshot escrow state from the escrow event ledger so history queries skip most of the replay"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=escrow_events.SNAPSHOT_EVERY,
+                            help="Events per escrow between snapshots")
+        parser.add_argument('--chunk-size', type=int, default=escrow_events.CHUNK_SIZE)
+        parser.add_argument('--backfill', action='store_true',
+                            help="First record an 'imported' event for escrows created before the ledger")
+        parser.add_argument('--loop', action='store_true', help="Keep snapshotting new events")
+        parser.add_argument('--interval', type=float, default=60.0, help="Seconds to sleep between runs")
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            self.stdout.write(f"Imported {escrow_events.backfill()} escrow(s) into the event ledger")
+        while True:
+            written = escrow_events.take_snapshots(every=options['every'], chunk_size=options['chunk_size'])
+            if written:
+                self.stdout.write(f"Wrote {written} escrow snapshot(s)")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
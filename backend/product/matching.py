@@ -0,0 +1,192 @@
+"""
+Job Matching Module
+Recommends open job listings to workers.
+
+Open listings are kept in an inverted index (JobListingTerm: term -> listing, weight)
+built from their title and description. A worker's profile is the set of terms from
+their completed jobs (title + work_summary) and the jobs they applied to. Ranking is a
+single indexed query over the profile terms, so its cost depends on the worker's
+profile size rather than on the total number of open listings.
+
+Ranked ids are cached per worker under a global listings version that is bumped
+whenever a new listing is indexed.
+"""
+import re
+import logging
+from collections import Counter
+from django.core.cache import cache
+from django.db.models import Case, When, Sum, F, IntegerField
+
+from .models import JobListing, JobListingTerm
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset({
+    'and', 'the', 'for', 'with', 'from', 'that', 'this', 'are', 'was', 'were', 'will',
+    'you', 'your', 'our', 'have', 'has', 'job', 'work', 'need', 'needed', 'who', 'all',
+    'any', 'can', 'per', 'day', 'days', 'into', 'out', 'not', 'but', 'its', 'also',
+})
+MAX_TERM_LENGTH = 50
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+COMPLETED_WEIGHT = 2
+APPLIED_WEIGHT = 1
+MAX_PROFILE_TERMS = 25
+PROFILE_HISTORY_LIMIT = 50
+RECOMMENDATION_LIMIT = 20
+CACHE_TIMEOUT = 300
+
+VERSION_KEY = 'matching:listings_version'
+
+
+def tokenize(text):
+    """Lowercase word tokens, minus stopwords and very short tokens."""
+    return [
+        t[:MAX_TERM_LENGTH] for t in TOKEN_RE.findall((text or '').lower())
+        if len(t) > 2 and t not in STOPWORDS
+    ]
+
+
+def listing_terms(title, description):
+    """Term weights for a listing; title words count more than description words."""
+    weights = Counter()
+    for t in tokenize(title):
+        weights[t] += TITLE_WEIGHT
+    for t in tokenize(description):
+        weights[t] += DESCRIPTION_WEIGHT
+    return weights
+
+
+# ==================== INDEX MAINTENANCE ====================
+
+def index_job_listing(job_listing):
+    """(Re)build index entries for a listing. Only open listings are indexed."""
+    JobListingTerm.objects.filter(job_listing_id=job_listing.id).delete()
+    if job_listing.status != 'open':
+        return 0
+    terms = listing_terms(job_listing.title, job_listing.description)
+    JobListingTerm.objects.bulk_create([
+        JobListingTerm(job_listing_id=job_listing.id, term=term, weight=weight)
+        for term, weight in terms.items()
+    ])
+    return len(terms)
+
+
+def reindex_job_listing(job_listing):
+    """
+    Rebuild an open listing's index entries if its title/description no longer match them
+    (re-opened or edited listing). Returns True when the entries changed.
+    """
+    terms = listing_terms(job_listing.title, job_listing.description)
+    indexed = dict(JobListingTerm.objects.filter(job_listing_id=job_listing.id).values_list('term', 'weight'))
+    if indexed == dict(terms):
+        return False
+    index_job_listing(job_listing)
+    return True
+
+
+def unindex_job_listing(job_listing_id):
+    """Drop a listing from the index (no longer open)."""
+    JobListingTerm.objects.filter(job_listing_id=job_listing_id).delete()
+
+
+def listings_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_listings_version():
+    """Invalidate every worker's cached recommendations."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 2, None)
+
+
+def _worker_cache_key(user_id):
+    return f'matching:worker:{user_id}:v{listings_version()}'
+
+
+def invalidate_worker(user_id):
+    cache.delete(_worker_cache_key(user_id))
+
+
+# ==================== RANKING ====================
+
+def worker_profile(user):
+    """Top terms from the worker's completed jobs and past applications."""
+    weights = Counter()
+    completed = (
+        JobListing.objects.filter(employee=user, status='completed')
+        .order_by('-completed_at')
+        .values_list('title', 'work_summary')[:PROFILE_HISTORY_LIMIT]
+    )
+    for title, summary in completed:
+        for t in tokenize(title):
+            weights[t] += COMPLETED_WEIGHT * TITLE_WEIGHT
+        for t in tokenize(summary):
+            weights[t] += COMPLETED_WEIGHT
+    applied = (
+        JobListing.objects.filter(applications__employee=user)
+        .order_by('-applications__created_at')
+        .values_list('title', 'description')[:PROFILE_HISTORY_LIMIT]
+    )
+    for title, description in applied:
+        for t in tokenize(title):
+            weights[t] += APPLIED_WEIGHT * TITLE_WEIGHT
+        for t in tokenize(description):
+            weights[t] += APPLIED_WEIGHT
+    return dict(weights.most_common(MAX_PROFILE_TERMS))
+
+
+def rank_job_ids(profile, limit=RECOMMENDATION_LIMIT):
+    """[(job_id, score)] for indexed listings matching the profile, best first."""
+    if not profile:
+        return []
+    score = Sum(
+        Case(
+            *[When(term=term, then=F('weight') * w) for term, w in profile.items()],
+            default=0,
+            output_field=IntegerField(),
+        )
+    )
+    rows = (
+        JobListingTerm.objects.filter(term__in=list(profile))
+        .values('job_listing_id')
+        .annotate(score=score)
+        .order_by('-score', '-job_listing_id')
+        .values_list('job_listing_id', 'score')[:limit]
+    )
+    return list(rows)
+
+
+def recommended_job_ids(user, limit=RECOMMENDATION_LIMIT):
+    """Cached ranked [(job_id, score)] for a worker."""
+    key = _worker_cache_key(user.id)
+    ranked = cache.get(key)
+    if ranked is None:
+        # Over-fetch so jobs filtered out at read time (applied / no longer open) leave enough
+        ranked = rank_job_ids(worker_profile(user), limit=limit * 2)
+        cache.set(key, ranked, CACHE_TIMEOUT)
+    return ranked
+
+
+def recommend_jobs(user, limit=RECOMMENDATION_LIMIT):
+    """Open listings for a worker, best match first, excluding jobs they already applied to."""
+    ranked = recommended_job_ids(user, limit)
+    if not ranked:
+        return []
+    scores = dict(ranked)
+    listings = (
+        JobListing.objects.filter(id__in=scores, status='open')
+        .exclude(applications__employee=user)
+        .select_related('employer', 'employee')
+    )
+    out = sorted(listings, key=lambda j: (-scores[j.id], -j.id))[:limit]
+    for j in out:
+        j.match_score = scores[j.id]
+    return out
@@ -0,0 +1,219 @@
+"""
+Request Metrics Module
+Per-endpoint latency, DB query count, DB time and response size, kept in process memory.
+
+RequestMetricsMiddleware times every request and counts its queries with a database
+execute_wrapper (works with DEBUG off). Observations are keyed by the resolved URL name
+(e.g. 'transactions', 'ussd_callback'; 'unmatched' for 404s, so bad URLs can't blow up
+the label set) and HTTP method, and land in Prometheus-style histograms served at /metrics.
+Buckets are cumulative since process start, as Prometheus expects: use rate() /
+histogram_quantile() over a window for recent behaviour.
+
+With METRICS_SLOW_REQUEST_MS set, requests slower than that are logged with their SQL and
+the last METRICS_SLOW_SAMPLES of them are kept for /api/ops/slow-requests/.
+
+Like the circuit breakers, metrics are per worker process; Prometheus sums across workers.
+Streamed responses are timed until the response object is returned and report no size.
+Under ASGI the middleware runs async, so async views (async_views.py) stay on the event
+loop; their database work happens in sync_to_async threads the middleware cannot wrap, so
+they report latency, status and size but no query histograms.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)  # bytes
+MAX_SAMPLED_QUERIES = 50
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set. Thread-safe."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+            series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: {'counts': list(s['counts']), 'sum': s['sum'], 'count': s['count']}
+                    for labels, s in self._series.items()}
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.snapshot().items()):
+            label_text = _labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series['counts']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series['sum']:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {series['count']}")
+        return lines
+
+
+def _labels(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels)
+
+
+REQUEST_SECONDS = Histogram('kazi_request_duration_seconds', 'Wall time per request', DURATION_BUCKETS)
+DB_QUERIES = Histogram('kazi_request_db_queries', 'Database queries per request', QUERY_BUCKETS)
+DB_SECONDS = Histogram('kazi_request_db_seconds', 'Time spent in database queries per request', DURATION_BUCKETS)
+RESPONSE_BYTES = Histogram('kazi_response_size_bytes', 'Response body size', SIZE_BUCKETS)
+HISTOGRAMS = (REQUEST_SECONDS, DB_QUERIES, DB_SECONDS, RESPONSE_BYTES)
+
+_status_counts = {}
+_status_lock = threading.Lock()
+_slow_requests = deque(maxlen=getattr(settings, 'METRICS_SLOW_SAMPLES', 50))
+
+
+def slow_threshold():
+    """Slow-request threshold in seconds, or None when sampling is off."""
+    ms = getattr(settings, 'METRICS_SLOW_REQUEST_MS', None)
+    return ms / 1000 if ms else None
+
+
+class QueryRecorder:
+    """execute_wrapper that counts and times queries, optionally keeping their SQL."""
+
+    def __init__(self, keep_sql=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.keep_sql = keep_sql
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if self.keep_sql and len(self.queries) < MAX_SAMPLED_QUERIES:
+                self.queries.append({'sql': sql, 'ms': round(elapsed * 1000, 2)})
+
+
+def record(endpoint, method, status_code, seconds, queries, db_seconds, size=None):
+    """queries/db_seconds are None when they could not be counted (async requests)."""
+    labels = (('endpoint', endpoint), ('method', method))
+    REQUEST_SECONDS.observe(labels, seconds)
+    if queries is not None:
+        DB_QUERIES.observe(labels, queries)
+        DB_SECONDS.observe(labels, db_seconds)
+    if size is not None:
+        RESPONSE_BYTES.observe(labels, size)
+    key = labels + (('status', str(status_code)),)
+    with _status_lock:
+        _status_counts[key] = _status_counts.get(key, 0) + 1
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines += ["# HELP kazi_requests_total Requests by endpoint, method and status", "# TYPE kazi_requests_total counter"]
+    with _status_lock:
+        counts = sorted(_status_counts.items())
+    lines.extend(f"kazi_requests_total{{{_labels(key)}}} {count}" for key, count in counts)
+    return "\n".join(lines) + "\n"
+
+
+def slow_requests():
+    """Most recent slow request samples, newest first."""
+    return list(reversed(_slow_requests))
+
+
+def reset_metrics():
+    for histogram in HISTOGRAMS:
+        histogram.clear()
+    with _status_lock:
+        _status_counts.clear()
+    _slow_requests.clear()
+
+
+# ==================== MIDDLEWARE ====================
+
+class RequestMetricsMiddleware:
+    """Outermost middleware: records every request against its URL name."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        threshold = slow_threshold()
+        recorder = QueryRecorder(keep_sql=threshold is not None)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, threshold, recorder)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, slow_threshold(), None)
+        return response
+
+    def _record(self, request, response, elapsed, threshold, recorder):
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.url_name or match.view_name) if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        db_queries = recorder.count if recorder else None
+        db_seconds = recorder.seconds if recorder else None
+        record(endpoint, request.method, response.status_code, elapsed, db_queries, db_seconds, size)
+
+        if threshold is not None and elapsed >= threshold:
+            sample = {
+                'endpoint': endpoint, 'method': request.method, 'path': request.path,
+                'status': response.status_code, 'ms': round(elapsed * 1000, 1),
+                'db_queries': db_queries, 'db_ms': round(db_seconds * 1000, 1) if recorder else None,
+                'queries': recorder.queries if recorder else [], 'at': timezone.now().isoformat(),
+            }
+            _slow_requests.append(sample)
+            if recorder:
+                logger.warning(
+                    f"Slow request {request.method} {request.path} ({endpoint}): {sample['ms']} ms, "
+                    f"{db_queries} queries / {sample['db_ms']} ms in DB"
+                )
+            else:
+                logger.warning(f"Slow request {request.method} {request.path} ({endpoint}): {sample['ms']} ms")
+            for query in sample['queries']:
+                logger.debug(f"  [{query['ms']} ms] {query['sql']}")
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_merge_0005_jobmessage_0005_merge_20260212_0213'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobListingTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('job_listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='index_terms', to='product.joblisting')),
+            ],
+            options={
+                'unique_together': {('term', 'job_listing')},
+            },
+        ),
+    ]
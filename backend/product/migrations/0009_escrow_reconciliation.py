@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0008_webhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReconciliationCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='escrowcontract',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='EscrowDiscrepancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('balance_mismatch', 'On-chain balance differs from local ledger'), ('deposit_shortfall', 'Deposits below escrow amount'), ('payout_mismatch', 'Released without matching payout')], max_length=30)),
+                ('local_status', models.CharField(max_length=20)),
+                ('expected_stroops', models.BigIntegerField(blank=True, null=True)),
+                ('onchain_stroops', models.BigIntegerField(blank=True, null=True)),
+                ('details', models.TextField(blank=True, default='')),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('last_seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('escrow_contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='discrepancies', to='product.escrowcontract')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resolved_at', 'kind'], name='product_esc_resolve_ffa870_idx')],
+            },
+        ),
+    ]
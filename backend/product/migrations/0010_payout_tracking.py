@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_escrow_reconciliation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mobilemoneypayout',
+            name='check_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mobilemoneypayout',
+            name='last_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mobilemoneypayout',
+            name='next_check_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mobilemoneypayout',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='webhookevent',
+            name='provider',
+            field=models.CharField(choices=[('mpesa', 'M-Pesa'), ('paystack', 'Paystack'), ('intersend', 'Intersend')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0011_deferredoperation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='escrowcontract',
+            name='chain_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='escrowcontract',
+            name='chain_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='escrowcontract',
+            name='chain_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='escrowcontract',
+            name='chain_status',
+            field=models.CharField(choices=[('provisioning', 'Provisioning'), ('created', 'Created'), ('failed', 'Failed')], default='created', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='escrowcontract',
+            index=models.Index(fields=['chain_status', 'chain_next_attempt_at'], name='product_esc_chain_s_fbf39a_idx'),
+        ),
+    ]
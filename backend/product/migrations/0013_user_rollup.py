@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0012_escrow_chain_provisioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRollup',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rollup', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('job_counts', models.JSONField(default=dict)),
+                ('workers_hired', models.PositiveIntegerField(default=0)),
+                ('total_escrowed', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_released', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_earned', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('stale', models.BooleanField(default=True)),
+                ('version', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0013_user_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EscrowEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('changes', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('escrow_contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='product.escrowcontract')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['escrow_contract', 'created_at'], name='product_esc_escrow__3b5656_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EscrowSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.JSONField(default=dict)),
+                ('last_event_id', models.BigIntegerField()),
+                ('as_of', models.DateTimeField()),
+                ('event_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('escrow_contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='product.escrowcontract')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['escrow_contract', 'as_of'], name='product_esc_escrow__00c9c4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+# Archive tables are append-only and range-partitioned by month on Postgres (partitions are
+# created as rows arrive and dropped whole by archive_data --drop-before; see archival.py).
+# A partitioned table's primary key must include the partition key, so it is (id, created_at).
+# The tables are swapped before the schema editor runs its deferred SQL, so Django's own
+# foreign keys and indexes are then created on the partitioned tables.
+PARTITIONED = ['product_archivedjobmessage', 'product_archivedussdtransaction']
+
+
+def partition_archives(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in PARTITIONED:
+        schema_editor.execute(f'ALTER TABLE {table} RENAME TO {table}_plain')
+        schema_editor.execute(
+            f'CREATE TABLE {table} (LIKE {table}_plain INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)'
+        )
+        schema_editor.execute(f'DROP TABLE {table}_plain')
+        schema_editor.execute(f'ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0014_escrow_event_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedJobMessage',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('job_listing', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_messages', to='product.joblisting')),
+                ('sender', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job_listing', 'created_at'], name='archived_msg_job_created')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedUSSDTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('session_id', models.CharField(max_length=100)),
+                ('phone_number', models.CharField(max_length=15)),
+                ('text', models.TextField()),
+                ('stage', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['phone_number', 'created_at'], name='archived_ussd_phone_created')],
+            },
+        ),
+        migrations.RunPython(partition_archives, migrations.RunPython.noop),
+    ]
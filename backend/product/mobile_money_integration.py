@@ -1,12 +1,24 @@
 """
 Mobile Money Integration Module
 Handles mobile money payouts via Intersend API
+
+Set INTERSEND_SIMULATE = True to use SimulatedIntersendClient, an offline stand-in
+whose payouts settle (or fail) only after a few status checks.
+
+Calls go through per-endpoint circuit breakers; sends raise CircuitOpenError while
+their breaker is open so the payout can be deferred instead of waiting on timeouts.
 """
-import requests
 import logging
-from typing import Optional, Dict
+import threading
+import time
+import uuid
+from typing import Optional, Dict, List
 from django.conf import settings
 
+from .money import Money
+from . import circuit_breaker
+from .circuit_breaker import CircuitOpenError
+
 logger = logging.getLogger(__name__)
 
 # Intersend API configuration
@@ -18,6 +30,20 @@ INTERSEND_API_URL = getattr(
 )
 INTERSEND_API_KEY = getattr(settings, 'INTERSEND_API_KEY', None)
 INTERSEND_API_SECRET = getattr(settings, 'INTERSEND_API_SECRET', None)
+INTERSEND_SIMULATE = getattr(settings, 'INTERSEND_SIMULATE', False)
+INTERSEND_BULK_MAX = getattr(settings, 'INTERSEND_BULK_MAX', 100)  # payouts per bulk request
+
+# Bulk result for a payout Intersend may or may not have taken (timeout, 5xx): not a rejection
+UNCONFIRMED = 'unconfirmed'
+
+
+def _format_phone(phone_number):
+    """Ensure the number starts with the country code (254XXXXXXXXX)."""
+    if phone_number.startswith('0'):
+        return '254' + phone_number[1:]
+    if not phone_number.startswith('254'):
+        return '254' + phone_number
+    return phone_number
 
 
 class IntersendClient:
@@ -38,7 +64,7 @@ class IntersendClient:
     def send_mobile_money(
         self,
         phone_number: str,
-        amount: float,
+        amount: Money,
         currency: str = 'KES',
         reference: str = None,
         callback_url: str = None
@@ -48,7 +74,7 @@ class IntersendClient:
         
         Args:
             phone_number: Phone number in format 254XXXXXXXXX or 0XXXXXXXXX
-            amount: Amount to send
+            amount: Amount to send (Money; Decimal/str accepted)
             currency: Currency code (default: KES)
             reference: Transaction reference
             callback_url: Optional callback URL for status updates
@@ -57,41 +83,133 @@ class IntersendClient:
             Dict with transaction_id and status, or None if failed
         """
         try:
-            # Format phone number (ensure it starts with country code)
-            if phone_number.startswith('0'):
-                phone_number = '254' + phone_number[1:]
-            elif not phone_number.startswith('254'):
-                phone_number = '254' + phone_number
-            
-            payload = {
-                'phone_number': phone_number,
-                'amount': str(amount),
-                'currency': currency,
-                'reference': reference or f'PAYOUT_{phone_number}',
-            }
-            
-            if callback_url:
-                payload['callback_url'] = callback_url
-            
-            response = requests.post(
+            response = circuit_breaker.request(
+                'intersend:send', 'POST',
                 f'{self.api_url}/payouts/send',
-                json=payload,
+                json=self._send_payload(phone_number, amount, currency, reference, callback_url),
                 headers=self.headers,
                 timeout=30
             )
-            
-            if response.status_code in [200, 201]:
-                data = response.json()
-                logger.info(f"Mobile money payout initiated: {data.get('transaction_id')}")
-                return data
-            else:
-                logger.error(f"Failed to send mobile money: {response.status_code} - {response.text}")
-                return None
-                
+            return self._send_result(response)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error sending mobile money: {str(e)}")
             return None
+
+    async def asend_mobile_money(self, phone_number: str, amount: Money, currency: str = 'KES',
+                                 reference: str = None, callback_url: str = None) -> Optional[Dict]:
+        """send_mobile_money for async views: awaits the HTTP call instead of blocking a worker."""
+        try:
+            response = await circuit_breaker.arequest(
+                'intersend:send', 'POST',
+                f'{self.api_url}/payouts/send',
+                json=self._send_payload(phone_number, amount, currency, reference, callback_url),
+                headers=self.headers,
+                timeout=30
+            )
+            return self._send_result(response)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending mobile money: {str(e)}")
+            return None
+
+    @staticmethod
+    def _send_payload(phone_number, amount, currency, reference, callback_url):
+        phone_number = _format_phone(phone_number)
+        payload = {
+            'phone_number': phone_number,
+            'amount': str(Money.parse(amount, currency)),
+            'currency': currency,
+            'reference': reference or f'PAYOUT_{phone_number}',
+        }
+        if callback_url:
+            payload['callback_url'] = callback_url
+        return payload
+
+    @staticmethod
+    def _send_result(response):
+        if response.status_code in [200, 201]:
+            data = response.json()
+            logger.info(f"Mobile money payout initiated: {data.get('transaction_id')}")
+            return data
+        logger.error(f"Failed to send mobile money: {response.status_code} - {response.text}")
+        return None
     
+    def send_bulk_mobile_money(
+        self,
+        payouts: List[Dict],
+        currency: str = 'KES',
+        callback_url: str = None
+    ) -> Dict[str, Optional[Dict]]:
+        """
+        Send many payouts through the bulk disbursement API, INTERSEND_BULK_MAX per request
+
+        Args:
+            payouts: [{'phone_number', 'amount', 'reference'}]; references must be unique
+            currency: Currency code (default: KES)
+            callback_url: Optional callback URL for status updates
+
+        Returns:
+            {reference: dict with transaction_id and status, or None if rejected}. When the
+            outcome of a request is unknown (timeout, 5xx) its payouts get
+            {'status': UNCONFIRMED} and no transaction_id: check them by reference.
+        """
+        results = {}
+        for start in range(0, len(payouts), INTERSEND_BULK_MAX):
+            chunk = payouts[start:start + INTERSEND_BULK_MAX]
+            results.update(self._send_bulk_chunk(chunk, currency, callback_url))
+        return results
+
+    def _send_bulk_chunk(self, chunk, currency, callback_url):
+        payload = {
+            'currency': currency,
+            'payouts': [
+                {
+                    'phone_number': _format_phone(p['phone_number']),
+                    'amount': str(Money.parse(p['amount'], currency)),
+                    'reference': p['reference'],
+                }
+                for p in chunk
+            ],
+        }
+        if callback_url:
+            payload['callback_url'] = callback_url
+        try:
+            response = circuit_breaker.request(
+                'intersend:bulk', 'POST',
+                f'{self.api_url}/payouts/bulk',
+                json=payload,
+                headers=self.headers,
+                timeout=60
+            )
+            if response.status_code in [200, 201]:
+                accepted = {
+                    item.get('reference'): item
+                    for item in response.json().get('payouts', [])
+                    if item.get('transaction_id')
+                }
+                logger.info(f"Bulk payout: {len(accepted)}/{len(chunk)} accepted")
+                return {p['reference']: accepted.get(p['reference']) for p in chunk}
+            if response.status_code >= 500:
+                logger.error(f"Bulk payout outcome unknown: {response.status_code} - {response.text}")
+                return {p['reference']: {'status': UNCONFIRMED} for p in chunk}
+            if response.status_code not in (404, 405):
+                logger.error(f"Failed to send bulk payout: {response.status_code} - {response.text}")
+                return {p['reference']: None for p in chunk}
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            # The request may have reached Intersend (e.g. a read timeout): not a rejection
+            logger.error(f"Bulk payout outcome unknown: {str(e)}")
+            return {p['reference']: {'status': UNCONFIRMED} for p in chunk}
+        # Account without bulk disbursement: send one by one
+        return {
+            p['reference']: self.send_mobile_money(p['phone_number'], p['amount'], currency, p['reference'], callback_url)
+            for p in chunk
+        }
+
     def check_payout_status(self, transaction_id: str) -> Optional[Dict]:
         """
         Check status of a mobile money payout
@@ -103,7 +221,8 @@ class IntersendClient:
             Dict with transaction status, or None if failed
         """
         try:
-            response = requests.get(
+            response = circuit_breaker.request(
+                'intersend:status', 'GET',
                 f'{self.api_url}/payouts/{transaction_id}',
                 headers=self.headers,
                 timeout=30
@@ -120,6 +239,72 @@ class IntersendClient:
             return None
 
 
+class SimulatedIntersendClient(IntersendClient):
+    """
+    Offline Intersend for local runs and tests. Accepted payouts report 'pending' until
+    they have been checked settle_after_checks times, then 'completed' - or 'failed' for
+    numbers in fail_numbers. check_delay adds latency to each status check.
+    """
+
+    def __init__(self, settle_after_checks: int = 2, fail_numbers=(), check_delay: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.settle_after_checks = settle_after_checks
+        self.fail_numbers = set(fail_numbers)
+        self.check_delay = check_delay
+        self.payouts = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.bulk_requests = 0
+        self._lock = threading.Lock()
+
+    def send_mobile_money(self, phone_number, amount, currency='KES', reference=None, callback_url=None):
+        transaction_id = f"SIM{uuid.uuid4().hex[:12].upper()}"
+        with self._lock:
+            self.payouts[transaction_id] = {
+                'phone_number': phone_number,
+                'amount': str(Money.parse(amount, currency)),
+                'checks': 0,
+            }
+        return {'transaction_id': transaction_id, 'status': 'pending', 'reference': reference}
+
+    async def asend_mobile_money(self, phone_number, amount, currency='KES', reference=None, callback_url=None):
+        return self.send_mobile_money(phone_number, amount, currency, reference, callback_url)
+
+    def _send_bulk_chunk(self, chunk, currency, callback_url):
+        with self._lock:
+            self.bulk_requests += 1
+        return {
+            p['reference']: self.send_mobile_money(_format_phone(p['phone_number']), p['amount'], currency, p['reference'])
+            for p in chunk
+        }
+
+    def check_payout_status(self, transaction_id: str) -> Optional[Dict]:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.check_delay:
+                time.sleep(self.check_delay)
+            with self._lock:
+                payout = self.payouts.get(transaction_id)
+                if payout is None:
+                    return None
+                payout['checks'] += 1
+                if payout['checks'] < self.settle_after_checks:
+                    state = 'pending'
+                elif payout['phone_number'] in self.fail_numbers:
+                    state = 'failed'
+                else:
+                    state = 'completed'
+            result = {'transaction_id': transaction_id, 'status': state}
+            if state == 'failed':
+                result['reason'] = 'Recipient account rejected the transfer'
+            return result
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
 # Singleton instance
 _intersend_client = None
 
@@ -127,5 +312,5 @@ def get_intersend_client() -> IntersendClient:
     """Get singleton Intersend client instance"""
     global _intersend_client
     if _intersend_client is None:
-        _intersend_client = IntersendClient()
+        _intersend_client = SimulatedIntersendClient() if INTERSEND_SIMULATE else IntersendClient()
     return _intersend_client
@@ -133,6 +133,19 @@ class JobListing(models.Model):
         return f"{self.title} - {self.status}"
 
 
+class JobListingTerm(models.Model):
+    """Inverted index entry: one term from an open listing's title/description (see matching.py)"""
+    job_listing = models.ForeignKey(JobListing, on_delete=models.CASCADE, related_name='index_terms')
+    term = models.CharField(max_length=50)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        unique_together = [['term', 'job_listing']]
+
+    def __str__(self):
+        return f"{self.term} -> {self.job_listing_id} ({self.weight})"
+
+
 class JobApplication(models.Model):
     """Worker application to a job - employer picks one to assign"""
     job_listing = models.ForeignKey(JobListing, on_delete=models.CASCADE, related_name='applications')
@@ -174,10 +187,27 @@ class EscrowContract(models.Model):
         ],
         default='pending_deposit'
     )
+    # On-chain provisioning: new escrows are created on Stellar by provision_escrows
+    chain_status = models.CharField(
+        max_length=20,
+        choices=[
+            ('provisioning', 'Provisioning'),
+            ('created', 'Created'),
+            ('failed', 'Failed')
+        ],
+        default='created'
+    )
+    chain_attempts = models.PositiveIntegerField(default=0)
+    chain_next_attempt_at = models.DateTimeField(null=True, blank=True)
+    chain_error = models.TextField(blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     funded_at = models.DateTimeField(null=True, blank=True)
     released_at = models.DateTimeField(null=True, blank=True)
     
+    class Meta:
+        indexes = [models.Index(fields=['chain_status', 'chain_next_attempt_at'])]
+    
     def __str__(self):
         return f"Escrow {self.contract_id} - {self.status}"
 
@@ -292,6 +322,11 @@ class MobileMoneyPayout(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     failure_reason = models.TextField(blank=True, null=True)
+    # Settlement tracking: accepted payouts stay 'processing' until Intersend confirms
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    last_checked_at = models.DateTimeField(null=True, blank=True)
+    next_check_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    check_attempts = models.PositiveIntegerField(default=0)
     
     def __str__(self):
         return f"Payout {self.transaction_reference} - {self.amount}"
@@ -309,3 +344,191 @@ class JobMessage(models.Model):
 
     def __str__(self):
         return f"{self.job_listing_id} from {self.sender_id}: {self.text[:30]}"
+
+
+class WebhookEvent(models.Model):
+    """Payment provider webhook as received. Stored on receipt, applied later by webhooks.process_pending()."""
+    provider = models.CharField(
+        max_length=20,
+        choices=[
+            ('mpesa', 'M-Pesa'),
+            ('paystack', 'Paystack'),
+            ('intersend', 'Intersend'),
+        ]
+    )
+    event_id = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('pending', 'Pending'),
+            ('processed', 'Processed'),
+            ('ignored', 'Ignored'),
+            ('failed', 'Failed'),
+        ],
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = [['provider', 'event_id']]
+        indexes = [models.Index(fields=['status', 'received_at'])]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_id} - {self.status}"
+
+
+class EscrowDiscrepancy(models.Model):
+    """Mismatch between the local escrow ledger and the on-chain contract, found by reconcile_escrows"""
+    escrow_contract = models.ForeignKey(EscrowContract, on_delete=models.CASCADE, related_name='discrepancies')
+    kind = models.CharField(
+        max_length=30,
+        choices=[
+            ('balance_mismatch', 'On-chain balance differs from local ledger'),
+            ('deposit_shortfall', 'Deposits below escrow amount'),
+            ('payout_mismatch', 'Released without matching payout'),
+        ]
+    )
+    local_status = models.CharField(max_length=20)
+    expected_stroops = models.BigIntegerField(null=True, blank=True)
+    onchain_stroops = models.BigIntegerField(null=True, blank=True)
+    details = models.TextField(blank=True, default='')
+    detected_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(default=timezone.now)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['resolved_at', 'kind'])]
+
+    def __str__(self):
+        return f"{self.escrow_contract_id} {self.kind}"
+
+
+class ReconciliationCheckpoint(models.Model):
+    """High-water mark (updated_at, id) of the last escrow a reconciliation job has checked"""
+    name = models.CharField(max_length=50, unique=True)
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_updated_at} #{self.last_id}"
+
+
+class DeferredOperation(models.Model):
+    """Upstream call (Stellar, Intersend) deferred while its circuit breaker was open; run by retry_queue"""
+    operation = models.CharField(max_length=50)
+    key = models.CharField(max_length=150, unique=True)  # one queued entry per logical operation
+    payload = models.JSONField(default=dict)
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('pending', 'Pending'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.operation} {self.key} - {self.status}"
+
+
+class UserRollup(models.Model):
+    """Per-user dashboard totals, recomputed by rollups.py after escrow/job transitions mark them stale"""
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='rollup')
+    job_counts = models.JSONField(default=dict)  # {status: count}
+    workers_hired = models.PositiveIntegerField(default=0)
+    total_escrowed = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_released = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_earned = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    stale = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=0)  # bumped on every change; guards recompute races
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Rollup for {self.user_id}"
+
+
+class EscrowEvent(models.Model):
+    """Append-only escrow history: one row per transition, written in the transition's transaction (escrow_events.py)"""
+    escrow_contract = models.ForeignKey(EscrowContract, on_delete=models.CASCADE, related_name='events')
+    kind = models.CharField(max_length=30)  # opened, assigned, funded, completed, release_failed, released, chain_created, ...
+    status = models.CharField(max_length=20, blank=True)  # escrow status after the event; blank if unchanged
+    changes = models.JSONField(default=dict)  # fields the event set
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['escrow_contract', 'created_at'])]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Escrow events are append-only")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.escrow_contract_id} {self.kind} @ {self.created_at}"
+
+
+class EscrowSnapshot(models.Model):
+    """Escrow state folded from its events up to last_event_id, so history needs no full replay"""
+    escrow_contract = models.ForeignKey(EscrowContract, on_delete=models.CASCADE, related_name='snapshots')
+    state = models.JSONField(default=dict)
+    last_event_id = models.BigIntegerField()
+    as_of = models.DateTimeField()  # created_at of the last folded event
+    event_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['escrow_contract', 'as_of'])]
+
+    def __str__(self):
+        return f"{self.escrow_contract_id} as of {self.as_of}"
+
+
+class ArchivedUSSDTransaction(models.Model):
+    """USSD session moved out of USSDTransaction once closed (archival.py); keeps its original id"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True, db_index=False,
+                             related_name='+')
+    session_id = models.CharField(max_length=100)
+    phone_number = models.CharField(max_length=15)
+    text = models.TextField()
+    stage = models.CharField(max_length=50)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['phone_number', 'created_at'], name='archived_ussd_phone_created')]
+
+    def __str__(self):
+        return f"{self.session_id} - {self.phone_number} (archived)"
+
+
+class ArchivedJobMessage(models.Model):
+    """Chat message of a completed/cancelled job moved out of JobMessage (archival.py); keeps its original id"""
+    id = models.BigIntegerField(primary_key=True)
+    job_listing = models.ForeignKey(JobListing, on_delete=models.CASCADE, db_index=False,
+                                    related_name='archived_messages')
+    sender = models.ForeignKey(CustomUser, on_delete=models.CASCADE, db_index=False, related_name='+')
+    text = models.TextField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['job_listing', 'created_at'], name='archived_msg_job_created')]
+
+    def __str__(self):
+        return f"{self.job_listing_id} from {self.sender_id}: {self.text[:30]} (archived)"
@@ -0,0 +1,169 @@
+"""
+Money Module
+Fixed-point money amounts held as integer minor units.
+
+All provider and chain amounts are converted through Money instead of float():
+    Money.parse("2500.00", "KES").minor       -> 250000   (cents)
+    Money.from_minor(250000, "NGN").amount    -> Decimal("2500.00")   (from kobo)
+    Money.parse("12.5", "KES").to_stroops()   -> 125000000   (Stellar, 7 decimals)
+
+Database columns stay DecimalField(decimal_places=2); Money.from_decimal() and
+Money.amount convert at the model boundary without losing precision.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+DEFAULT_CURRENCY = 'KES'
+
+# Minor-unit exponent per currency (KES cents, NGN kobo, ...)
+CURRENCY_EXPONENTS = {
+    'KES': 2,
+    'NGN': 2,
+    'USD': 2,
+    'GHS': 2,
+    'ZAR': 2,
+    'XLM': 7,
+}
+STROOP_EXPONENT = 7
+
+
+class MoneyError(ValueError):
+    """Amount or currency cannot be represented."""
+
+
+def currency_exponent(currency):
+    try:
+        return CURRENCY_EXPONENTS[currency.upper()]
+    except (KeyError, AttributeError):
+        raise MoneyError(f"Unsupported currency: {currency}")
+
+
+class Money:
+    """Immutable amount in integer minor units of a currency."""
+
+    __slots__ = ('minor', 'currency')
+
+    def __init__(self, minor, currency=DEFAULT_CURRENCY):
+        if isinstance(minor, bool) or not isinstance(minor, int):
+            raise MoneyError(f"Minor units must be an integer, got {minor!r}")
+        currency = currency.upper()
+        currency_exponent(currency)
+        object.__setattr__(self, 'minor', minor)
+        object.__setattr__(self, 'currency', currency)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Money is immutable")
+
+    # ---------- construction ----------
+
+    @classmethod
+    def from_minor(cls, minor, currency=DEFAULT_CURRENCY):
+        """From kobo/cents (e.g. Paystack 'amount')."""
+        try:
+            return cls(int(minor), currency)
+        except (TypeError, ValueError):
+            raise MoneyError(f"Invalid minor amount: {minor!r}")
+
+    @classmethod
+    def from_decimal(cls, value, currency=DEFAULT_CURRENCY):
+        """From a Decimal (model fields). Rounds half-up to the currency's minor unit."""
+        exp = currency_exponent(currency)
+        try:
+            minor = (Decimal(value) * (10 ** exp)).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+        except (InvalidOperation, TypeError, ValueError):
+            raise MoneyError(f"Invalid amount: {value!r}")
+        if not minor.is_finite():
+            raise MoneyError(f"Invalid amount: {value!r}")
+        return cls(int(minor), currency)
+
+    @classmethod
+    def parse(cls, value, currency=DEFAULT_CURRENCY):
+        """From provider input: a decimal string such as M-Pesa 'TransAmount', or an int/Decimal."""
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, float):
+            # Go through repr so 0.1 parses as 0.1, not its binary expansion
+            value = repr(value)
+        if isinstance(value, str):
+            value = value.strip().replace(',', '') or '0'
+        return cls.from_decimal(value, currency)
+
+    @classmethod
+    def from_stroops(cls, stroops, currency='XLM'):
+        """From Stellar stroops (1 unit = 10^7 stroops)."""
+        return cls.from_decimal(Decimal(int(stroops)).scaleb(-STROOP_EXPONENT), currency)
+
+    @classmethod
+    def zero(cls, currency=DEFAULT_CURRENCY):
+        return cls(0, currency)
+
+    # ---------- conversion ----------
+
+    @property
+    def exponent(self):
+        return CURRENCY_EXPONENTS[self.currency]
+
+    @property
+    def amount(self):
+        """Exact Decimal in major units, with the currency's number of decimal places."""
+        return Decimal(self.minor).scaleb(-self.exponent)
+
+    def to_minor(self):
+        """Kobo / cents."""
+        return self.minor
+
+    def to_stroops(self):
+        """Stellar i128 amount (7 decimal places)."""
+        return self.minor * 10 ** (STROOP_EXPONENT - self.exponent)
+
+    def __str__(self):
+        return f"{self.amount:.{self.exponent}f}"
+
+    def __repr__(self):
+        return f"Money('{self}', '{self.currency}')"
+
+    # ---------- arithmetic / comparison ----------
+
+    def _check(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        if other.currency != self.currency:
+            raise MoneyError(f"Currency mismatch: {self.currency} vs {other.currency}")
+        return other
+
+    def __add__(self, other):
+        other = self._check(other)
+        if other is NotImplemented:
+            return other
+        return Money(self.minor + other.minor, self.currency)
+
+    def __sub__(self, other):
+        other = self._check(other)
+        if other is NotImplemented:
+            return other
+        return Money(self.minor - other.minor, self.currency)
+
+    def __neg__(self):
+        return Money(-self.minor, self.currency)
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.minor == other.minor and self.currency == other.currency
+
+    def __lt__(self, other):
+        other = self._check(other)
+        if other is NotImplemented:
+            return other
+        return self.minor < other.minor
+
+    def __le__(self, other):
+        other = self._check(other)
+        if other is NotImplemented:
+            return other
+        return self.minor <= other.minor
+
+    def __hash__(self):
+        return hash((self.minor, self.currency))
+
+    def __bool__(self):
+        return self.minor != 0
@@ -0,0 +1,116 @@
+"""
+Payload Shaping Module
+Sparse fieldsets (?fields=) and the normalized mode (?normalize=1) for list responses.
+
+?fields= is a comma-separated list of keys to keep in each row of the response's lists
+(the top-level list, or the lists inside an envelope such as the workers overview).
+Dotted names reach into nested rows: ?fields=job_id,applicants.employee_name keeps job_id
+and, inside each job's applicants, only employee_name. A key listed without a dot keeps
+its value whole. Unknown keys are ignored. In an envelope, a name that starts with one of
+its keys selects inside that key instead (?fields=applicants.employee_name on a
+normalized applicant list). Views can ask wanted() to skip building parts the client did
+not ask for (work histories cost a query).
+
+?normalize=1 on the applicant endpoints moves each applicant's work_history into one
+"work_histories" table keyed by employee id, so a worker who applied to several jobs
+sends their history once. Both normalized payloads keep their rows under "applicants".
+"""
+import functools
+
+from rest_framework.response import Response
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+def parse_fields(value):
+    """'a,b.c' -> {'a': None, 'b': {'c': None}} (None: keep the whole value). None when not given."""
+    if not value:
+        return None
+    tree = {}
+    for name in value.split(','):
+        parts = [part.strip() for part in name.split('.')]
+        if not all(parts):
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break  # the whole value is already kept
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree or None
+
+
+def requested_fields(request):
+    return parse_fields(request.query_params.get('fields'))
+
+
+def wanted(request, *path):
+    """False when ?fields= leaves out this key path (e.g. wanted(request, 'applicants', 'work_history'))."""
+    node = requested_fields(request)
+    for key in path:
+        if node is None:
+            return True
+        if key not in node:
+            return False
+        node = node[key]
+    return True
+
+
+def normalized(request):
+    return request.query_params.get('normalize', '').lower() in TRUE_VALUES
+
+
+def histories_wanted(request, *rows):
+    """
+    Whether to load work histories: kept on the applicant rows at the key path `rows`, or,
+    in normalized mode, as the work_histories table.
+    """
+    return wanted(request, *rows, 'work_history') or (normalized(request) and wanted(request, 'work_histories'))
+
+
+def _pick(value, tree):
+    if isinstance(value, list):
+        return [_pick(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: item if tree[key] is None else _pick(item, tree[key]) for key, item in value.items() if key in tree}
+
+
+def _select_in_envelope(key, value, tree):
+    if key in tree:
+        return value if tree[key] is None else _pick(value, tree[key])
+    return _pick(value, tree) if isinstance(value, list) else value
+
+
+def select_fields(data, tree):
+    """Apply a parse_fields() tree to list rows; envelope dicts keep their keys."""
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return _pick(data, tree)
+    if isinstance(data, dict):
+        return {key: _select_in_envelope(key, value, tree) for key, value in data.items()}
+    return data
+
+
+def sparse_fields(view):
+    """Decorator applying ?fields= to a view's Response data (inside @api_view)."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        tree = requested_fields(request)
+        if tree is not None and isinstance(response, Response) and response.status_code == 200:
+            response.data = select_fields(response.data, tree)
+        return response
+    return wrapper
+
+
+def split_work_histories(applicants, key='employee_id'):
+    """Pop work_history off each applicant row into {employee id: history}, each worker once."""
+    table = {}
+    for applicant in applicants:
+        history = applicant.pop('work_history', None)
+        if history is not None:
+            table.setdefault(applicant[key], history)
+    return table
@@ -0,0 +1,131 @@
+"""
+Payout Tracking Module
+Follows accepted mobile money payouts until Intersend reports them settled or failed.
+
+send_payout() leaves an accepted payout in 'processing' with next_check_at set. Its final
+status arrives either through the Intersend status callback (queued in the webhook inbox)
+or through poll_due(), which checks payouts that are due in concurrent batches.
+
+The interval between checks grows with each inconclusive check (PAYOUT_POLL_INTERVALS),
+so fresh payouts are checked often and slow ones back off. Concurrent status requests
+are capped per provider (PAYOUT_PROVIDER_CONCURRENCY) across all pollers in the process.
+
+Run the poller with: python manage.py poll_payouts --loop
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import MobileMoneyPayout
+from .mobile_money_integration import get_intersend_client
+from . import escrow_cache, reconciliation, rollups
+
+logger = logging.getLogger(__name__)
+
+PROVIDER = 'intersend'
+
+# Seconds until the next check, indexed by the number of checks already made
+POLL_INTERVALS = getattr(settings, 'PAYOUT_POLL_INTERVALS', [15, 30, 60, 120, 300, 900, 1800])
+PROVIDER_CONCURRENCY = getattr(settings, 'PAYOUT_PROVIDER_CONCURRENCY', {'intersend': 4})
+
+COMPLETED_STATUSES = {'completed', 'success', 'successful', 'settled'}
+FAILED_STATUSES = {'failed', 'rejected', 'cancelled', 'reversed', 'expired'}
+
+_limits = {}
+_limits_lock = threading.Lock()
+
+
+def provider_limit(provider):
+    """Process-wide semaphore bounding in-flight status requests to a provider."""
+    with _limits_lock:
+        if provider not in _limits:
+            _limits[provider] = threading.BoundedSemaphore(PROVIDER_CONCURRENCY.get(provider, 2))
+        return _limits[provider]
+
+
+def next_check_delay(attempts):
+    return timedelta(seconds=POLL_INTERVALS[min(attempts, len(POLL_INTERVALS) - 1)])
+
+
+# ==================== STATUS UPDATES ====================
+
+def apply_status(payout, provider_status, reason=None):
+    """
+    Apply a provider status to a processing payout. Final statuses move it to completed/failed
+    exactly once; anything else schedules the next check. Returns the payout's status.
+    """
+    state = (provider_status or '').lower()
+    now = timezone.now()
+    processing = MobileMoneyPayout.objects.filter(pk=payout.pk, status='processing')
+    if state in COMPLETED_STATUSES:
+        with transaction.atomic():
+            settled = processing.update(status='completed', completed_at=now, last_checked_at=now, next_check_at=None)
+            if settled:
+                reconciliation.mark_changed([payout.escrow_contract_id])
+        if settled:
+            logger.info(f"Payout {payout.transaction_reference} settled")
+            escrow_cache.invalidate_escrows([payout.escrow_contract_id])
+            rollups.mark_stale(user_ids=[payout.employee_id])
+    elif state in FAILED_STATUSES:
+        with transaction.atomic():
+            failed = processing.update(status='failed', failure_reason=reason or f"Intersend reported {state}",
+                                       last_checked_at=now, next_check_at=None)
+            if failed:
+                reconciliation.mark_changed([payout.escrow_contract_id])
+        if failed:
+            logger.warning(f"Payout {payout.transaction_reference} failed: {reason or state}")
+            escrow_cache.invalidate_escrows([payout.escrow_contract_id])
+    else:
+        processing.update(
+            last_checked_at=now,
+            check_attempts=F('check_attempts') + 1,
+            next_check_at=now + next_check_delay(payout.check_attempts + 1),
+        )
+    payout.refresh_from_db()
+    return payout.status
+
+
+# ==================== POLLER ====================
+
+def due_payouts(batch_size=100, now=None):
+    now = now or timezone.now()
+    return list(
+        MobileMoneyPayout.objects.filter(status='processing', transaction_reference__isnull=False)
+        .filter(Q(next_check_at__lte=now) | Q(next_check_at__isnull=True))
+        .order_by(F('next_check_at').asc(nulls_first=True), 'id')[:batch_size]
+    )
+
+
+def poll_due(batch_size=100, client=None, provider=PROVIDER):
+    """
+    Check up to batch_size due payouts concurrently (bounded by the provider limit) and
+    apply the results. Returns counts per resulting status.
+    """
+    payouts = due_payouts(batch_size)
+    counts = {'checked': len(payouts), 'completed': 0, 'failed': 0, 'processing': 0}
+    if not payouts:
+        return counts
+    client = client or get_intersend_client()
+    limit = provider_limit(provider)
+
+    def check(payout):
+        with limit:
+            try:
+                return client.check_payout_status(payout.transaction_reference)
+            except Exception as e:
+                logger.error(f"Payout status check error for {payout.transaction_reference}: {str(e)}")
+                return None
+
+    workers = min(PROVIDER_CONCURRENCY.get(provider, 2), len(payouts))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(check, payouts))
+    for payout, result in zip(payouts, results):
+        result = result or {}
+        new_status = apply_status(payout, result.get('status'), result.get('reason') or result.get('message'))
+        counts[new_status] = counts.get(new_status, 0) + 1
+    return counts
@@ -0,0 +1,162 @@
+"""
+Escrow Provisioning Module
+Creates escrow contracts on Stellar off the job-posting path.
+
+Posting a job writes the listing and a pending EscrowContract (chain_status
+'provisioning') in one transaction. provision_pending() then creates due escrows on
+chain in batches through StellarEscrowClient.create_escrow_contracts, marks them
+'created', and wakes any funding that was waiting for the contract. Failed creates are
+retried with backoff and marked 'failed' after MAX_ATTEMPTS. A contract created under a
+different id after deposits arrived for the local one is marked 'failed' too, with the
+reason in chain_error.
+
+Run the worker with: python manage.py provision_escrows --loop
+"""
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EscrowContract, JobListing, DeferredOperation
+from .stellar_integration import get_stellar_client
+from .circuit_breaker import CircuitOpenError
+from .money import Money
+from .retry_queue import retry_delay
+from . import escrow_cache, escrow_events
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 10
+CLAIM_SECONDS = 120
+
+
+def _adopt_contract_id(escrow, contract_id):
+    """
+    Switch to the id the contract service assigned, while no deposit can reference the local
+    one. Returns False when deposits already arrived under the local id.
+    """
+    with transaction.atomic():
+        adopted = EscrowContract.objects.filter(
+            pk=escrow.pk, status='pending_deposit', mpesa_deposits=None, paystack_deposits=None
+        ).update(contract_id=contract_id, updated_at=timezone.now())
+        if adopted:
+            JobListing.objects.filter(pk=escrow.job_listing_id).update(escrow_contract_id=contract_id, updated_at=timezone.now())
+            escrow_events.record(escrow.pk, 'contract_adopted', '', contract_id=contract_id)
+            escrow.contract_id = contract_id
+    return bool(adopted)
+
+
+def _adoption_refused(escrow, contract_id):
+    """
+    Deposits reference the local id but the contract exists on chain under another: funding
+    or releasing the local id would fail, so leave the escrow failed for an operator.
+    Deferred fund/release operations stay parked until chain_status is 'created' again.
+    """
+    error = f"Created on chain as {contract_id} after deposits arrived for {escrow.contract_id}"
+    logger.error(f"Escrow {escrow.contract_id}: {error}")
+    with transaction.atomic():
+        EscrowContract.objects.filter(pk=escrow.pk).update(
+            chain_status='failed', chain_next_attempt_at=None, chain_error=error, updated_at=timezone.now()
+        )
+        escrow_events.record(escrow.pk, 'chain_failed', '', chain_status='failed')
+    escrow_cache.invalidate(escrow.job_listing_id)
+
+
+def due_escrows(batch_size=BATCH_SIZE, now=None):
+    now = now or timezone.now()
+    return list(
+        EscrowContract.objects.filter(chain_status='provisioning')
+        .filter(Q(chain_next_attempt_at__isnull=True) | Q(chain_next_attempt_at__lte=now))
+        .select_related('employer')
+        .order_by('id')[:batch_size]
+    )
+
+
+def _claim(escrows, now):
+    """
+    Push each escrow's next attempt past the batch, but only if chain_next_attempt_at is still
+    the value read: a second worker that read the same batch claims none of it, so a contract
+    is never created twice. Returns the escrows this worker claimed.
+    """
+    claimed = []
+    for escrow in escrows:
+        if EscrowContract.objects.filter(
+            pk=escrow.pk, chain_status='provisioning', chain_next_attempt_at=escrow.chain_next_attempt_at
+        ).update(chain_next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS)):
+            claimed.append(escrow)
+    return claimed
+
+
+def provision_pending(batch_size=BATCH_SIZE, client=None):
+    """Create up to batch_size due escrows on chain in one batch. Returns counts."""
+    now = timezone.now()
+    escrows = due_escrows(batch_size, now)
+    counts = {'created': 0, 'retrying': 0, 'failed': 0}
+    if not escrows:
+        return counts
+    escrows = _claim(escrows, now)
+    if not escrows:
+        return counts
+    client = client or get_stellar_client()
+    try:
+        results = client.create_escrow_contracts([
+            (
+                e.contract_id,
+                e.employer.stellar_account_id or e.employer.phone_number,  # Fallback to phone if no Stellar account
+                Money.from_decimal(e.amount),
+                str(e.job_listing_id),
+            )
+            for e in escrows
+        ])
+    except CircuitOpenError as exc:
+        logger.warning(f"Stellar unavailable ({exc}); provisioning of {len(escrows)} escrow(s) postponed")
+        EscrowContract.objects.filter(pk__in=[e.pk for e in escrows]).update(
+            chain_next_attempt_at=now + timedelta(seconds=max(exc.retry_after, 1))
+        )
+        counts['retrying'] = len(escrows)
+        return counts
+
+    created = []
+    for escrow in escrows:
+        result = results.get(escrow.contract_id)
+        if result:
+            contract_id = result.get('contract_id')
+            if contract_id and contract_id != escrow.contract_id and not _adopt_contract_id(escrow, contract_id):
+                _adoption_refused(escrow, contract_id)
+                counts['failed'] += 1
+                continue
+            created.append(escrow.pk)
+            continue
+        attempts = escrow.chain_attempts + 1
+        if attempts >= MAX_ATTEMPTS:
+            logger.error(f"Escrow {escrow.contract_id} could not be created on chain after {attempts} attempts")
+            with transaction.atomic():
+                EscrowContract.objects.filter(pk=escrow.pk).update(
+                    chain_status='failed', chain_attempts=attempts, chain_error="Stellar create failed"
+                )
+                escrow_events.record(escrow.pk, 'chain_failed', '', chain_status='failed')
+            escrow_cache.invalidate(escrow.job_listing_id)
+            counts['failed'] += 1
+        else:
+            EscrowContract.objects.filter(pk=escrow.pk).update(
+                chain_attempts=attempts, chain_next_attempt_at=now + retry_delay(attempts - 1),
+                chain_error="Stellar create failed"
+            )
+            counts['retrying'] += 1
+
+    if created:
+        with transaction.atomic():
+            EscrowContract.objects.filter(pk__in=created).update(
+                chain_status='created', chain_next_attempt_at=None, chain_error='', updated_at=timezone.now()
+            )
+            escrow_events.record_many(created, 'chain_created', '', chain_status='created')
+        # Deposits that arrived while provisioning were queued; fund them now
+        DeferredOperation.objects.filter(
+            status='pending', key__in=[f"stellar.fund:{pk}" for pk in created] + [f"escrow.release:{pk}" for pk in created]
+        ).update(next_attempt_at=timezone.now())
+        escrow_cache.invalidate(*[e.job_listing_id for e in escrows if e.pk in created])
+        counts['created'] = len(created)
+    logger.info(f"Provisioned {counts['created']} escrow(s) on chain ({counts['retrying']} retrying, {counts['failed']} failed)")
+    return counts
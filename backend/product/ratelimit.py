@@ -0,0 +1,234 @@
+"""
+Rate Limiting Module
+Token-bucket rate limits per endpoint class, and early load shedding under overload.
+
+RateLimitMiddleware resolves each request's URL name to an endpoint class
+(RATE_LIMIT_CLASSES in product/urls.py; names not listed there are 'reads' for GET/HEAD
+and 'writes' otherwise) and takes a token from that class's bucket for the caller:
+  key 'user'   the user id in the JWT (signature checked, no DB query), else the client IP
+  key 'phone'  the USSD phoneNumber, as the gateway's IP is shared by every subscriber
+  key 'ip'     the client IP (RATE_LIMIT_PROXY_HOPS trusted proxies in X-Forwarded-For)
+An empty bucket gets 429 with Retry-After before the view runs.
+
+Buckets live in the RATE_LIMIT_CACHE cache: shared between workers with a shared backend
+(REDIS_URL, see settings), per process with the default local-memory cache. The
+read-modify-write is not atomic, so concurrent requests on one key may each take the
+last token; the limit is approximate under exact simultaneity, which is fine for abuse.
+
+Shedding answers 503 with Retry-After instead of letting work pile up:
+  shed_at         the class is shed while this process has that many requests in flight
+                  (lower for reads than for USSD and webhooks, so those survive longest)
+  RATE_LIMIT_MAX_QUEUE_MS  requests that waited longer than this in the proxy's queue
+                  (X-Request-Start: t=<unix seconds>, as set by nginx) are shed; the client
+                  has likely given up already
+429s and 503s show up per endpoint in kazi_requests_total (metrics.py).
+
+Settings: RATE_LIMIT_ENABLED, RATE_LIMITS {class: {'rate': 'N/s|m|h', 'burst', 'key',
+'shed_at'}}, RATE_LIMIT_CACHE, RATE_LIMIT_PROXY_HOPS, RATE_LIMIT_MAX_QUEUE_MS.
+"""
+import json
+import logging
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from django.urls import Resolver404, resolve
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+KEY_PREFIX = 'ratelimit'
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """'120/min' -> tokens per second."""
+    count, period = rate.split('/')
+    return int(count) / PERIODS[period.strip()[0]]
+
+
+def limits():
+    return getattr(settings, 'RATE_LIMITS', {})
+
+
+def endpoint_class(request):
+    """
+    Rate limit class for the request's URL name. The match is kept on the request (Django
+    only resolves after middleware), so requests rejected here are labelled by endpoint.
+    """
+    from .urls import RATE_LIMIT_CLASSES  # urls imports the views; resolve lazily
+
+    try:
+        request.resolver_match = resolve(request.path_info, getattr(request, 'urlconf', None))
+        url_name = request.resolver_match.url_name
+    except Resolver404:
+        url_name = None
+    default = 'reads' if request.method in ('GET', 'HEAD', 'OPTIONS') else 'writes'
+    return RATE_LIMIT_CLASSES.get(url_name, default)
+
+
+# ==================== CALLER KEYS ====================
+
+def client_ip(request):
+    hops = getattr(settings, 'RATE_LIMIT_PROXY_HOPS', 0)
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if hops and forwarded:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(hops, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _user_id(request):
+    header = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(header) != 2 or header[0] not in jwt_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        token = JWTAuthentication().get_validated_token(header[1].encode())
+    except (InvalidToken, TokenError):
+        return None
+    return token.get(jwt_settings.USER_ID_CLAIM)
+
+
+def _phone_number(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data.get('phoneNumber') if isinstance(data, dict) else None
+    return request.POST.get('phoneNumber')
+
+
+def caller_key(request, kind):
+    if kind == 'user':
+        user_id = _user_id(request)
+        if user_id is not None:
+            return f"user:{user_id}"
+    elif kind == 'phone':
+        phone = _phone_number(request)
+        if phone:
+            return f"phone:{phone}"
+    return f"ip:{client_ip(request)}"
+
+
+# ==================== TOKEN BUCKET ====================
+
+def take(name, key, rate, burst, now=None):
+    """
+    Take one token from the bucket; returns 0 when allowed, else seconds until a token is free.
+    A bucket refills at `rate` tokens per second up to `burst`; a full bucket is simply absent.
+    """
+    cache = caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+    now = time.time() if now is None else now
+    cache_key = f"{KEY_PREFIX}:{name}:{key}"
+    tokens, updated = cache.get(cache_key) or (burst, now)
+    tokens = min(burst, tokens + (now - updated) * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate
+    cache.set(cache_key, (tokens - 1, now), math.ceil(burst / rate) + 1)
+    return 0
+
+
+def reset(name, key):
+    caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')].delete(f"{KEY_PREFIX}:{name}:{key}")
+
+
+# ==================== SHEDDING ====================
+
+def queued_ms(request, now=None):
+    """How long the request waited in the proxy's queue (X-Request-Start), or None."""
+    raw = request.META.get('HTTP_X_REQUEST_START', '')
+    try:
+        started = float(raw[2:] if raw.startswith('t=') else raw)
+    except ValueError:
+        return None
+    if started > 1e11:  # milliseconds
+        started /= 1000
+    return max(0.0, ((time.time() if now is None else now) - started) * 1000)
+
+
+def _busy(status_code, retry_after, detail, name):
+    if name == 'ussd':
+        # The gateway shows the body to the subscriber; END closes the session
+        response = HttpResponse(f"END {detail}. Please try again shortly.", status=status_code)
+    else:
+        response = JsonResponse({"detail": f"{detail}."}, status=status_code)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def check(request, in_flight):
+    """None to let the request through, else the 429/503 response."""
+    name = endpoint_class(request)
+    limit = limits().get(name)
+    if not limit:
+        return None
+
+    shed_at = limit.get('shed_at')
+    if shed_at is not None and in_flight >= shed_at:
+        logger.warning(f"Shedding {request.method} {request.path} ({name}): {in_flight} requests in flight")
+        return _busy(503, 1, "Server busy", name)
+    max_queue_ms = getattr(settings, 'RATE_LIMIT_MAX_QUEUE_MS', None)
+    if max_queue_ms is not None:
+        waited = queued_ms(request)
+        if waited is not None and waited > max_queue_ms:
+            logger.warning(f"Shedding {request.method} {request.path} ({name}): queued {waited:.0f} ms")
+            return _busy(503, 1, "Server busy", name)
+
+    wait = take(name, caller_key(request, limit.get('key', 'ip')), parse_rate(limit['rate']), limit['burst'])
+    if wait:
+        return _busy(429, wait, "Too many requests", name)
+    return None
+
+
+class RateLimitMiddleware:
+    """Just inside RequestMetricsMiddleware, so throttled and shed requests are counted."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _enter():
+        global _in_flight
+        with _in_flight_lock:
+            _in_flight += 1
+            return _in_flight - 1
+
+    @staticmethod
+    def _leave():
+        global _in_flight
+        with _in_flight_lock:
+            _in_flight -= 1
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+            return self.get_response(request)
+        try:
+            return check(request, self._enter()) or self.get_response(request)
+        finally:
+            self._leave()
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+            return await self.get_response(request)
+        try:
+            # Cache lookups block (Redis); keep them off the event loop
+            rejected = await sync_to_async(check, thread_sensitive=False)(request, self._enter())
+            return rejected or await self.get_response(request)
+        finally:
+            self._leave()
@@ -0,0 +1,245 @@
+"""
+Escrow Reconciliation Module
+Compares the local escrow ledger with on-chain contract balances.
+
+For each escrow the expected on-chain balance follows from its local status:
+funded/completed escrows should hold their full amount, every other status should
+hold nothing. Deposits and payouts are checked against the escrow amount as well.
+Mismatches are written to EscrowDiscrepancy; a discrepancy that is no longer found on
+a later run is marked resolved.
+
+Escrows are streamed in chunks ordered by (updated_at, id). After each chunk the
+position is saved in ReconciliationCheckpoint, so an incremental run only re-checks
+escrows that changed since the previous run. Payout and deposit status changes count as
+changes: the code making them calls mark_changed() in the same transaction, which bumps
+the escrow's updated_at. An incremental run also revisits escrows with an open
+discrepancy (so it can be resolved) and released escrows whose payout is still in flight
+(flagged once in flight for longer than RECONCILE_PAYOUT_GRACE_HOURS). Use full=True for
+a periodic sweep that also catches drift on chain without a local change.
+
+Run with: python manage.py reconcile_escrows
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, F, Sum, Exists, OuterRef, Subquery, DecimalField, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    EscrowContract, EscrowDiscrepancy, ReconciliationCheckpoint,
+    MpesaDeposit, PaystackDeposit,
+)
+from .money import Money
+from .stellar_integration import get_stellar_client
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'escrows'
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_WORKERS = 8
+
+HOLDING_STATUSES = ('funded', 'completed')
+DEPOSIT_REQUIRED_STATUSES = ('funded', 'completed', 'released')
+SETTLED_PAYOUT_STATUSES = ('completed',)
+IN_FLIGHT_PAYOUT_STATUSES = ('pending', 'processing')
+PAYOUT_GRACE = timedelta(hours=getattr(settings, 'RECONCILE_PAYOUT_GRACE_HOURS', 24))
+
+
+def mark_changed(escrow_ids):
+    """
+    Queue escrows for the next incremental run after their payout or deposits changed.
+    Call in the same transaction as the change.
+    """
+    EscrowContract.objects.filter(pk__in=escrow_ids).update(updated_at=timezone.now())
+
+
+# ==================== QUERIES ====================
+
+def _deposit_total(model):
+    totals = (
+        model.objects.filter(escrow_contract=OuterRef('pk'), status='completed')
+        .values('escrow_contract')
+        .annotate(total=Sum('amount'))
+        .values('total')
+    )
+    money = DecimalField(max_digits=12, decimal_places=2)
+    return Coalesce(Subquery(totals, output_field=money), Value(Decimal('0')), output_field=money)
+
+
+def _with_totals(qs, chunk_size):
+    return list(
+        qs.annotate(
+            mpesa_total=_deposit_total(MpesaDeposit),
+            paystack_total=_deposit_total(PaystackDeposit),
+            payout_amount=F('payout__amount'),
+            payout_status=F('payout__status'),
+            payout_created_at=F('payout__created_at'),
+        )
+        .values(
+            'id', 'contract_id', 'status', 'amount', 'updated_at',
+            'mpesa_total', 'paystack_total', 'payout_amount', 'payout_status', 'payout_created_at',
+        )[:chunk_size]
+    )
+
+
+def _escrow_rows(after_updated_at, after_id, chunk_size):
+    """One chunk of escrows after the (updated_at, id) position, with deposit and payout totals."""
+    qs = EscrowContract.objects.all()
+    if after_updated_at is not None:
+        qs = qs.filter(
+            Q(updated_at__gt=after_updated_at) | Q(updated_at=after_updated_at, id__gt=after_id)
+        )
+    return _with_totals(qs.order_by('updated_at', 'id'), chunk_size)
+
+
+def _revisit_rows(after_id, chunk_size):
+    """One chunk (by id) of escrows with an open discrepancy or a payout still in flight."""
+    open_discrepancy = EscrowDiscrepancy.objects.filter(escrow_contract=OuterRef('pk'), resolved_at__isnull=True)
+    qs = EscrowContract.objects.filter(
+        Q(Exists(open_discrepancy)) | Q(status='released', payout__status__in=IN_FLIGHT_PAYOUT_STATUSES),
+        id__gt=after_id,
+    )
+    return _with_totals(qs.order_by('id'), chunk_size)
+
+
+# ==================== CHECKS ====================
+
+def _stroops(amount):
+    return Money.from_decimal(amount or 0).to_stroops()
+
+
+def expected_balance(row):
+    """Stroops the contract should hold for this local status."""
+    return _stroops(row['amount']) if row['status'] in HOLDING_STATUSES else 0
+
+
+def find_discrepancies(row, onchain, now=None):
+    """
+    Discrepancies for one escrow row as {kind: (expected_stroops, onchain_stroops, details)}.
+    onchain is None when the balance could not be read; the balance check is then skipped.
+    """
+    found = {}
+    expected = expected_balance(row)
+    if onchain is not None and onchain != expected:
+        found['balance_mismatch'] = (
+            expected, onchain, f"Contract holds {onchain} stroops, ledger expects {expected}"
+        )
+    deposited = (row['mpesa_total'] or 0) + (row['paystack_total'] or 0)
+    if row['status'] in DEPOSIT_REQUIRED_STATUSES and deposited < row['amount']:
+        found['deposit_shortfall'] = (
+            _stroops(row['amount']), onchain, f"Deposits {deposited} below escrow amount {row['amount']}"
+        )
+    if row['status'] == 'released':
+        in_flight = (row['payout_status'] in IN_FLIGHT_PAYOUT_STATUSES
+                     and row['payout_created_at'] > (now or timezone.now()) - PAYOUT_GRACE)
+        if in_flight:
+            pass  # revisited on every run until it settles or fails
+        elif row['payout_status'] not in SETTLED_PAYOUT_STATUSES:
+            found['payout_mismatch'] = (
+                _stroops(row['amount']), onchain, f"Released but payout is {row['payout_status'] or 'missing'}"
+            )
+        elif row['payout_amount'] != row['amount']:
+            found['payout_mismatch'] = (
+                _stroops(row['amount']), onchain, f"Payout {row['payout_amount']} differs from escrow amount {row['amount']}"
+            )
+    return found
+
+
+def _record(rows, balances, stats):
+    """Upsert open discrepancies for a chunk and resolve those no longer found."""
+    now = timezone.now()
+    open_by_escrow = defaultdict(dict)
+    for d in EscrowDiscrepancy.objects.filter(escrow_contract_id__in=[row['id'] for row in rows],
+                                              resolved_at__isnull=True):
+        open_by_escrow[d.escrow_contract_id][d.kind] = d
+    to_create, to_update, to_resolve = [], [], []
+    for row in rows:
+        onchain = balances.get(row['contract_id'])
+        if onchain is None:
+            stats['unverified'] += 1
+        open_kinds = open_by_escrow.pop(row['id'], {})
+        for kind, (expected, onchain_value, details) in find_discrepancies(row, onchain, now).items():
+            existing = open_kinds.pop(kind, None)
+            if existing:
+                existing.local_status = row['status']
+                existing.expected_stroops = expected
+                existing.onchain_stroops = onchain_value
+                existing.details = details
+                existing.last_seen_at = now
+                to_update.append(existing)
+            else:
+                to_create.append(EscrowDiscrepancy(
+                    escrow_contract_id=row['id'], kind=kind, local_status=row['status'],
+                    expected_stroops=expected, onchain_stroops=onchain_value,
+                    details=details, last_seen_at=now,
+                ))
+        # Open discrepancies not found again are resolved, except a balance mismatch
+        # we could not re-check this time
+        for kind, discrepancy in open_kinds.items():
+            if kind == 'balance_mismatch' and onchain is None:
+                continue
+            to_resolve.append(discrepancy.pk)
+    EscrowDiscrepancy.objects.bulk_create(to_create)
+    EscrowDiscrepancy.objects.bulk_update(
+        to_update, ['local_status', 'expected_stroops', 'onchain_stroops', 'details', 'last_seen_at']
+    )
+    if to_resolve:
+        EscrowDiscrepancy.objects.filter(pk__in=to_resolve).update(resolved_at=now)
+    stats['opened'] += len(to_create)
+    stats['still_open'] += len(to_update)
+    stats['resolved'] += len(to_resolve)
+
+
+# ==================== RUN ====================
+
+def reconcile(full=False, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=DEFAULT_WORKERS,
+              stellar_client=None, checkpoint_name=CHECKPOINT_NAME):
+    """
+    Reconcile escrows changed since the checkpoint (all escrows if full=True), then
+    revisit open discrepancies and in-flight payouts the incremental pass did not reach.
+    Balances of each chunk are fetched concurrently with at most max_workers in flight.
+    Returns counts: checked, unverified, opened, still_open, resolved.
+    """
+    client = stellar_client or get_stellar_client()
+    checkpoint, _ = ReconciliationCheckpoint.objects.get_or_create(name=checkpoint_name)
+    after_updated_at, after_id = (None, 0) if full else (checkpoint.last_updated_at, checkpoint.last_id)
+    stats = {'checked': 0, 'unverified': 0, 'opened': 0, 'still_open': 0, 'resolved': 0}
+    checked = set()
+    while True:
+        rows = _escrow_rows(after_updated_at, after_id, chunk_size)
+        if not rows:
+            break
+        balances = client.get_balances([row['contract_id'] for row in rows], max_workers=max_workers)
+        with transaction.atomic():
+            _record(rows, balances, stats)
+            after_updated_at, after_id = rows[-1]['updated_at'], rows[-1]['id']
+            checkpoint.last_updated_at, checkpoint.last_id = after_updated_at, after_id
+            checkpoint.save(update_fields=['last_updated_at', 'last_id', 'updated_at'])
+        stats['checked'] += len(rows)
+        if not full:
+            checked.update(row['id'] for row in rows)
+        logger.info(f"Reconciled {stats['checked']} escrow(s) up to #{after_id}")
+        if len(rows) < chunk_size:
+            break
+    if full:
+        return stats
+
+    after_id = 0
+    while True:
+        rows = _revisit_rows(after_id, chunk_size)
+        if not rows:
+            break
+        after_id = rows[-1]['id']
+        pending = [row for row in rows if row['id'] not in checked]
+        if pending:
+            balances = client.get_balances([row['contract_id'] for row in pending], max_workers=max_workers)
+            with transaction.atomic():
+                _record(pending, balances, stats)
+            stats['checked'] += len(pending)
+        if len(rows) < chunk_size:
+            break
+    return stats
@@ -0,0 +1,106 @@
+"""
+JSON Renderer Module
+Fast JSON rendering and parsing for the API (REST_FRAMEWORK in settings.py).
+
+Uses orjson when it is installed and falls back to the stdlib json module otherwise;
+both produce the same bytes. Views can return datetime, Decimal and UUID values as they
+come from the database and the renderer encodes them in the same pass as the rest of the
+payload:
+
+- datetime: isoformat() ("2026-03-02T10:00:00+00:00")
+- Decimal: str() ("2500.00"), never a float, so amounts keep their exact digits
+- UUID: str()
+
+Anything else not JSON-native (lazy translation strings, querysets, timedelta...) goes
+through DRF's JSONEncoder, as with the default renderer. Output is compact UTF-8 like
+DRF's defaults (COMPACT_JSON, UNICODE_JSON). Requests asking for an indented response
+(the browsable API, "Accept: application/json; indent=4") use the stdlib path.
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
+
+_drf_encoder = JSONEncoder()
+
+
+_ENCODERS = {
+    decimal.Decimal: str,
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    uuid.UUID: str,
+}
+
+
+def _default(obj):
+    encode = _ENCODERS.get(type(obj))  # exact type first: one dict lookup per value on the hot path
+    if encode is not None:
+        return encode(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    return _drf_encoder.default(obj)
+
+
+class _FallbackEncoder(json.JSONEncoder):
+    def default(self, obj):
+        return _default(obj)
+
+
+def dumps(data, indent=None):
+    """Encode to UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None and indent is None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        data, cls=_FallbackEncoder, indent=indent, ensure_ascii=False, allow_nan=False,
+        separators=(',', ':') if indent is None else None,
+    ).encode('utf-8')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer with orjson and native datetime/Decimal/UUID encoding."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        ret = dumps(data, indent=indent)
+        # Same escaping as DRF: U+2028/U+2029 are valid JSON but break JavaScript string literals
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser using orjson. Rejects NaN/Infinity like DRF's strict mode."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            body = stream.read() if stream is not None else b''
+            if orjson is None:
+                parser_context = parser_context or {}
+                encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+                return json.loads(body.decode(encoding), parse_constant=_reject_constant)
+            return orjson.loads(body)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+def _reject_constant(name):
+    raise ValueError(f"Out of range float values are not permitted: {name}")
@@ -0,0 +1,118 @@
+"""
+Retry Queue Module
+Deferred upstream work (Stellar create/fund/release, Intersend sends) that could not run
+because a circuit breaker was open or the upstream call failed.
+
+Callers enqueue an operation with a key naming the logical operation (e.g.
+"stellar.fund:42"), so repeated deferrals of the same work share one row. Handlers are
+registered with @handler(operation) and must be idempotent: they return True when the
+work is done (or no longer needed) and False to be retried later with backoff. A
+CircuitOpenError reschedules the operation for when the breaker will probe again.
+
+Run the worker with: python manage.py process_retries --loop
+"""
+import logging
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import DeferredOperation
+from .circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAYS = [10, 30, 60, 300, 900]  # seconds, by attempts made
+MAX_ATTEMPTS = 20
+CLAIM_SECONDS = 300  # a claimed operation is retried if its worker dies
+
+HANDLERS = {}
+
+
+def handler(operation):
+    """Register the function that performs a deferred operation: fn(payload) -> bool."""
+    def register(fn):
+        HANDLERS[operation] = fn
+        return fn
+    return register
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=RETRY_DELAYS[min(attempts, len(RETRY_DELAYS) - 1)])
+
+
+def enqueue(operation, key, payload, delay=0):
+    """Queue an operation (or re-arm the existing one for this key). Returns the DeferredOperation."""
+    run_at = timezone.now() + timedelta(seconds=delay)
+    try:
+        with transaction.atomic():
+            op = DeferredOperation.objects.create(
+                operation=operation, key=key, payload=payload, next_attempt_at=run_at
+            )
+    except IntegrityError:
+        op = DeferredOperation.objects.get(key=key)
+        if op.status != 'pending':
+            DeferredOperation.objects.filter(pk=op.pk).update(
+                status='pending', payload=payload, attempts=0, next_attempt_at=run_at, completed_at=None
+            )
+            op.refresh_from_db()
+    logger.info(f"Deferred {operation} ({key})")
+    return op
+
+
+# ==================== WORKER ====================
+
+def run_operation(op_pk):
+    """Claim and run one due operation. Returns its resulting status, or None if not claimable."""
+    now = timezone.now()
+    claimed = DeferredOperation.objects.filter(
+        pk=op_pk, status='pending', next_attempt_at__lte=now
+    ).update(attempts=F('attempts') + 1, next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS))
+    if not claimed:
+        return None
+    op = DeferredOperation.objects.get(pk=op_pk)
+    try:
+        done = HANDLERS[op.operation](op.payload)
+        error = '' if done else 'Upstream call failed'
+        retry_at = timezone.now() + retry_delay(op.attempts - 1)
+    except CircuitOpenError as e:
+        done, error = False, str(e)
+        retry_at = timezone.now() + timedelta(seconds=max(e.retry_after, 1))
+    except Exception as e:
+        logger.error(f"Deferred {op.operation} ({op.key}) error: {str(e)}")
+        done, error = False, str(e)
+        retry_at = timezone.now() + retry_delay(op.attempts - 1)
+    if done:
+        fields = {'status': 'done', 'completed_at': timezone.now(), 'last_error': ''}
+    elif op.attempts >= MAX_ATTEMPTS:
+        logger.error(f"Deferred {op.operation} ({op.key}) gave up after {op.attempts} attempts: {error}")
+        fields = {'status': 'failed', 'last_error': error}
+    else:
+        fields = {'next_attempt_at': retry_at, 'last_error': error}
+    DeferredOperation.objects.filter(pk=op.pk, status='pending').update(**fields)
+    return fields.get('status', 'pending')
+
+
+def process_due(batch_size=100):
+    """Run up to batch_size due operations, oldest first. Returns counts per resulting status."""
+    pks = list(
+        DeferredOperation.objects.filter(status='pending', next_attempt_at__lte=timezone.now())
+        .order_by('next_attempt_at', 'id')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    counts = {'done': 0, 'pending': 0, 'failed': 0}
+    for pk in pks:
+        result = run_operation(pk)
+        if result is not None:
+            counts[result] += 1
+    return counts
+
+
+def queue_stats():
+    pending = DeferredOperation.objects.filter(status='pending')
+    oldest = pending.aggregate(oldest=Min('created_at'))['oldest']
+    return {
+        "pending": pending.count(),
+        "failed": DeferredOperation.objects.filter(status='failed').count(),
+        "oldest_pending_at": oldest.isoformat() if oldest else None,
+    }
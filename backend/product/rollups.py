@@ -0,0 +1,103 @@
+"""
+Dashboard Rollups Module
+Per-user totals behind /api/employer/summary/ and /api/employee/summary/.
+
+Each user has one UserRollup row: job counts by status, workers hired, money held in
+escrow, released and (for workers) paid out. Transitions that change any of these call
+mark_stale() for the affected employers and workers inside their transaction; the next
+summary request recomputes the row with a few aggregate queries and serves it from the
+table until the next change.
+
+Every mark_stale() bumps the row's version and a recompute is only saved if the version
+is unchanged, so a recompute that raced a transition cannot overwrite the stale flag
+with totals from before it.
+
+The platform-wide open job count on the worker dashboard is the same for everyone, so
+it is cached for OPEN_JOBS_TIMEOUT seconds instead of counted on every load.
+"""
+import logging
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import JobListing, EscrowContract, MobileMoneyPayout, UserRollup
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ('open', 'assigned', 'in_progress', 'completed', 'cancelled')
+HELD_ESCROW_STATUSES = ('funded', 'completed')  # deposited, not yet released
+CENTS = Decimal('0.01')
+OPEN_JOBS_KEY = 'rollups:open_jobs'
+OPEN_JOBS_TIMEOUT = 60
+
+
+def mark_stale(user_ids=(), job_ids=()):
+    """Flag the rollups of these users, and of the employers/workers on these jobs, for recompute."""
+    users = Q(user_id__in=[pk for pk in user_ids if pk])
+    if job_ids:
+        jobs = JobListing.objects.filter(pk__in=list(job_ids))
+        users |= Q(user_id__in=jobs.values('employer_id')) | Q(user_id__in=jobs.exclude(employee=None).values('employee_id'))
+    UserRollup.objects.filter(users).update(stale=True, version=F('version') + 1)
+
+
+def mark_stale_for_escrows(escrow_ids):
+    mark_stale(job_ids=EscrowContract.objects.filter(pk__in=list(escrow_ids)).values_list('job_listing_id', flat=True))
+
+
+# ==================== RECOMPUTE ====================
+
+def _job_counts(jobs):
+    counts = dict.fromkeys(JOB_STATUSES, 0)
+    for row in jobs.values('status').annotate(n=Count('id')):
+        counts[row['status']] = row['n']
+    return counts
+
+
+def compute(user):
+    """Totals for a user, straight from the ledger tables."""
+    hired = 0
+    if user.user_type == 'employer':
+        jobs = JobListing.objects.filter(employer=user)
+        counts = _job_counts(jobs)
+        # Distinct workers: someone hired for three jobs counts once
+        hired = jobs.aggregate(n=Count('employee', distinct=True))['n']
+        escrows = EscrowContract.objects.filter(employer=user)
+        earned = Decimal('0')
+    else:
+        counts = _job_counts(JobListing.objects.filter(employee=user))
+        escrows = EscrowContract.objects.filter(job_listing__employee=user)
+        earned = MobileMoneyPayout.objects.filter(employee=user, status='completed').aggregate(
+            total=Sum('amount')
+        )['total'] or Decimal('0')
+    totals = escrows.aggregate(
+        escrowed=Sum('amount', filter=Q(status__in=HELD_ESCROW_STATUSES)),
+        released=Sum('amount', filter=Q(status='released')),
+    )
+    return {
+        'job_counts': counts,
+        'workers_hired': hired,
+        'total_escrowed': (totals['escrowed'] or Decimal('0')).quantize(CENTS),
+        'total_released': (totals['released'] or Decimal('0')).quantize(CENTS),
+        'total_earned': earned.quantize(CENTS),
+    }
+
+
+def get_rollup(user):
+    """The user's rollup, recomputed first if a transition marked it stale."""
+    rollup, _ = UserRollup.objects.get_or_create(user=user)
+    if not rollup.stale:
+        return rollup
+    version = rollup.version
+    values = compute(user)
+    now = timezone.now()
+    UserRollup.objects.filter(pk=rollup.pk, version=version).update(stale=False, refreshed_at=now, **values)
+    for field, value in values.items():
+        setattr(rollup, field, value)
+    rollup.refreshed_at = now
+    return rollup
+
+
+def open_jobs_count():
+    """Open listings on the platform, counted at most once per OPEN_JOBS_TIMEOUT."""
+    return cache.get_or_set(OPEN_JOBS_KEY, lambda: JobListing.objects.filter(status='open').count(), OPEN_JOBS_TIMEOUT)
@@ -0,0 +1,278 @@
+"""
+Seeding Module
+Synthetic employers, workers, jobs, applications, messages, escrows, deposits and payouts
+for benchmarks and load tests, up to millions of rows (python manage.py seed_scale).
+
+Rows are written with bulk_create, one chunk of jobs (and everything hanging off them) per
+transaction, using one precomputed password hash (every seeded user's password is
+SEED_PASSWORD). Only user ids are kept between chunks, so memory stays flat however many
+jobs are generated. All choices come from one random.Random(seed): the same scale, shape
+and seed always produce the same dataset. bulk_create skips post_save signals, so the
+matching index is written here too.
+
+Shape (Shape dataclass) controls the distributions:
+- applicants per job are Pareto-distributed around the applications/jobs mean: most jobs
+  get a handful, a few popular ones get hundreds;
+- a few employers post most jobs (employer_skew);
+- messages arrive in bursts (a geometric number of messages seconds apart, bursts hours apart);
+- timestamps spread over the last `days` days, following the job lifecycle.
+
+Job states follow the lifecycle: open jobs may have a pending escrow; assigned jobs have
+an accepted applicant and a funded escrow; completed jobs have a released escrow and, when
+deposited, a completed payout.
+"""
+import logging
+import random
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import matching
+from .models import (
+    CustomUser, JobListing, JobListingTerm, JobApplication, JobMessage, EscrowContract,
+    MpesaDeposit, MobileMoneyPayout,
+)
+
+logger = logging.getLogger(__name__)
+
+SEED_PASSWORD = 'pass1234'
+CHUNK_SIZE = 2000
+
+DEFAULT_SCALE = {
+    'employers': 50,
+    'workers': 200,
+    'jobs': 1000,
+    'applications': 3000,
+    'messages': 2000,
+    'deposits': 500,
+}
+
+TRADES = ['plumbing', 'painting', 'carpentry', 'electrical', 'cleaning', 'gardening', 'masonry', 'roofing',
+          'tiling', 'welding', 'moving', 'delivery', 'tailoring', 'catering', 'security', 'laundry']
+PLACES = ['Nairobi', 'Kisumu', 'Mombasa', 'Nakuru', 'Eldoret', 'Thika', 'Machakos', 'Nyeri']
+WORDS = ['house', 'office', 'shop', 'school', 'fence', 'kitchen', 'roof', 'garden', 'gate', 'compound',
+         'apartment', 'church', 'clinic', 'warehouse', 'hotel', 'market']
+MESSAGES = ['I am on my way', 'Where exactly is the site?', 'Work is done, please check', 'Can we start tomorrow?',
+            'Please bring your own tools', 'Payment is in escrow', 'Running 20 minutes late', 'Thank you!']
+FIRST_NAMES = ['Amina', 'Brian', 'Wanjiru', 'Otieno', 'Fatuma', 'Kiprop', 'Achieng', 'Mwangi', 'Njeri', 'Baraka']
+LAST_NAMES = ['Kamau', 'Odhiambo', 'Mutua', 'Chebet', 'Wekesa', 'Njoroge', 'Akinyi', 'Kariuki', 'Mohamed', 'Ruto']
+
+
+@dataclass
+class Shape:
+    """Distributions of a seeded dataset."""
+    open_share: float = 0.5          # share of jobs still open
+    assigned_share: float = 0.2      # share assigned / in progress; the rest are completed
+    open_escrow_share: float = 0.3   # open jobs that already have a (pending) escrow
+    applicant_skew: float = 1.5      # Pareto alpha for applicants per job; lower = more skewed
+    employer_skew: float = 2.0       # 1 = uniform; higher = a few employers post most jobs
+    message_burst: float = 5.0       # mean messages per burst
+    days: int = 365                  # timestamps spread over this many days
+
+
+# ==================== HELPERS ====================
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the created_at/updated_at values we set (auto_now/auto_now_add off)."""
+    saved = []
+    for model in models:
+        for f in model._meta.concrete_fields:
+            if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False):
+                saved.append((f, f.auto_now, f.auto_now_add))
+                f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _quota(total, start, end, size):
+    """Share of `total` for items [start, end) of `size`, so per-chunk quotas add up exactly."""
+    return total * end // size - total * start // size if size else 0
+
+
+def _skewed_index(rng, n, skew):
+    return min(n - 1, int(n * rng.random() ** skew))
+
+
+def _applicant_count(rng, mean, alpha):
+    """Pareto-distributed count with the given mean (alpha > 1)."""
+    return int((rng.paretovariate(alpha) - 1) * (alpha - 1) * mean + 0.5)
+
+
+def _phone(n):
+    return f"+2547{n:08d}"
+
+
+def _create_users(rng, count, user_type, offset, password, now, days, chunk_size):
+    ids = []
+    for start in range(0, count, chunk_size):
+        users = [
+            CustomUser(
+                email=f"seed{offset + i}@kazi.test", phone_number=_phone(offset + i), password=password,
+                first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES), user_type=user_type,
+                stellar_account_id=f"G{offset + i:055d}", created_at=now - timedelta(days=days + rng.randrange(30)),
+            )
+            for i in range(start, min(start + chunk_size, count))
+        ]
+        with transaction.atomic():
+            ids += [u.pk for u in CustomUser.objects.bulk_create(users)]
+    return ids
+
+
+# ==================== SEEDING ====================
+
+def seed(scale=None, seed=0, chunk_size=CHUNK_SIZE, shape=None, progress=None):
+    """
+    Create a dataset of the given scale (keys of DEFAULT_SCALE). 'applications' is a mean
+    (applicants are drawn per job); the other counts are exact. Returns the row counts written.
+    progress(counts) is called after each chunk of jobs.
+    """
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    shape = shape or Shape()
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(SEED_PASSWORD)
+    offset = (CustomUser.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+    tag = f"S{seed}_{offset}"
+    n_jobs, span = scale['jobs'], shape.days * 24 * 3600
+    counts = dict.fromkeys(
+        ['employers', 'workers', 'jobs', 'applications', 'messages', 'escrows', 'deposits', 'payouts'], 0
+    )
+
+    with explicit_timestamps(CustomUser, JobListing, JobApplication, JobMessage, EscrowContract,
+                             MpesaDeposit, MobileMoneyPayout):
+        employer_ids = _create_users(rng, scale['employers'], 'employer', offset, password, now, shape.days, chunk_size)
+        worker_offset = offset + scale['employers']
+        worker_ids = _create_users(rng, scale['workers'], 'employee', worker_offset, password, now, shape.days, chunk_size)
+        counts['employers'], counts['workers'] = len(employer_ids), len(worker_ids)
+        if not employer_ids:
+            return counts
+        employer_index = {pk: k for k, pk in enumerate(employer_ids)}
+        worker_index = {pk: k for k, pk in enumerate(worker_ids)}
+        mean_applicants = scale['applications'] / n_jobs if n_jobs else 0
+
+        for start in range(0, n_jobs, chunk_size):
+            end = min(start + chunk_size, n_jobs)
+            with transaction.atomic():
+                _seed_chunk(
+                    rng, shape, tag, now, span, start, end, employer_ids, worker_ids, mean_applicants,
+                    _quota(scale['messages'], start, end, n_jobs), _quota(scale['deposits'], start, end, n_jobs),
+                    counts,
+                    employer_phone=lambda pk: _phone(offset + employer_index[pk]),
+                    worker_phone=lambda pk: _phone(worker_offset + worker_index[pk]),
+                )
+            if progress:
+                progress(dict(counts))
+    matching.bump_listings_version()
+    logger.info(f"Seeded {counts}")
+    return counts
+
+
+def _seed_chunk(rng, shape, tag, now, span, start, end, employer_ids, worker_ids, mean_applicants,
+                message_quota, deposit_quota, counts, employer_phone, worker_phone):
+    jobs = []
+    for i in range(start, end):
+        roll = rng.random()
+        state = 'open' if roll < shape.open_share or not worker_ids else (
+            'assigned' if roll < shape.open_share + shape.assigned_share else 'completed'
+        )
+        trade = rng.choice(TRADES)
+        created = now - timedelta(seconds=rng.randrange(span))
+        job = JobListing(
+            employer_id=employer_ids[_skewed_index(rng, len(employer_ids), shape.employer_skew)],
+            title=f"{trade.title()} at {rng.choice(WORDS)} in {rng.choice(PLACES)}",
+            description=f"Need {trade} for a {rng.choice(WORDS)}. {rng.choice(WORDS).title()} access provided.",
+            budget=Decimal(rng.randrange(500, 50000, 50)), status=state, created_at=created, updated_at=created,
+            escrow_contract_id=f"ESCROW_{tag}_{i}" if state != 'open' or rng.random() < shape.open_escrow_share else None,
+        )
+        if state != 'open':
+            job.employee_id = rng.choice(worker_ids)
+            job.assigned_at = min(now, created + timedelta(hours=rng.randrange(1, 72)))
+            job.updated_at = job.assigned_at
+        if state == 'completed':
+            job.completed_at = min(now, job.assigned_at + timedelta(days=rng.randrange(1, 14)))
+            job.updated_at = job.completed_at
+            job.work_summary = f"Completed {trade} work"
+        jobs.append(job)
+    jobs = JobListing.objects.bulk_create(jobs)
+    counts['jobs'] += len(jobs)
+
+    JobListingTerm.objects.bulk_create([
+        JobListingTerm(job_listing_id=job.id, term=term, weight=weight)
+        for job in jobs if job.status == 'open'
+        for term, weight in matching.listing_terms(job.title, job.description).items()
+    ])
+
+    escrow_status = {'open': 'pending_deposit', 'assigned': 'funded', 'completed': 'released'}
+    escrows = EscrowContract.objects.bulk_create([
+        EscrowContract(
+            job_listing_id=job.id, contract_id=job.escrow_contract_id, employer_id=job.employer_id,
+            employee_id=job.employee_id, amount=job.budget, status=escrow_status[job.status],
+            funded_at=job.assigned_at, released_at=job.completed_at,
+            created_at=job.created_at, updated_at=job.updated_at,
+        )
+        for job in jobs if job.escrow_contract_id
+    ])
+    counts['escrows'] += len(escrows)
+
+    applications = []
+    for job in jobs:
+        wanted = min(len(worker_ids), _applicant_count(rng, mean_applicants, shape.applicant_skew)) if worker_ids else 0
+        applicants = {worker_ids[k] for k in rng.sample(range(len(worker_ids)), wanted)} if wanted else set()
+        applicants.discard(job.employee_id)
+        window = ((job.assigned_at or now) - job.created_at).total_seconds()
+        for worker_id in sorted(applicants):
+            applications.append(JobApplication(
+                job_listing_id=job.id, employee_id=worker_id,
+                status='rejected' if job.employee_id else 'pending',
+                created_at=job.created_at + timedelta(seconds=rng.random() * window),
+            ))
+        if job.employee_id:
+            applications.append(JobApplication(
+                job_listing_id=job.id, employee_id=job.employee_id, status='accepted', created_at=job.created_at,
+            ))
+    JobApplication.objects.bulk_create(applications)
+    counts['applications'] += len(applications)
+
+    engaged = [job for job in jobs if job.employee_id]
+    messages = []
+    while engaged and len(messages) < message_quota:
+        job = engaged[_skewed_index(rng, len(engaged), 2.0)]
+        moment = job.assigned_at + timedelta(seconds=rng.randrange(3 * 24 * 3600))
+        burst = 1 + int(rng.expovariate(1 / max(shape.message_burst - 1, 1e-9))) if shape.message_burst > 1 else 1
+        for _ in range(min(burst, message_quota - len(messages))):
+            moment += timedelta(seconds=rng.randrange(5, 120))
+            messages.append(JobMessage(
+                job_listing_id=job.id, sender_id=rng.choice((job.employer_id, job.employee_id)),
+                text=rng.choice(MESSAGES), created_at=moment,
+            ))
+    JobMessage.objects.bulk_create(messages)
+    counts['messages'] += len(messages)
+
+    funded = [e for e in escrows if e.status != 'pending_deposit']
+    funded = rng.sample(funded, min(deposit_quota, len(funded)))
+    MpesaDeposit.objects.bulk_create([
+        MpesaDeposit(
+            escrow_contract_id=escrow.pk, transaction_reference=f"MP_{escrow.contract_id}",
+            phone_number=employer_phone(escrow.employer_id), amount=escrow.amount, status='completed',
+            mpesa_receipt=f"R{escrow.pk:09d}", created_at=escrow.funded_at, completed_at=escrow.funded_at,
+        )
+        for escrow in funded
+    ])
+    counts['deposits'] += len(funded)
+    payouts = MobileMoneyPayout.objects.bulk_create([
+        MobileMoneyPayout(
+            escrow_contract_id=escrow.pk, employee_id=escrow.employee_id, phone_number=worker_phone(escrow.employee_id),
+            amount=escrow.amount, transaction_reference=f"PO_{escrow.contract_id}", status='completed',
+            created_at=escrow.released_at, submitted_at=escrow.released_at, completed_at=escrow.released_at,
+        )
+        for escrow in funded if escrow.status == 'released'
+    ])
+    counts['payouts'] += len(payouts)
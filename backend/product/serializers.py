@@ -2,6 +2,27 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from .models import CustomUser as User, JobListing, EscrowContract, JobApplication
+from .money import Money, MoneyError, DEFAULT_CURRENCY
+
+
+class MoneyField(serializers.DecimalField):
+    """Amount parsed and rendered through Money; same wire format as DecimalField ("2500.00")."""
+
+    def __init__(self, currency=DEFAULT_CURRENCY, **kwargs):
+        kwargs.setdefault('max_digits', 10)
+        kwargs.setdefault('decimal_places', 2)
+        self.currency = currency
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            value = Money.parse(data, self.currency).amount
+        except MoneyError:
+            self.fail('invalid')
+        return super().to_internal_value(value)
+
+    def to_representation(self, value):
+        return str(Money.from_decimal(value, self.currency))
 
 class EmailPasswordLoginSerializer(serializers.Serializer):
     email = serializers.EmailField(required=False)
@@ -63,6 +84,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 class JobListingSerializer(serializers.ModelSerializer):
+    budget = MoneyField()
     employer_name = serializers.CharField(source='employer.get_full_name', read_only=True)
     employee_name = serializers.SerializerMethodField()
     employee_phone = serializers.SerializerMethodField()
@@ -92,12 +114,15 @@ class JobApplicationSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at')
 
 class JobListingCreateSerializer(serializers.ModelSerializer):
+    budget = MoneyField()
+
     class Meta:
         model = JobListing
         fields = ('title', 'description', 'budget')
 
 class EscrowContractSerializer(serializers.ModelSerializer):
     job_listing_title = serializers.CharField(source='job_listing.title', read_only=True)
+    amount = MoneyField()
     
     class Meta:
         model = EscrowContract
@@ -0,0 +1,34 @@
+"""
+Model signal handlers.
+Keeps derived data (job matching index, cached escrow status, dashboard rollups) in step with JobListing writes.
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import JobListing
+from . import matching, escrow_cache, rollups
+
+
+@receiver(post_save, sender=JobListing)
+def update_job_listing_index(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Index new open listings, reindex re-opened or edited ones (cached rankings are dropped),
+    and drop listings from the index once they leave 'open'.
+    """
+    if update_fields is not None and not {'status', 'title', 'description'} & set(update_fields):
+        return
+    if created:
+        matching.index_job_listing(instance)
+        matching.bump_listings_version()
+    elif instance.status != 'open':
+        matching.unindex_job_listing(instance.id)
+    elif matching.reindex_job_listing(instance):
+        matching.bump_listings_version()
+
+
+@receiver(post_save, sender=JobListing)
+def invalidate_escrow_status(sender, instance, created, **kwargs):
+    """Job title, status and assignment are part of the cached escrow status and dashboard totals."""
+    if not created:
+        escrow_cache.invalidate(instance.pk)
+    rollups.mark_stale(user_ids=[instance.employer_id, instance.employee_id])
@@ -7,12 +7,20 @@ Supports two backends:
    Set STELLAR_USE_PYTHON_CLIENT = True and optionally STELLAR_ESCROW_CONTRACT_ID,
    STELLAR_ESCROW_ADMIN_SECRET, STELLAR_SOROBAN_RPC_URL.
 2. HTTP microservice: set STELLAR_CONTRACT_SERVICE_URL (and STELLAR_CONTRACT_API_KEY).
+
+Every call goes through a per-endpoint circuit breaker (circuit_breaker.py). Create, fund
+and release raise CircuitOpenError while their breaker is open so callers can defer them.
 """
-import requests
+import asyncio
 import logging
-from typing import Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Iterable, List, Tuple
 from django.conf import settings
 
+from .money import Money
+from . import circuit_breaker
+from .circuit_breaker import CircuitOpenError
+
 logger = logging.getLogger(__name__)
 
 # Use Python escrow client when True and stellar_escrow package is available
@@ -36,7 +44,7 @@ def _get_python_client():
         try:
             import sys
             from pathlib import Path
-            root = Path(__file__).resolve().parent.parent.parent.parent
+            root = Path(__file__).resolve().parent.parent.parent
             if root.exists():
                 sys.path.insert(0, str(root))
             from stellar_escrow.python_client import EscrowClient
@@ -60,7 +68,7 @@ class StellarEscrowClient:
     def create_escrow_contract(
         self, 
         employer_account: str,
-        amount: float,
+        amount: Money,
         asset_code: str = 'XLM',
         job_id: str = None
     ) -> Optional[Dict]:
@@ -69,22 +77,25 @@ class StellarEscrowClient:
         
         Args:
             employer_account: Stellar account ID of the employer
-            amount: Amount to escrow
+            amount: Amount to escrow (Money; Decimal/str accepted)
             asset_code: Asset code (default: XLM)
             job_id: Optional job ID for reference
             
         Returns:
             Dict with contract_id and other details, or None if failed
         """
+        amount = Money.parse(amount)
         if self._python_client:
             import uuid
             escrow_id = f"ESCROW_J{job_id}" if job_id else f"ESCROW_{uuid.uuid4().hex[:16].upper()}"
-            data = self._python_client.create_escrow(
+            data = circuit_breaker.get_breaker('stellar:create').call(
+                self._python_client.create_escrow,
                 escrow_id=escrow_id,
                 employer_account=employer_account,
-                amount=float(amount),
+                amount=amount.amount,
                 asset_code=asset_code,
                 job_id=job_id,
+                is_failure=lambda result: not result,
             )
             if data:
                 data["contract_id"] = data.get("contract_id") or escrow_id
@@ -96,7 +107,8 @@ class StellarEscrowClient:
                 'asset_code': asset_code,
                 'job_id': job_id
             }
-            response = requests.post(
+            response = circuit_breaker.request(
+                'stellar:create', 'POST',
                 f'{self.service_url}/api/escrow/create',
                 json=payload,
                 headers=self.headers,
@@ -108,14 +120,65 @@ class StellarEscrowClient:
                 return data
             logger.error(f"Failed to create escrow: {response.status_code} - {response.text}")
             return None
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error creating escrow contract: {str(e)}")
             return None
     
+    def create_escrow_contracts(self, creates: List[Tuple[str, str, Money, str]],
+                                asset_code: str = 'XLM') -> Dict[str, Optional[Dict]]:
+        """
+        Create many escrows in one batch: [(escrow_id, employer_account, amount, job_id)].
+        escrow_id is the local contract id; the service may return a different contract_id.
+
+        Returns:
+            {escrow_id: dict with contract_id, or None if that create failed}
+        """
+        creates = [(eid, account, Money.parse(amount), job_id) for eid, account, amount, job_id in creates]
+        if not creates:
+            return {}
+        if self._python_client:
+            return circuit_breaker.get_breaker('stellar:create').call(
+                self._python_client.create_escrows,
+                [(eid, account, amount.amount) for eid, account, amount, _ in creates],
+                is_failure=lambda results: not any(results.values()),
+            )
+        try:
+            payload = {'asset_code': asset_code, 'escrows': [
+                {'reference': eid, 'employer_account': account, 'amount': str(amount), 'job_id': job_id}
+                for eid, account, amount, job_id in creates
+            ]}
+            response = circuit_breaker.request(
+                'stellar:create', 'POST',
+                f'{self.service_url}/api/escrow/create/batch',
+                json=payload,
+                headers=self.headers,
+                timeout=60
+            )
+            if response.status_code == 200:
+                results = {item.get('reference'): item for item in response.json().get('results', [])
+                           if item.get('contract_id')}
+                logger.info(f"Batch create: {len(results)}/{len(creates)} escrow(s) created")
+                return {eid: results.get(eid) for eid, _, _, _ in creates}
+            if response.status_code not in (404, 405):
+                logger.error(f"Failed to batch create escrows: {response.status_code} - {response.text}")
+                return {eid: None for eid, _, _, _ in creates}
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Error batch creating escrow contracts: {str(e)}")
+            return {eid: None for eid, _, _, _ in creates}
+        # Contract service without the batch endpoint: create one by one
+        return {
+            eid: self.create_escrow_contract(account, amount, asset_code, job_id)
+            for eid, account, amount, job_id in creates
+        }
+
     def fund_escrow_contract(
         self,
         contract_id: str,
-        amount: float,
+        amount: Money,
         transaction_hash: str = None
     ) -> bool:
         """
@@ -123,21 +186,26 @@ class StellarEscrowClient:
         
         Args:
             contract_id: Stellar contract ID
-            amount: Amount being funded
+            amount: Amount being funded (Money; Decimal/str accepted)
             transaction_hash: Optional transaction hash from deposit
             
         Returns:
             True if successful, False otherwise
         """
+        amount = Money.parse(amount)
         if self._python_client:
-            return self._python_client.fund_escrow(contract_id, float(amount), transaction_hash)
+            return circuit_breaker.get_breaker('stellar:fund').call(
+                self._python_client.fund_escrow, contract_id, amount.amount, transaction_hash,
+                is_failure=lambda ok: not ok,
+            )
         try:
             payload = {
                 'contract_id': contract_id,
                 'amount': str(amount),
                 'transaction_hash': transaction_hash
             }
-            response = requests.post(
+            response = circuit_breaker.request(
+                'stellar:fund', 'POST',
                 f'{self.service_url}/api/escrow/fund',
                 json=payload,
                 headers=self.headers,
@@ -148,6 +216,8 @@ class StellarEscrowClient:
                 return True
             logger.error(f"Failed to fund escrow: {response.status_code} - {response.text}")
             return False
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error funding escrow contract: {str(e)}")
             return False
@@ -156,7 +226,7 @@ class StellarEscrowClient:
         self,
         contract_id: str,
         employee_account: str,
-        amount: float = None
+        amount: Money = None
     ) -> bool:
         """
         Release escrow funds to employee
@@ -169,29 +239,112 @@ class StellarEscrowClient:
         Returns:
             True if successful, False otherwise
         """
+        amount = Money.parse(amount) if amount is not None else None
         if self._python_client:
-            return self._python_client.release_escrow(
-                contract_id, employee_account, float(amount) if amount is not None else None
+            return circuit_breaker.get_breaker('stellar:release').call(
+                self._python_client.release_escrow,
+                contract_id, employee_account, amount.amount if amount is not None else None,
+                is_failure=lambda ok: not ok,
             )
         try:
-            payload = {'contract_id': contract_id, 'employee_account': employee_account}
-            if amount:
-                payload['amount'] = str(amount)
-            response = requests.post(
+            response = circuit_breaker.request(
+                'stellar:release', 'POST',
                 f'{self.service_url}/api/escrow/release',
-                json=payload,
+                json=self._release_payload(contract_id, employee_account, amount),
                 headers=self.headers,
                 timeout=30
             )
-            if response.status_code == 200:
-                logger.info(f"Escrow contract released: {contract_id} -> {employee_account}")
-                return True
-            logger.error(f"Failed to release escrow: {response.status_code} - {response.text}")
+            return self._release_result(response, contract_id, employee_account)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Error releasing escrow contract: {str(e)}")
             return False
+
+    async def arelease_escrow_contract(
+        self,
+        contract_id: str,
+        employee_account: str,
+        amount: Money = None
+    ) -> bool:
+        """release_escrow_contract for async views: awaits the HTTP call instead of blocking a worker."""
+        if self._python_client:
+            # The Soroban client is synchronous
+            return await asyncio.to_thread(self.release_escrow_contract, contract_id, employee_account, amount)
+        amount = Money.parse(amount) if amount is not None else None
+        try:
+            response = await circuit_breaker.arequest(
+                'stellar:release', 'POST',
+                f'{self.service_url}/api/escrow/release',
+                json=self._release_payload(contract_id, employee_account, amount),
+                headers=self.headers,
+                timeout=30
+            )
+            return self._release_result(response, contract_id, employee_account)
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Error releasing escrow contract: {str(e)}")
             return False
+
+    @staticmethod
+    def _release_payload(contract_id, employee_account, amount):
+        payload = {'contract_id': contract_id, 'employee_account': employee_account}
+        if amount:
+            payload['amount'] = str(amount)
+        return payload
+
+    @staticmethod
+    def _release_result(response, contract_id, employee_account):
+        if response.status_code == 200:
+            logger.info(f"Escrow contract released: {contract_id} -> {employee_account}")
+            return True
+        logger.error(f"Failed to release escrow: {response.status_code} - {response.text}")
+        return False
     
+    def release_escrow_contracts(self, releases: List[Tuple[str, str, Money]]) -> Dict[str, bool]:
+        """
+        Release many escrows in one batch: [(contract_id, employee_account, amount)].
+
+        Returns:
+            {contract_id: True if released}
+        """
+        releases = [(cid, account, Money.parse(amount)) for cid, account, amount in releases]
+        if not releases:
+            return {}
+        if self._python_client:
+            return circuit_breaker.get_breaker('stellar:release').call(
+                self._python_client.release_escrows,
+                [(cid, account) for cid, account, _ in releases],
+                is_failure=lambda results: not any(results.values()),
+            )
+        try:
+            payload = {'releases': [
+                {'contract_id': cid, 'employee_account': account, 'amount': str(amount)}
+                for cid, account, amount in releases
+            ]}
+            response = circuit_breaker.request(
+                'stellar:release', 'POST',
+                f'{self.service_url}/api/escrow/release/batch',
+                json=payload,
+                headers=self.headers,
+                timeout=60
+            )
+            if response.status_code == 200:
+                results = {item.get('contract_id'): bool(item.get('success')) for item in response.json().get('results', [])}
+                logger.info(f"Batch release: {sum(results.values())}/{len(releases)} escrow(s) released")
+                return {cid: results.get(cid, False) for cid, _, _ in releases}
+            if response.status_code not in (404, 405):
+                logger.error(f"Failed to batch release escrows: {response.status_code} - {response.text}")
+                return {cid: False for cid, _, _ in releases}
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Error batch releasing escrow contracts: {str(e)}")
+            return {cid: False for cid, _, _ in releases}
+        # Contract service without the batch endpoint: release one by one
+        return {cid: self.release_escrow_contract(cid, account, amount) for cid, account, amount in releases}
+
     def get_escrow_status(self, contract_id: str) -> Optional[Dict]:
         """
         Get current status of an escrow contract
@@ -205,7 +358,8 @@ class StellarEscrowClient:
         if self._python_client:
             return self._python_client.get_escrow_status(contract_id)
         try:
-            response = requests.get(
+            response = circuit_breaker.request(
+                'stellar:status', 'GET',
                 f'{self.service_url}/api/escrow/{contract_id}',
                 headers=self.headers,
                 timeout=30
@@ -218,6 +372,28 @@ class StellarEscrowClient:
             logger.error(f"Error getting escrow status: {str(e)}")
             return None
     
+    def get_balances(self, contract_ids: Iterable[str], max_workers: int = 8) -> Dict[str, Optional[int]]:
+        """
+        Held amount in stroops for each contract, fetched concurrently with at most
+        max_workers requests in flight. Contracts whose balance could not be read map to None.
+        """
+        contract_ids = list(contract_ids)
+        if self._python_client:
+            return self._python_client.get_balances(contract_ids, max_workers=max_workers)
+        if not contract_ids:
+            return {}
+
+        def fetch(contract_id):
+            status = self.get_escrow_status(contract_id) or {}
+            balance = status.get('balance')
+            try:
+                return contract_id, int(balance) if balance is not None else None
+            except (TypeError, ValueError):
+                return contract_id, None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(contract_ids)))) as pool:
+            return dict(pool.map(fetch, contract_ids))
+
     def cancel_escrow_contract(self, contract_id: str) -> bool:
         """
         Cancel an escrow contract and refund employer
@@ -229,7 +405,8 @@ class StellarEscrowClient:
             True if successful, False otherwise
         """
         try:
-            response = requests.post(
+            response = circuit_breaker.request(
+                'stellar:cancel', 'POST',
                 f'{self.service_url}/api/escrow/{contract_id}/cancel',
                 headers=self.headers,
                 timeout=30
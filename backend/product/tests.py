@@ -1,3 +1,1638 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import hmac
+import io
+import json
+import os
+import random
+import runpy
+import tempfile
+import threading
+import uuid
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import (
+    CustomUser, JobListing, JobListingTerm, JobApplication, EscrowContract, MpesaDeposit,
+    PaystackDeposit, WebhookEvent, MobileMoneyPayout, EscrowDiscrepancy, ReconciliationCheckpoint,
+    DeferredOperation, UserRollup, EscrowEvent, EscrowSnapshot, JobMessage, USSDTransaction,
+    ArchivedUSSDTransaction, ArchivedJobMessage,
+)
+from . import (
+    matching, webhooks, escrow_service, reconciliation, payouts, circuit_breaker, retry_queue, provisioning,
+    escrow_cache, rollups, exports, escrow_events, sqlite_tuning, metrics, seeding, benchmarks, fast_serializers,
+    renderers, compression, payloads, ratelimit, archival,
+)
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .db_router import ReplicaRouter, read_replica, read_db
+from .stellar_integration import StellarEscrowClient
+from .mobile_money_integration import IntersendClient, SimulatedIntersendClient
+from .money import Money, MoneyError, CURRENCY_EXPONENTS
+from .serializers import MoneyField, JobListingSerializer, JobApplicationSerializer
+
+
+def make_user(phone, user_type='employer', **extra):
+    return CustomUser.objects.create_user(
+        email=f"{phone}@kazi.test", password="pass1234", phone_number=phone, user_type=user_type, **extra
+    )
+
+
+def make_job(employer, title, description='', budget='1000.00', **extra):
+    return JobListing.objects.create(
+        employer=employer, title=title, description=description, budget=Decimal(budget), **extra
+    )
+
+
+def make_escrow(job, contract_id=None, **extra):
+    return EscrowContract.objects.create(
+        job_listing=job, contract_id=contract_id or f"ESCROW_J{job.id}", employer=job.employer,
+        amount=job.budget, **extra
+    )
+
+
+class JobMatchingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_user('0700000001')
+        self.worker = make_user('0700000002', user_type='employee')
+        self.client = APIClient()
+        self.client.force_authenticate(self.worker)
+
+    def test_index_follows_listing_status(self):
+        job = make_job(self.employer, 'Plumbing repair', 'Fix kitchen sink pipes')
+        terms = set(JobListingTerm.objects.filter(job_listing=job).values_list('term', flat=True))
+        self.assertEqual(terms, {'plumbing', 'repair', 'fix', 'kitchen', 'sink', 'pipes'})
+        job.status = 'assigned'
+        job.save()
+        self.assertFalse(JobListingTerm.objects.filter(job_listing=job).exists())
+
+    def test_edited_listing_is_reindexed(self):
+        make_job(self.employer, 'Decorating', 'Walls', status='completed', employee=self.worker,
+                 work_summary='Painted walls and ceilings')
+        job = make_job(self.employer, 'Plumbing repair', 'Fix kitchen sink pipes')
+        self.assertEqual(matching.recommend_jobs(self.worker), [])
+
+        job.title, job.description = 'Wall painting', 'Paint the kitchen walls'
+        job.save(update_fields=['title', 'description'])
+        terms = set(JobListingTerm.objects.filter(job_listing=job).values_list('term', flat=True))
+        self.assertEqual(terms, {'wall', 'painting', 'paint', 'kitchen', 'walls'})
+        # The cached (empty) ranking was dropped
+        self.assertEqual([j.id for j in matching.recommend_jobs(self.worker)], [job.id])
+
+    def test_recommendations_ranked_by_history(self):
+        make_job(self.employer, 'Plumbing', 'Pipes', status='completed', employee=self.worker,
+                 work_summary='Replaced pipes and fixed leaking taps')
+        plumbing = make_job(self.employer, 'Plumbing job in Westlands', 'Leaking pipes')
+        painting = make_job(self.employer, 'House painting', 'Paint two rooms, fix taps')
+        make_job(self.employer, 'Tutoring', 'Maths lessons')
+
+        resp = self.client.get('/api/employee/recommended-jobs/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([j['id'] for j in resp.data], [plumbing.id, painting.id])
+        self.assertGreater(resp.data[0]['match_score'], resp.data[1]['match_score'])
+
+    def test_applied_and_closed_jobs_excluded(self):
+        make_job(self.employer, 'Garden', '', status='completed', employee=self.worker, work_summary='gardening')
+        applied = make_job(self.employer, 'Gardening help', '')
+        closed = make_job(self.employer, 'Gardening crew', '')
+        JobApplication.objects.create(job_listing=applied, employee=self.worker)
+        closed.status = 'cancelled'
+        closed.save()
+        self.assertEqual(matching.recommend_jobs(self.worker), [])
+
+    def test_new_listing_invalidates_cached_results(self):
+        make_job(self.employer, 'Welding', '', status='completed', employee=self.worker, work_summary='welding gates')
+        self.assertEqual(matching.recommend_jobs(self.worker), [])
+        job = make_job(self.employer, 'Gate welding', '')
+        self.assertEqual([j.id for j in matching.recommend_jobs(self.worker)], [job.id])
+
+    def test_employers_forbidden(self):
+        self.client.force_authenticate(self.employer)
+        self.assertEqual(self.client.get('/api/employee/recommended-jobs/').status_code, 403)
+
+
+@mock.patch('product.escrow_service.get_stellar_client')
+class WebhookInboxTests(TestCase):
+    def setUp(self):
+        self.employer = make_user('0700000011')
+        self.job = make_job(self.employer, 'Fence repair', budget='2500.00')
+        self.escrow = make_escrow(self.job)
+
+    def paystack_payload(self, event_id=9001):
+        return {
+            "event": "charge.success",
+            "data": {"id": event_id, "reference": self.escrow.contract_id, "amount": 250000, "currency": "KES",
+                     "customer": {"email": "boss@kazi.test"}},
+        }
+
+    def test_callbacks_only_enqueue(self, stellar):
+        for _ in range(3):
+            resp = self.client.post('/api/callbacks/paystack/deposit/', json.dumps(self.paystack_payload()),
+                                    content_type='application/json')
+            self.assertEqual(resp.status_code, 200)
+        resp = self.client.post('/api/callbacks/mpesa/deposit/', {
+            "TransID": "RKTQDM7W6S", "TransAmount": "2500.00", "MSISDN": "254708374149",
+            "BillRefNumber": self.escrow.contract_id,
+        }, content_type='application/json')
+        self.assertEqual(resp.json()["status"], "queued")
+        self.assertEqual(WebhookEvent.objects.count(), 2)
+        self.assertFalse(PaystackDeposit.objects.exists())
+        stellar.assert_not_called()
+        self.assertEqual(webhooks.backlog_stats()["pending"], 2)
+
+    def test_processor_applies_each_event_once(self, stellar):
+        stellar.return_value.fund_escrow_contract.return_value = True
+        webhooks.ingest('paystack', webhooks.paystack_event_id(self.paystack_payload()), self.paystack_payload())
+        webhooks.ingest('mpesa', 'RKTQDM7W6S', {"TransID": "RKTQDM7W6S", "TransAmount": "10.00",
+                                                "BillRefNumber": str(self.job.id), "MSISDN": "254708374149"})
+        self.assertEqual(webhooks.process_pending(), 2)
+        self.assertEqual(webhooks.process_pending(), 0)
+        self.assertEqual(PaystackDeposit.objects.get().amount, Decimal('2500.00'))
+        self.assertEqual(MpesaDeposit.objects.get().phone_number, '0708374149')
+        self.escrow.refresh_from_db()
+        self.assertEqual(self.escrow.status, 'funded')
+        self.assertEqual(webhooks.backlog_stats()["pending"], 0)
+
+    def test_unknown_reference_is_ignored(self, stellar):
+        webhooks.ingest('mpesa', 'X1', {"TransID": "X1", "TransAmount": "10", "BillRefNumber": "ESCROW_NOPE"})
+        webhooks.process_pending()
+        self.assertEqual(WebhookEvent.objects.get().status, 'ignored')
+        stellar.assert_not_called()
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        # Offline Python client: balances live in an in-memory ledger
+        self.chain = StellarEscrowClient(use_python=True)
+        self.employer = make_user('0700000021')
+
+    def tearDown(self):
+        from stellar_escrow.python_client import reset_local_balances
+        reset_local_balances()
+
+    def funded_escrow(self, title, chain_amount):
+        job = make_job(self.employer, title, budget='1000.00')
+        escrow = make_escrow(job, status='funded')
+        MpesaDeposit.objects.create(escrow_contract=escrow, transaction_reference=f"T{job.id}", phone_number='0700',
+                                    amount=Decimal('1000.00'), status='completed')
+        self.chain.create_escrow_contract('GEMPLOYER', Money.parse('1000'), job_id=job.id)
+        if chain_amount:
+            self.chain.fund_escrow_contract(escrow.contract_id, Money.parse(chain_amount))
+        return escrow
+
+    def test_finds_and_resolves_balance_mismatch(self):
+        ok = self.funded_escrow('Roofing', '1000')
+        short = self.funded_escrow('Painting', '400')
+        stats = reconciliation.reconcile(chunk_size=1, stellar_client=self.chain)
+        self.assertEqual(stats['checked'], 2)
+        discrepancy = EscrowDiscrepancy.objects.get()
+        self.assertEqual((discrepancy.escrow_contract_id, discrepancy.kind), (short.pk, 'balance_mismatch'))
+        self.assertEqual(discrepancy.onchain_stroops, 400 * 10 ** 7)
+        self.assertFalse(ok.discrepancies.exists())
+
+        # Nothing changed locally: incremental run only revisits the open discrepancy
+        stats = reconciliation.reconcile(stellar_client=self.chain)
+        self.assertEqual((stats['checked'], stats['still_open']), (1, 1))
+
+        self.chain.fund_escrow_contract(short.contract_id, Money.parse('600'))
+        stats = reconciliation.reconcile(stellar_client=self.chain)
+        self.assertEqual(stats['resolved'], 1)
+        self.assertIsNotNone(EscrowDiscrepancy.objects.get().resolved_at)
+        self.assertEqual(reconciliation.reconcile(stellar_client=self.chain)['checked'], 0)
+
+    def test_ledger_checks_and_unverified_balances(self):
+        job = make_job(self.employer, 'Plumbing', budget='1000.00')
+        escrow = make_escrow(job, status='released')
+        stats = reconciliation.reconcile(stellar_client=self.chain)
+        self.assertEqual(stats['unverified'], 1)
+        kinds = set(escrow.discrepancies.values_list('kind', flat=True))
+        self.assertEqual(kinds, {'deposit_shortfall', 'payout_mismatch'})
+        checkpoint = ReconciliationCheckpoint.objects.get(name=reconciliation.CHECKPOINT_NAME)
+        self.assertEqual(checkpoint.last_id, escrow.pk)
+
+    def test_payout_and_deposit_changes_are_rechecked(self):
+        worker = make_user('0700000022', user_type='employee')
+        job = make_job(self.employer, 'Fencing', budget='1000.00', employee=worker)
+        escrow = make_escrow(job, status='released', employee=worker)
+        payout = MobileMoneyPayout.objects.create(escrow_contract=escrow, employee=worker, amount=job.budget,
+                                                  phone_number='254700000022', status='processing',
+                                                  transaction_reference='TX-FENCE')
+        reconciliation.reconcile(stellar_client=self.chain)
+        # In flight, not yet a mismatch; the shortfall is open
+        self.assertEqual(list(escrow.discrepancies.values_list('kind', flat=True)), ['deposit_shortfall'])
+
+        webhooks.apply_mpesa_deposit({'TransID': 'LATE1', 'TransAmount': '1000', 'MSISDN': '254700000021',
+                                      'BillRefNumber': escrow.contract_id})
+        payouts.apply_status(payout, 'failed', 'Recipient account rejected the transfer')
+        stats = reconciliation.reconcile(stellar_client=self.chain)
+        self.assertEqual((stats['checked'], stats['resolved'], stats['opened']), (1, 1, 1))
+        open_kinds = escrow.discrepancies.filter(resolved_at__isnull=True).values_list('kind', flat=True)
+        self.assertEqual(list(open_kinds), ['payout_mismatch'])
+
+        # In flight past the grace period is a mismatch too
+        MobileMoneyPayout.objects.filter(pk=payout.pk).update(
+            status='processing', created_at=timezone.now() - reconciliation.PAYOUT_GRACE * 2)
+        self.assertEqual(reconciliation.reconcile(stellar_client=self.chain)['still_open'], 1)
+        self.assertEqual(escrow.discrepancies.get(resolved_at__isnull=True).details,
+                         "Released but payout is processing")
+
+
+class PayoutTrackingTests(TestCase):
+    def setUp(self):
+        self.employer = make_user('0700000031')
+        self.intersend = SimulatedIntersendClient(settle_after_checks=2, fail_numbers={'254700000099'})
+
+    def send_payout(self, phone):
+        worker = CustomUser.objects.filter(phone_number=phone).first() or make_user(phone, user_type='employee')
+        job = make_job(self.employer, f'Job for {phone}', employee=worker)
+        escrow = make_escrow(job, status='released', employee=worker)
+        payout = MobileMoneyPayout.objects.create(
+            escrow_contract=escrow, employee=worker, amount=job.budget,
+            phone_number=escrow_service.normalize_payout_phone(phone),
+        )
+        with mock.patch('product.escrow_service.get_intersend_client', return_value=self.intersend):
+            self.assertTrue(escrow_service.send_payout(payout))
+        return payout
+
+    def make_due(self):
+        MobileMoneyPayout.objects.update(next_check_at=timezone.now())
+
+    def test_poller_waits_for_settlement(self):
+        ok, rejected = self.send_payout('0700000032'), self.send_payout('0700000099')
+        self.assertEqual(payouts.poll_due(client=self.intersend)['checked'], 0)
+
+        self.make_due()
+        self.assertEqual(payouts.poll_due(client=self.intersend)['processing'], 2)
+        ok.refresh_from_db()
+        self.assertEqual((ok.status, ok.check_attempts), ('processing', 1))
+        self.assertGreater(ok.next_check_at, timezone.now() + payouts.next_check_delay(0))
+
+        self.make_due()
+        counts = payouts.poll_due(client=self.intersend)
+        self.assertEqual((counts['completed'], counts['failed']), (1, 1))
+        ok.refresh_from_db()
+        rejected.refresh_from_db()
+        self.assertEqual(ok.status, 'completed')
+        self.assertEqual(rejected.status, 'failed')
+        self.assertIn('rejected', rejected.failure_reason)
+
+    def test_poller_respects_provider_concurrency(self):
+        self.intersend.check_delay = 0.02
+        for i in range(12):
+            self.send_payout(f'07000001{i:02d}')
+        self.make_due()
+        self.assertEqual(payouts.poll_due(client=self.intersend)['checked'], 12)
+        self.assertLessEqual(self.intersend.max_in_flight, payouts.PROVIDER_CONCURRENCY['intersend'])
+
+    def post_status(self, body, signature=None):
+        headers = {'x-intersend-signature': signature} if signature is not None else {}
+        return self.client.post('/api/callbacks/intersend/payout/', body, content_type='application/json',
+                                headers=headers)
+
+    @override_settings(INTERSEND_WEBHOOK_SECRET='intersend-test-secret')
+    def test_status_callback_settles_payout(self):
+        payout = self.send_payout('0700000032')
+        body = json.dumps({"transaction_id": payout.transaction_reference, "status": "completed"})
+        signature = hmac.new(b'intersend-test-secret', body.encode(), hashlib.sha256).hexdigest()
+        for _ in range(2):
+            self.assertEqual(self.post_status(body, signature).status_code, 200)
+        self.assertEqual(webhooks.process_pending(), 1)
+        payout.refresh_from_db()
+        self.assertEqual((payout.status, payout.next_check_at), ('completed', None))
+
+    def test_status_callback_requires_a_valid_signature(self):
+        payout = self.send_payout('0700000032')
+        body = json.dumps({"transaction_id": payout.transaction_reference, "status": "completed"})
+        # No secret configured: nothing is accepted
+        self.assertEqual(self.post_status(body).status_code, 503)
+        with override_settings(INTERSEND_WEBHOOK_SECRET='intersend-test-secret'):
+            self.assertEqual(self.post_status(body).status_code, 400)
+            forged = hmac.new(b'guessed', body.encode(), hashlib.sha256).hexdigest()
+            self.assertEqual(self.post_status(body, forged).status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+
+class EscrowStatusCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_user('0700000061')
+        self.worker = make_user('0700000062', user_type='employee')
+        self.job = make_job(self.employer, 'Fence repair', employee=self.worker, status='assigned')
+        self.escrow = make_escrow(self.job, status='in_progress', employee=self.worker)
+        self.api = APIClient()
+        self.api.force_authenticate(self.worker)
+        self.url = f'/api/jobs/{self.job.id}/escrow/'
+
+    @override_settings(ESCROW_STATUS_CACHING=True)
+    def test_polling_is_served_from_cache_until_funded(self):
+        self.assertEqual(self.api.get(self.url).json()["status"], 'in_progress')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.api.get(self.url).json()["status"], 'in_progress')
+
+        with mock.patch('product.escrow_service.get_stellar_client') as stellar:
+            stellar.return_value.fund_escrow_contract.return_value = True
+            with self.captureOnCommitCallbacks(execute=True):
+                escrow_service.fund_escrow(self.escrow, '1000.00')
+        self.assertEqual(self.api.get(self.url).json()["status"], 'funded')
+
+        stranger = APIClient()
+        stranger.force_authenticate(make_user('0700000063', user_type='employee'))
+        self.assertEqual(stranger.get(self.url).status_code, 403)
+
+    def fund_in_worker(self):
+        """Fund the escrow as a background command would: invalidating only the 'worker' cache."""
+        with mock.patch('product.escrow_cache.cache', caches['worker']), \
+                mock.patch('product.escrow_service.get_stellar_client') as stellar:
+            stellar.return_value.fund_escrow_contract.return_value = True
+            with self.captureOnCommitCallbacks(execute=True):
+                escrow_service.fund_escrow(self.escrow, '1000.00')
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'web'},
+        'worker': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'worker'},
+    })
+    def test_per_process_cache_is_not_used_for_status(self):
+        self.assertEqual(self.api.get(self.url).json()["status"], 'in_progress')
+        self.fund_in_worker()
+        self.assertEqual(self.api.get(self.url).json()["status"], 'funded')
+
+    def test_shared_cache_sees_invalidation_from_worker(self):
+        # A backend every process on the host shares (as Redis would be), caching on by default
+        backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache'}
+        with tempfile.TemporaryDirectory() as directory, self.settings(CACHES={
+            'default': {**backend, 'LOCATION': directory}, 'worker': {**backend, 'LOCATION': directory},
+        }):
+            self.assertTrue(escrow_cache.status_caching())
+            self.assertEqual(self.api.get(self.url).json()["status"], 'in_progress')
+            with self.assertNumQueries(0):
+                self.assertEqual(self.api.get(self.url).json()["status"], 'in_progress')
+            self.fund_in_worker()
+            self.assertEqual(self.api.get(self.url).json()["status"], 'funded')
+
+    def test_live_balance_refreshes_in_background(self):
+        with mock.patch('product.escrow_cache.get_stellar_client') as stellar:
+            stellar.return_value.get_balances.return_value = {self.escrow.contract_id: 10000000000}
+            first = self.api.get(self.url, {'live': 1}).json()
+            self.assertIsNone(first["onchain_balance_stroops"])
+            for _ in range(100):
+                body = self.api.get(self.url, {'live': 1}).json()
+                if body["onchain_balance_stroops"] is not None:
+                    break
+                threading.Event().wait(0.01)
+        self.assertEqual(body["onchain_balance_stroops"], 10000000000)
+        self.assertEqual(stellar.return_value.get_balances.call_count, 1)
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_user('0700000071')
+        self.worker = make_user('0700000072', user_type='employee')
+        self.api = APIClient()
+        make_job(self.employer, 'Still open', budget='300.00')
+        self.job = make_job(self.employer, 'Plastering', budget='2500.00', employee=self.worker, status='assigned')
+        self.escrow = make_escrow(self.job, status='in_progress', employee=self.worker)
+
+    def summary(self, user):
+        self.api.force_authenticate(user)
+        return self.api.get(f'/api/{user.user_type}/summary/').json()
+
+    def test_summaries_follow_transitions(self):
+        body = self.summary(self.employer)
+        self.assertEqual((body["jobs_total"], body["jobs_by_status"]["open"], body["workers_hired"]), (2, 1, 1))
+        self.assertEqual(body["total_escrowed"], '0.00')
+        # Served from the rollup row until something changes
+        with self.assertNumQueries(1):
+            self.summary(self.employer)
+
+        with mock.patch('product.escrow_service.get_stellar_client') as stellar, \
+                mock.patch('product.escrow_service.get_intersend_client') as intersend:
+            stellar.return_value.fund_escrow_contract.return_value = True
+            escrow_service.fund_escrow(self.escrow, '2500.00')
+            self.assertEqual(self.summary(self.employer)["total_escrowed"], '2500.00')
+
+            stellar.return_value.release_escrow_contract.return_value = True
+            intersend.return_value = SimulatedIntersendClient(settle_after_checks=0)
+            escrow_service.complete_work(self.job)
+        payout = MobileMoneyPayout.objects.get()
+        payouts.apply_status(payout, 'completed')
+
+        body = self.summary(self.employer)
+        self.assertEqual((body["total_escrowed"], body["total_released"]), ('0.00', '2500.00'))
+        self.assertEqual(body["jobs_by_status"]["completed"], 1)
+        body = self.summary(self.worker)
+        self.assertEqual((body["jobs_total"], body["total_earned"], body["open_jobs"]), (1, '2500.00', 1))
+        # Rollup row and the cached platform-wide open job count
+        with self.assertNumQueries(1):
+            self.summary(self.worker)
+
+    def test_workers_hired_counts_distinct_workers(self):
+        make_job(self.employer, 'Second coat', employee=self.worker, status='assigned')
+        make_job(self.employer, 'Gutters', employee=make_user('0700000073', user_type='employee'), status='assigned')
+        self.assertEqual(self.summary(self.employer)["workers_hired"], 2)
+
+    def test_recompute_racing_a_transition_stays_stale(self):
+        rollups.get_rollup(self.employer)
+        rollups.mark_stale(job_ids=[self.job.pk])
+        compute = rollups.compute
+
+        def compute_then_transition(user):
+            values = compute(user)
+            rollups.mark_stale(user_ids=[user.pk])  # a transition commits mid-recompute
+            return values
+
+        with mock.patch('product.rollups.compute', side_effect=compute_then_transition):
+            rollups.get_rollup(self.employer)
+        self.assertTrue(UserRollup.objects.get(pk=self.employer.pk).stale)
+
+
+class LedgerExportTests(TestCase):
+    def setUp(self):
+        self.employer = make_user('0700000081')
+        self.api = APIClient()
+        self.api.force_authenticate(self.employer)
+        job = make_job(self.employer, 'Roofing, phase 1')
+        escrow = make_escrow(job)
+        for day in (3, 1, 2):
+            MpesaDeposit.objects.create(escrow_contract=escrow, transaction_reference=f"MP{day}",
+                                        phone_number='254700000081', amount=Decimal('100.00'))
+            MpesaDeposit.objects.filter(transaction_reference=f"MP{day}").update(
+                created_at=timezone.make_aware(timezone.datetime(2026, 3, day, 12))
+            )
+        PaystackDeposit.objects.create(escrow_contract=escrow, transaction_reference="PS1", amount=Decimal('50.00'))
+        PaystackDeposit.objects.update(created_at=timezone.make_aware(timezone.datetime(2026, 3, 2, 9)))
+
+    def test_export_streams_filtered_rows_in_order(self):
+        resp = self.api.get('/api/transactions/export/csv/', {'from': '2026-03-02', 'to': '2026-03-02'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        rows = list(csv.DictReader(io.StringIO(b''.join(resp.streaming_content).decode())))
+        self.assertEqual([r["reference"] for r in rows], ["PS1", "MP2"])
+        self.assertEqual((rows[0]["currency"], rows[1]["job_title"]), ("NGN", "Roofing, phase 1"))
+
+        resp = self.api.get('/api/transactions/export/jsonl/')
+        lines = [json.loads(line) for line in b''.join(resp.streaming_content).decode().splitlines()]
+        self.assertEqual([r["reference"] for r in lines], ["MP1", "PS1", "MP2", "MP3"])
+        self.assertEqual(self.api.get('/api/transactions/export/csv/', {'to': 'March'}).status_code, 400)
+        self.assertEqual(self.api.get('/api/transactions/export/xlsx/').status_code, 404)
+
+    def test_export_ledger_command_shares_the_pipeline(self):
+        out = io.StringIO()
+        call_command('export_ledger', '--format', 'jsonl', '--from', '2026-03-02', '--chunk-size', '1', stdout=out)
+        self.assertEqual([json.loads(line)["reference"] for line in out.getvalue().splitlines()], ["PS1", "MP2", "MP3"])
+        self.assertEqual(out.getvalue(), ''.join(exports.to_jsonl(
+            exports.transaction_rows(start=exports.parse_bound('2026-03-02'))
+        )))
+
+
+    def test_work_history_rows_take_one_query(self):
+        worker = make_user('0700000082', user_type='employee')
+        employers = [make_user(f'07000001{i:02d}') for i in range(5)]
+        for i, employer in enumerate(employers):
+            make_job(employer, f'Job {i}', status='completed', employee=worker, completed_at=timezone.now())
+        with self.assertNumQueries(1):
+            rows = list(exports.work_history_rows(worker))
+        self.assertEqual([r['employer_name'] for r in rows], [f'07000001{i:02d}@kazi.test' for i in range(5)])
+
+class EscrowEventLedgerTests(TestCase):
+    def setUp(self):
+        self.employer = make_user('0700000091')
+        self.worker = make_user('0700000092', user_type='employee', stellar_account_id='G' * 56)
+        self.job = make_job(self.employer, 'Tiling', budget='800.00')
+        self.escrow = escrow_service.open_escrow(self.job, self.employer)
+
+    def test_transitions_append_events_and_state_can_be_rebuilt(self):
+        escrow_service.assign_job(self.job, self.worker)
+        self.escrow.refresh_from_db()
+        with mock.patch('product.escrow_service.get_stellar_client'):
+            escrow_service.fund_escrow(self.escrow, '800.00')
+            escrow_service.fund_escrow(self.escrow, '800.00')  # repeat: no transition, no event
+        funded_at = timezone.now()
+        EscrowContract.objects.filter(pk=self.escrow.pk).update(chain_status='created')
+        with mock.patch('product.escrow_service.get_stellar_client') as stellar:
+            stellar.return_value.release_escrow_contract.return_value = False
+            with self.assertRaises(escrow_service.ReleaseError):
+                escrow_service.complete_work(self.job)
+
+        kinds = [e.kind for e in escrow_events.history(self.escrow.pk)]
+        self.assertEqual(kinds, ['opened', 'assigned', 'funded', 'completed', 'release_failed'])
+        self.escrow.refresh_from_db()
+        state = escrow_events.state_at(self.escrow.pk, timezone.now())
+        self.assertEqual((state['status'], state['employee_id']), (self.escrow.status, self.worker.pk))
+        self.assertEqual(escrow_events.state_at(self.escrow.pk, funded_at)['status'], 'funded')
+        self.assertIsNone(escrow_events.state_at(self.escrow.pk, self.escrow.created_at - timezone.timedelta(seconds=1)))
+        with self.assertRaises(ValueError):
+            EscrowEvent.objects.first().save()
+
+    def test_state_as_of_starts_from_snapshot(self):
+        base = timezone.now() - timezone.timedelta(hours=1)
+        EscrowEvent.objects.filter(escrow_contract=self.escrow).update(created_at=base)
+        EscrowEvent.objects.bulk_create([
+            EscrowEvent(escrow_contract=self.escrow, kind='funded' if i % 2 else 'release_failed',
+                        status='funded', changes={'step': i}, created_at=base + timezone.timedelta(minutes=i))
+            for i in range(1, 26)
+        ])
+        self.assertEqual(escrow_events.take_snapshots(every=10, chunk_size=7), 2)
+        self.assertEqual(escrow_events.take_snapshots(every=10), 0)
+        self.assertEqual(list(EscrowSnapshot.objects.values_list('event_count', flat=True).order_by('id')), [10, 20])
+
+        moment = base + timezone.timedelta(minutes=22)
+        with self.assertNumQueries(2):
+            state = escrow_events.state_at(self.escrow.pk, moment)
+        replayed = escrow_events.fold({}, escrow_events.history(self.escrow.pk, end=moment))[0]
+        self.assertEqual(state, replayed)
+        self.assertEqual((state['step'], state['contract_id']), (22, self.escrow.contract_id))
+
+    def test_snapshots_leave_recent_events_for_a_later_run(self):
+        # Events younger than the lag may sit above an id a slower transaction has yet to commit
+        EscrowEvent.objects.bulk_create([
+            EscrowEvent(escrow_contract=self.escrow, kind='funded', status='funded', changes={'step': i})
+            for i in range(10)
+        ])
+        self.assertEqual(escrow_events.take_snapshots(every=5), 0)
+        checkpoint = ReconciliationCheckpoint.objects.get(name=escrow_events.CHECKPOINT_NAME)
+        self.assertLess(checkpoint.last_id, EscrowEvent.objects.order_by('-id').first().id)
+        self.assertEqual(escrow_events.take_snapshots(every=5, lag=timezone.timedelta(0)), 2)
+
+
+@mock.patch('product.escrow_service.get_intersend_client')
+@mock.patch('product.escrow_service.get_stellar_client')
+class BulkCompleteTests(TestCase):
+    def setUp(self):
+        self.employer = make_user('0700000041')
+        self.api = APIClient()
+        self.api.force_authenticate(self.employer)
+        self.intersend = SimulatedIntersendClient()
+        self.jobs = []
+        for i in range(4):
+            worker = make_user(f'07000004{50 + i}', user_type='employee', stellar_account_id=f'G{i}' * 28)
+            job = make_job(self.employer, f'Harvest {i}', employee=worker, status='assigned')
+            make_escrow(job, status='funded', employee=worker)
+            self.jobs.append(job)
+
+    def test_bulk_complete_batches_upstream_calls(self, stellar, intersend):
+        intersend.return_value = self.intersend
+        failing = self.jobs[3].escrow_contract.contract_id
+        stellar.return_value.release_escrow_contracts.side_effect = (
+            lambda releases: {cid: cid != failing for cid, _, _ in releases}
+        )
+        unfunded = make_job(self.employer, 'Unfunded', status='assigned')
+        make_escrow(unfunded)
+        other = make_job(make_user('0700000049'), 'Not mine', status='assigned')
+        payload = {"jobs": [{"job_id": j.id, "work_summary": f"Picked row {j.id}"} for j in self.jobs]
+                   + [{"job_id": unfunded.id}, {"job_id": other.id}, {"job_id": 99999}]}
+
+        resp = self.api.post('/api/jobs/bulk-complete/', payload, format='json')
+        self.assertEqual(resp.status_code, 200)
+        body = resp.json()
+        self.assertEqual((body["completed"], body["failed"]), (3, 4))
+        results = {r["job_id"]: r for r in body["results"]}
+        self.assertEqual(list(results), [j.id for j in self.jobs] + [unfunded.id, other.id, 99999])
+        self.assertEqual(results[self.jobs[0].id]["payout_status"], 'processing')
+        self.assertIn("Stellar", results[self.jobs[3].id]["error"])
+        self.assertIn("not funded", results[unfunded.id]["error"])
+        self.assertIn("Only the employer", results[other.id]["error"])
+        self.assertEqual(results[99999]["error"], "Job not found")
+
+        self.assertEqual(stellar.return_value.release_escrow_contracts.call_count, 1)
+        self.assertEqual(self.intersend.bulk_requests, 1)
+        self.assertEqual(MobileMoneyPayout.objects.filter(status='processing').count(), 3)
+        self.jobs[0].refresh_from_db()
+        self.assertEqual((self.jobs[0].status, self.jobs[0].work_summary), ('completed', f"Picked row {self.jobs[0].id}"))
+        # Failed release rolled back so it can be retried
+        self.jobs[3].refresh_from_db()
+        self.assertEqual((self.jobs[3].status, self.jobs[3].escrow_contract.status), ('assigned', 'funded'))
+
+    def test_only_escrows_still_completed_are_released(self, stellar, intersend):
+        intersend.return_value = self.intersend
+        changed = self.jobs[1].escrow_contract
+
+        def release(releases):
+            # Another writer moves one escrow on while the release is in flight
+            EscrowContract.objects.filter(pk=changed.pk).update(status='cancelled')
+            return {cid: True for cid, _, _ in releases}
+
+        stellar.return_value.release_escrow_contracts.side_effect = release
+        resp = self.api.post('/api/jobs/bulk-complete/', {"jobs": [{"job_id": j.id} for j in self.jobs[:2]]},
+                             format='json')
+        results = {r["job_id"]: r for r in resp.json()["results"]}
+        self.assertEqual(results[self.jobs[1].id]["error"], "Escrow changed while completing")
+        self.assertEqual(list(EscrowEvent.objects.filter(kind='released').values_list('escrow_contract_id', flat=True)),
+                         [self.jobs[0].escrow_contract.pk])
+        self.assertFalse(MobileMoneyPayout.objects.filter(escrow_contract=changed).exists())
+
+    def test_bulk_payout_timeout_leaves_payouts_to_the_poller(self, stellar, intersend):
+        intersend.return_value = IntersendClient(api_url='http://upstream.invalid')
+        stellar.return_value.release_escrow_contracts.side_effect = (
+            lambda releases: {cid: True for cid, _, _ in releases}
+        )
+        payload = {"jobs": [{"job_id": j.id} for j in self.jobs[:2]]}
+        # Intersend took the batch but the response never arrived
+        with mock.patch.object(circuit_breaker.requests, 'request', side_effect=circuit_breaker.requests.ReadTimeout):
+            resp = self.api.post('/api/jobs/bulk-complete/', payload, format='json')
+        circuit_breaker.reset_breakers()
+        self.assertEqual(resp.json()["completed"], 2)
+
+        sent = list(MobileMoneyPayout.objects.order_by('id'))
+        self.assertEqual([p.status for p in sent], ['processing', 'processing'])
+        self.assertEqual([p.transaction_reference for p in sent],
+                         [f"PAYOUT_{p.escrow_contract_id}_{p.pk}" for p in sent])
+        self.assertTrue(all(p.next_check_at for p in sent))
+
+        MobileMoneyPayout.objects.update(next_check_at=timezone.now())
+        poller = mock.Mock()
+        poller.check_payout_status.side_effect = lambda reference: {'transaction_id': reference, 'status': 'completed'}
+        self.assertEqual(payouts.poll_due(client=poller)['completed'], 2)
+        self.assertEqual(set(MobileMoneyPayout.objects.values_list('status', flat=True)), {'completed'})
+
+
+class StubUpstream:
+    """Local HTTP server standing in for the Stellar contract service and Intersend; set fail=True to return 503s."""
+
+    def __init__(self):
+        self.fail = False
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self):
+                stub.hits += 1
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                if stub.fail:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                out = json.dumps(stub.reply(self.path, body)).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            do_GET = do_POST = respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reply(self, path, body):
+        if path.endswith('/escrow/create/batch'):
+            return {'results': [{'reference': e['reference'], 'contract_id': e['reference']} for e in body['escrows']]}
+        if path.endswith('/escrow/create'):
+            return {'contract_id': f"ESCROW_J{body.get('job_id')}"}
+        if path.endswith('/payouts/send'):
+            return {'transaction_id': f"TX-{body.get('phone_number')}", 'status': 'pending'}
+        return {'success': True}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        circuit_breaker.reset_breakers()
+        self.stub = StubUpstream()
+        self.stellar = StellarEscrowClient(service_url=self.stub.url, use_python=False)
+        self.intersend = IntersendClient(api_url=self.stub.url)
+        patches = [
+            mock.patch.object(circuit_breaker, 'FAILURE_THRESHOLD', 2),
+            mock.patch('product.escrow_service.get_stellar_client', return_value=self.stellar),
+            mock.patch('product.escrow_service.get_intersend_client', return_value=self.intersend),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.employer = make_user('0700000061')
+        self.api = APIClient()
+        self.api.force_authenticate(self.employer)
+
+    def tearDown(self):
+        self.stub.close()
+        circuit_breaker.reset_breakers()
+
+    def test_breaker_states(self):
+        now = [0.0]
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+        upstream = mock.Mock(side_effect=ConnectionError)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(upstream)
+        self.assertEqual((breaker.state, breaker.trips), ('open', 1))
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(upstream)
+        self.assertEqual(upstream.call_count, 2)
+
+        now[0] = 10.0
+        self.assertEqual(breaker.state, 'half_open')
+        breaker.before_call()  # the single probe
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+
+    def provision(self):
+        EscrowContract.objects.filter(chain_status='provisioning').update(chain_next_attempt_at=timezone.now())
+        return provisioning.provision_pending(client=self.stellar)
+
+    def test_job_posting_does_not_wait_for_stellar(self):
+        self.stub.fail = True
+        for i in range(3):
+            resp = self.api.post('/api/jobs/', {"title": f"Weeding {i}", "description": "Rows", "budget": "500.00"},
+                                 format='json')
+            self.assertEqual(resp.status_code, 201)
+            self.assertEqual(resp.json()["escrow_contract_id"], f"ESCROW_J{resp.json()['id']}")
+        self.assertEqual(self.stub.hits, 0)
+        self.assertEqual(EscrowContract.objects.filter(chain_status='provisioning').count(), 3)
+
+        # One batched create per run; the breaker opens after two failed batches
+        for _ in range(3):
+            self.assertEqual(self.provision()['retrying'], 3)
+        self.assertEqual(self.stub.hits, 2)
+        admin = make_user('0700000069', is_staff=True)
+        self.api.force_authenticate(admin)
+        breakers = {b["name"]: b for b in self.api.get('/api/ops/upstreams/').json()["breakers"]}
+        self.assertEqual((breakers['stellar:create']["state"], breakers['stellar:create']["trips"]), ('open', 1))
+
+        self.stub.fail = False
+        circuit_breaker.get_breaker('stellar:create').reset_timeout = 0
+        self.assertEqual(self.provision()['created'], 3)
+        self.assertEqual(self.stub.hits, 3)
+        self.assertFalse(EscrowContract.objects.exclude(chain_status='created').exists())
+
+    def test_funding_waits_for_provisioning(self):
+        job = make_job(self.employer, 'Sorting')
+        escrow = escrow_service.open_escrow(job, self.employer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(escrow_service.fund_escrow(escrow, Money.parse('1000')))
+        self.assertEqual(self.stub.hits, 0)
+        self.assertEqual(retry_queue.process_due()['pending'], 1)  # still provisioning
+
+        self.assertEqual(self.provision()['created'], 1)
+        self.assertEqual(retry_queue.process_due()['done'], 1)
+        self.assertEqual(self.stub.hits, 2)  # batch create, then fund
+
+    def test_interleaved_workers_create_each_contract_once(self):
+        for title in ('Mowing', 'Pruning'):
+            escrow_service.open_escrow(make_job(self.employer, title), self.employer)
+        stale = provisioning.due_escrows()
+        second = mock.Mock()
+
+        def create_escrow_contracts(specs):
+            # The second worker read the same batch before this one claimed it
+            with mock.patch('product.provisioning.due_escrows', return_value=stale):
+                self.assertEqual(provisioning.provision_pending(client=second)['created'], 0)
+            return {contract_id: {'contract_id': contract_id} for contract_id, *_ in specs}
+        first = mock.Mock()
+        first.create_escrow_contracts.side_effect = create_escrow_contracts
+        self.assertEqual(provisioning.provision_pending(client=first)['created'], 2)
+        self.assertFalse(second.create_escrow_contracts.called)
+
+    def test_contract_id_not_adopted_after_deposits(self):
+        job = make_job(self.employer, 'Grading')
+        escrow = escrow_service.open_escrow(job, self.employer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(escrow_service.fund_escrow(escrow, Money.parse('1000')))
+        parked = DeferredOperation.objects.get().next_attempt_at
+
+        client = mock.Mock()
+        client.create_escrow_contracts.return_value = {escrow.contract_id: {'contract_id': 'CHAIN_GRADING'}}
+        EscrowContract.objects.update(chain_next_attempt_at=timezone.now())
+        self.assertEqual(provisioning.provision_pending(client=client)['failed'], 1)
+        escrow.refresh_from_db()
+        self.assertEqual((escrow.contract_id, escrow.chain_status), (f"ESCROW_J{job.id}", 'failed'))
+        self.assertIn('CHAIN_GRADING', escrow.chain_error)
+        # The funding queued for the local id is not replayed
+        self.assertEqual(DeferredOperation.objects.get().next_attempt_at, parked)
+        self.assertFalse(client.fund_escrow_contract.called)
+
+    def test_completion_during_outage_releases_later(self):
+        worker = make_user('0700000062', user_type='employee', stellar_account_id='G' * 56)
+        job = make_job(self.employer, 'Pruning', employee=worker, status='assigned')
+        escrow = make_escrow(job, status='funded', employee=worker)
+        release = circuit_breaker.get_breaker('stellar:release')
+        release.record_failure()
+        release.record_failure()
+
+        resp = self.api.post(f'/api/jobs/{job.id}/complete/', {}, format='json')
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(self.stub.hits, 0)
+        escrow.refresh_from_db()
+        self.assertEqual(escrow.status, 'completed')
+
+        release.reset_timeout = 0
+        DeferredOperation.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(retry_queue.process_due()['done'], 1)
+        escrow.refresh_from_db()
+        self.assertEqual(escrow.status, 'released')
+        payout = MobileMoneyPayout.objects.get()
+        self.assertEqual((payout.status, payout.transaction_reference), ('processing', 'TX-254700000062'))
+
+
+def run_concurrently(fn, n=8):
+    """Run fn in n threads released at the same instant; returns per-thread results/exceptions."""
+    barrier = threading.Barrier(n)
+    results = [None] * n
+
+    def worker(i):
+        try:
+            barrier.wait()
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset_metrics()
+        self.addCleanup(metrics.reset_metrics)
+        self.employer = make_user('0700000091')
+        make_job(self.employer, 'Paint fence')
+        self.api = APIClient()
+        self.api.force_authenticate(self.employer)
+
+    def test_records_latency_queries_and_size_per_url_name(self):
+        response = self.api.get('/api/jobs/')
+        self.assertEqual(response.status_code, 200)
+        self.api.get('/api/no-such-endpoint/')
+        body = self.client.get('/metrics').content.decode()
+        labels = 'endpoint="job_listing_list_create",method="GET"'
+        self.assertIn(f'kazi_request_duration_seconds_count{{{labels}}} 1', body)
+        self.assertIn(f'kazi_request_db_queries_bucket{{{labels},le="0"}} 0', body)
+        self.assertIn(f'kazi_request_db_queries_bucket{{{labels},le="+Inf"}} 1', body)
+        self.assertIn(f'kazi_response_size_bytes_sum{{{labels}}} {len(response.content)}.000000', body)
+        self.assertIn(f'kazi_requests_total{{{labels},status="200"}} 1', body)
+        self.assertIn('kazi_requests_total{endpoint="unmatched",method="GET",status="404"} 1', body)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('h', 'test', (1, 5))
+        for value in (0.5, 1, 3, 9):
+            histogram.observe((('endpoint', 'x'),), value)
+        self.assertEqual(histogram.render()[2:5], [
+            'h_bucket{endpoint="x",le="1"} 2', 'h_bucket{endpoint="x",le="5"} 3', 'h_bucket{endpoint="x",le="+Inf"} 4',
+        ])
+
+    def test_metrics_token_and_slow_request_sampling(self):
+        with self.settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get('/metrics').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        with self.settings(METRICS_SLOW_REQUEST_MS=0.001):
+            self.api.get('/api/jobs/')
+        sample = metrics.slow_requests()[0]
+        self.assertEqual((sample['endpoint'], sample['db_queries']), ('job_listing_list_create', len(sample['queries'])))
+        self.assertIn('product_joblisting', sample['queries'][0]['sql'])
+        admin = make_user('0700000092', is_staff=True)
+        self.api.force_authenticate(admin)
+        self.assertEqual(self.api.get('/api/ops/slow-requests/').data['requests'][0]['path'], '/api/jobs/')
+
+
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        self.employer = make_user('0700000101', first_name='Amina', last_name='Kamau')
+        workers = [
+            make_user('0700000102', user_type='employee', first_name='Otieno'),
+            make_user('0700000103', user_type='employee'),
+            CustomUser.objects.create_user(email=None, password='x', phone_number='0700000104', user_type='employee'),
+        ]
+        self.open_job = make_job(self.employer, 'Paint fence', budget='1500.5')
+        done = make_job(self.employer, 'Fix roof', employee=workers[0], status='completed',
+                        assigned_at=timezone.now(), completed_at=timezone.now(), work_summary='Replaced sheets')
+        make_job(self.employer, 'Weld gate', employee=workers[2], status='assigned', escrow_contract_id='ESCROW_X')
+        for worker in workers:
+            JobApplication.objects.create(job_listing=self.open_job, employee=worker)
+        JobApplication.objects.create(job_listing=done, employee=workers[0], status='accepted')
+        self.api = APIClient()
+        self.api.force_authenticate(self.employer)
+
+    def assertSameJSON(self, fast, drf):
+        render = JSONRenderer().render
+        self.assertEqual(render(fast), render(drf))
+
+    def test_output_matches_drf_serializers(self):
+        jobs = JobListing.objects.order_by('id')
+        applications = JobApplication.objects.order_by('id')
+        for tz in ('UTC', 'Africa/Nairobi'):
+            with timezone.override(tz):
+                self.assertSameJSON(fast_serializers.JOB_LISTING.serialize(jobs),
+                                    JobListingSerializer(jobs, many=True).data)
+                self.assertSameJSON(fast_serializers.JOB_APPLICATION.serialize(applications),
+                                    JobApplicationSerializer(applications, many=True).data)
+
+    def test_list_endpoints_use_a_fixed_number_of_queries(self):
+        with self.assertNumQueries(2):  # ETag fingerprint, listings
+            response = self.api.get('/api/jobs/')
+        self.assertSameJSON(response.data, JobListingSerializer(JobListing.objects.filter(employer=self.employer), many=True).data)
+        with self.assertNumQueries(4):  # ETag fingerprint, job, applications, work histories
+            response = self.api.get(f'/api/jobs/{self.open_job.id}/applicants/')
+        self.assertEqual([a['employee_name'] for a in response.data], ['Otieno', '0700000103@kazi.test', '0700000104'])
+        self.assertEqual(response.data[0]['work_history'][0]['employer_name'], 'Amina Kamau')
+        self.assertEqual(response.data[0]['work_history'][0]['work_summary'], 'Replaced sheets')
+        self.assertEqual(response.data[1]['work_history'], [])
+
+
+class FastJSONRendererTests(TestCase):
+    PAYLOAD = {
+        'amount': Decimal('2500.00'),
+        'at': timezone.make_aware(timezone.datetime(2026, 3, 2, 10, 0, 0, 123456)),  # TIME_ZONE is UTC
+        'day': timezone.datetime(2026, 3, 2).date(),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'note': 'Malipo\u2028ya kazi',
+        'nested': [{1: None, 'ok': True}],
+    }
+
+    def test_orjson_and_fallback_produce_the_same_bytes(self):
+        fast = renderers.FastJSONRenderer().render(self.PAYLOAD)
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.PAYLOAD), fast)
+        self.assertEqual(json.loads(fast), {
+            'amount': '2500.00', 'at': '2026-03-02T10:00:00.123456+00:00', 'day': '2026-03-02',
+            'id': '12345678-1234-5678-1234-567812345678', 'note': 'Malipo\u2028ya kazi', 'nested': [{'1': None, 'ok': True}],
+        })
+        self.assertIn(b'\\u2028', fast)
+
+    def test_parser_rejects_invalid_json_and_nan(self):
+        for module in (renderers.orjson, None):
+            with mock.patch.object(renderers, 'orjson', module):
+                self.assertEqual(renderers.FastJSONParser().parse(io.BytesIO(b'{"a": [1, 2.5]}')), {'a': [1, 2.5]})
+                for body in (b'{"a": NaN}', b'{"a": '):
+                    with self.assertRaises(ParseError):
+                        renderers.FastJSONParser().parse(io.BytesIO(body))
+
+    def test_views_return_raw_values_and_the_renderer_encodes_them(self):
+        employer = make_user('0700000111')
+        escrow = make_escrow(make_job(employer, 'Plaster wall', budget='800.00'))
+        MpesaDeposit.objects.create(escrow_contract=escrow, transaction_reference='MPR1', phone_number='0700',
+                                    amount=Decimal('800.00'), status='completed')
+        api = APIClient()
+        api.force_authenticate(employer)
+        response = api.post('/api/jobs/', {'title': 'Dig trench', 'description': 'x', 'budget': '300'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        row = json.loads(api.get('/api/transactions/').content)[0]
+        self.assertEqual(row['amount'], '800.00')
+        self.assertEqual(row['created_at'], MpesaDeposit.objects.get().created_at.isoformat())
+        self.assertEqual(api.post('/api/jobs/', b'{"budget": NaN}', content_type='application/json').status_code, 400)
+
+
+class ConditionalRequestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employer = make_user('0700000121')
+        self.worker = make_user('0700000122', user_type='employee')
+        self.other = make_user('0700000123', user_type='employee')
+        self.job = make_job(self.employer, 'Paint house', employee=self.worker, status='assigned',
+                            assigned_at=timezone.now())
+        escrow = make_escrow(self.job, status='funded')
+        MpesaDeposit.objects.create(escrow_contract=escrow, transaction_reference='MPC1', phone_number='0700',
+                                    amount=Decimal('1000.00'), status='completed')
+        MobileMoneyPayout.objects.create(escrow_contract=escrow, employee=self.worker, amount=Decimal('1000.00'),
+                                         phone_number='254700000122')
+        JobMessage.objects.create(job_listing=self.job, sender=self.worker, text='On my way')
+        self.open_job = make_job(self.employer, 'Paint gate')
+        JobApplication.objects.create(job_listing=self.open_job, employee=self.worker)
+
+    def api(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_every_list_endpoint_answers_304_with_one_query(self):
+        endpoints = [
+            (self.employer, '/api/jobs/'),
+            (self.worker, '/api/jobs/'),
+            (self.employer, f'/api/jobs/{self.open_job.id}/applicants/'),
+            (self.employer, f'/api/jobs/{self.job.id}/escrow/history/'),
+            (self.employer, '/api/transactions/'),
+            (self.worker, '/api/transactions/'),
+            (self.worker, '/api/employee/my-applications/'),
+            (self.worker, '/api/employee/work-history/'),
+            (self.worker, '/api/employee/recommended-jobs/'),
+            (self.worker, '/api/chats/'),
+            (self.worker, f'/api/jobs/{self.job.id}/messages/'),
+            (self.employer, '/api/employer/workers-overview/'),
+        ]
+        for user, url in endpoints:
+            api = self.api(user)
+            response = api.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn('no-cache', response['Cache-Control'])
+            with self.assertNumQueries(1):
+                cached = api.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual((cached.status_code, cached['ETag']), (304, response['ETag']), url)
+            self.assertEqual(api.get(url, HTTP_IF_NONE_MATCH='W/"stale"').status_code, 200, url)
+        # Per user and per query string
+        etag = self.api(self.employer).get('/api/jobs/')['ETag']
+        self.assertNotEqual(self.api(self.worker).get('/api/jobs/')['ETag'], etag)
+        self.assertNotEqual(self.api(self.employer).get('/api/jobs/?page=1')['ETag'], etag)
+
+    def test_changes_produce_a_new_etag(self):
+        employer, worker = self.api(self.employer), self.api(self.worker)
+        jobs, payouts, chat = (employer.get('/api/jobs/')['ETag'], worker.get('/api/transactions/')['ETag'],
+                               worker.get(f'/api/jobs/{self.job.id}/messages/')['ETag'])
+        self.open_job.title = 'Paint gate and fence'
+        self.open_job.save()
+        self.assertEqual(employer.get('/api/jobs/', HTTP_IF_NONE_MATCH=jobs).status_code, 200)
+        MobileMoneyPayout.objects.update(status='processing')  # no timestamp moves
+        self.assertEqual(worker.get('/api/transactions/', HTTP_IF_NONE_MATCH=payouts).status_code, 200)
+        employer.post(f'/api/jobs/{self.job.id}/messages/', {'text': 'Thanks'}, format='json')
+        self.assertEqual(worker.get(f'/api/jobs/{self.job.id}/messages/', HTTP_IF_NONE_MATCH=chat).status_code, 200)
+
+    def test_fingerprints_follow_applicant_histories_and_the_ranking(self):
+        employer, worker = self.api(self.employer), self.api(self.worker)
+        applicants_url = f'/api/jobs/{self.open_job.id}/applicants/'
+        applicants, overview = employer.get(applicants_url)['ETag'], employer.get('/api/employer/workers-overview/')['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            employer.get(applicants_url, HTTP_IF_NONE_MATCH=applicants)
+        self.assertEqual(queries[0]['sql'].count('JOIN'), 1)  # the job's applications only
+        self.job.status, self.job.completed_at = 'completed', timezone.now()
+        self.job.save()
+        self.assertEqual(employer.get(applicants_url, HTTP_IF_NONE_MATCH=applicants).status_code, 200)
+        self.assertEqual(employer.get('/api/employer/workers-overview/', HTTP_IF_NONE_MATCH=overview).status_code, 200)
+
+        recommended = make_job(self.employer, 'Paint fence')
+        response = worker.get('/api/employee/recommended-jobs/')
+        self.assertEqual([job['id'] for job in response.data], [recommended.id])
+        self.assertEqual(
+            worker.get('/api/employee/recommended-jobs/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+        recommended.status = 'cancelled'
+        recommended.save()
+        self.assertEqual(
+            worker.get('/api/employee/recommended-jobs/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200
+        )
+
+    def test_outsiders_get_the_view_answer_without_validators(self):
+        response = self.api(self.other).get(f'/api/jobs/{self.job.id}/messages/')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(self.api(self.worker).get(f'/api/jobs/{self.open_job.id}/applicants/').status_code, 403)
+
+
+class PayloadSlimmingTests(TestCase):
+    def setUp(self):
+        self.employer = make_user('0700000131', first_name='Wanjiru')
+        self.worker = make_user('0700000132', user_type='employee', first_name='Kip')
+        for n in range(3):
+            make_job(make_user(f'070000014{n}'), f'Old job {n}', employee=self.worker, status='completed',
+                     completed_at=timezone.now(), work_summary='Painted walls and cleaned up ' * 5)
+        self.jobs = [make_job(self.employer, f'Paint room {n}') for n in range(2)]
+        for job in self.jobs:
+            JobApplication.objects.create(job_listing=job, employee=self.worker)
+        self.api = APIClient()
+        self.api.force_authenticate(self.employer)
+
+    def test_large_responses_are_compressed(self):
+        url = '/api/employer/workers-overview/'
+        plain = self.api.get(url)
+        response = self.api.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content))
+        with self.settings(COMPRESSION_MIN_BYTES=10 ** 6):
+            self.assertFalse(self.api.get(url, HTTP_ACCEPT_ENCODING='gzip').has_header('Content-Encoding'))
+        self.assertEqual(compression.choose_encoding('gzip;q=1.0, identity'), 'gzip')
+        self.assertIsNone(compression.choose_encoding(''))
+
+    @skipUnless(compression.brotli, "brotli is not installed")
+    def test_brotli_is_preferred_when_accepted(self):
+        response = self.api.get('/api/employer/workers-overview/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content),
+                         self.api.get('/api/employer/workers-overview/').content)
+
+    def test_normalized_mode_sends_each_history_once(self):
+        full = self.api.get('/api/employer/workers-overview/').data
+        with self.assertNumQueries(5):  # ETag fingerprint, hired, open jobs, applications, histories
+            data = self.api.get('/api/employer/workers-overview/?normalize=1').data
+        histories = data['work_histories']
+        self.assertEqual(list(histories), [self.worker.pk])
+        self.assertEqual(len(histories[self.worker.pk]), 3)
+        for job, full_job in zip(data['open_jobs_with_applicants'], full['open_jobs_with_applicants']):
+            self.assertEqual(job['applicant_count'], 1)
+            self.assertNotIn('work_history', job['applicants'][0])
+            self.assertEqual(histories[job['applicants'][0]['employee_id']], full_job['applicants'][0]['work_history'])
+        applicants = self.api.get(f'/api/jobs/{self.jobs[0].id}/applicants/?normalize=1').data
+        self.assertEqual(applicants['work_histories'][self.worker.pk][0]['employer_name'], '0700000142@kazi.test')  # latest first
+
+    def test_sparse_fields(self):
+        self.assertEqual(payloads.parse_fields('a, b.c,b.d,e.f,e'), {'a': None, 'b': {'c': None, 'd': None}, 'e': None})
+        with self.assertNumQueries(4):  # no work history query
+            data = self.api.get('/api/employer/workers-overview/?fields=job_id,applicants.employee_name').data
+        self.assertEqual(data['open_jobs_with_applicants'][0], {'job_id': self.jobs[0].id, 'applicants': [{'employee_name': 'Kip'}]})
+        self.assertEqual(data['hired_workers'], [])
+        rows = self.api.get(f'/api/jobs/{self.jobs[0].id}/applicants/?fields=employee,status').data
+        self.assertEqual(rows, [{'employee': self.worker.pk, 'status': 'pending'}])
+        self.assertEqual(set(self.api.get('/api/jobs/?fields=id,title').data[0]), {'id', 'title'})
+
+    def test_sparse_fields_in_normalized_mode(self):
+        url = f'/api/jobs/{self.jobs[0].id}/applicants/'
+        with self.assertNumQueries(3):  # ETag fingerprint, job, applications: no work history query
+            data = self.api.get(url, {'normalize': 1, 'fields': 'applicants.employee_name'}).data
+        self.assertEqual(data, {'applicants': [{'employee_name': 'Kip'}], 'work_histories': {}})
+        data = self.api.get(url, {'normalize': 1, 'fields': 'applicants.employee,work_histories'}).data
+        self.assertEqual(data['applicants'], [{'employee': self.worker.pk}])
+        self.assertEqual(len(data['work_histories'][self.worker.pk]), 3)
+        data = self.api.get('/api/employer/workers-overview/', {'normalize': 1, 'fields': 'job_id,work_histories'}).data
+        self.assertEqual(data['open_jobs_with_applicants'][0], {'job_id': self.jobs[0].id})
+        self.assertEqual(list(data['work_histories']), [self.worker.pk])
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        circuit_breaker.reset_breakers()
+        metrics.reset_metrics()
+        self.stub = StubUpstream()
+        self.stellar = StellarEscrowClient(service_url=self.stub.url, use_python=False)
+        self.intersend = IntersendClient(api_url=self.stub.url)
+        for p in (mock.patch('product.escrow_service.get_stellar_client', return_value=self.stellar),
+                  mock.patch('product.escrow_service.get_intersend_client', return_value=self.intersend)):
+            p.start()
+            self.addCleanup(p.stop)
+        self.employer = make_user('0700000301')
+        self.worker = make_user('0700000302', user_type='employee', stellar_account_id='G' * 56)
+        self.job = make_job(self.employer, 'Harvest', employee=self.worker, status='assigned')
+        self.escrow = make_escrow(self.job, status='funded', employee=self.worker, chain_status='created')
+        self.api = APIClient()
+        self.api.force_authenticate(self.employer)
+
+    def tearDown(self):
+        self.stub.close()
+        circuit_breaker.reset_breakers()
+
+    def test_completes_over_asgi(self):
+        token = RefreshToken.for_user(self.employer).access_token
+        resp = async_to_sync(AsyncClient().post)(
+            f'/api/jobs/{self.job.id}/complete/', {'work_summary': ' Picked 40 crates '},
+            content_type='application/json', headers={'Authorization': f'Bearer {token}'},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual((resp.json()['escrow_status'], resp.json()['payout_status']), ('released', 'processing'))
+        self.assertEqual(self.stub.hits, 2)  # release, then payout
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.work_summary), ('completed', 'Picked 40 crates'))
+        payout = MobileMoneyPayout.objects.get()
+        self.assertEqual(payout.transaction_reference, 'TX-254700000302')
+
+        # Async middleware: timed, but its queries run in threads it can't count
+        labels = (('endpoint', 'complete_work'), ('method', 'POST'))
+        self.assertEqual(metrics.REQUEST_SECONDS.snapshot()[labels]['count'], 1)
+        self.assertNotIn(labels, metrics.DB_QUERIES.snapshot())
+
+    def test_same_errors_as_drf_views(self):
+        self.assertEqual(APIClient().post(f'/api/jobs/{self.job.id}/complete/').status_code, 401)
+        self.assertEqual(self.api.post('/api/jobs/999999/complete/').status_code, 404)
+        self.assertEqual(self.api.get(f'/api/jobs/{self.job.id}/complete/').status_code, 405)
+        other = APIClient()
+        other.force_authenticate(make_user('0700000303'))
+        resp = other.post(f'/api/jobs/{self.job.id}/complete/', {}, format='json')
+        self.assertEqual(resp.json(), {"error": "Only the employer can mark work as complete"})
+        open_job = make_job(self.employer, 'Weeding')
+        make_escrow(open_job, status='funded')
+        self.assertEqual(self.api.post(f'/api/jobs/{open_job.id}/complete/', {}, format='json').status_code, 400)
+        resp = self.api.post(f'/api/jobs/{self.job.id}/complete/', 'done', content_type='text/plain')
+        self.assertEqual(resp.status_code, 415)
+        resp = self.api.post(f'/api/jobs/{self.job.id}/complete/', '{"work_summary":', content_type='application/json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(self.stub.hits, 0)
+
+    def test_failed_release_rolls_back(self):
+        with mock.patch.object(self.stellar, 'arelease_escrow_contract', mock.AsyncMock(return_value=False)):
+            resp = self.api.post(f'/api/jobs/{self.job.id}/complete/', {}, format='json')
+        self.assertEqual(resp.status_code, 500)
+        self.job.refresh_from_db()
+        self.escrow.refresh_from_db()
+        self.assertEqual((self.job.status, self.escrow.status), ('assigned', 'funded'))
+        self.assertFalse(MobileMoneyPayout.objects.exists())
+
+
+TEST_RATE_LIMITS = {
+    'auth': {'rate': '1/min', 'burst': 2, 'key': 'ip'},
+    'ussd': {'rate': '1/min', 'burst': 1, 'key': 'phone'},
+    'webhooks': {'rate': '1/min', 'burst': 5, 'key': 'ip', 'shed_at': 10},
+    'reads': {'rate': '1/min', 'burst': 1, 'key': 'user', 'shed_at': 4},
+}
+
+
+@override_settings(RATE_LIMIT_ENABLED=True, RATE_LIMITS=TEST_RATE_LIMITS)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def bearer(self, user):
+        return {'HTTP_AUTHORIZATION': f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    def test_token_bucket(self):
+        rate = ratelimit.parse_rate('60/min')
+        self.assertEqual(rate, 1.0)
+        self.assertEqual([ratelimit.take('t', 'k', rate, 2, now=100.0) for _ in range(2)], [0, 0])
+        self.assertAlmostEqual(ratelimit.take('t', 'k', rate, 2, now=100.0), 1.0)
+        self.assertAlmostEqual(ratelimit.take('t', 'k', rate, 2, now=100.25), 0.75)
+        self.assertEqual(ratelimit.take('t', 'k', rate, 2, now=101.0), 0)
+        self.assertEqual(ratelimit.take('t', 'other', rate, 2, now=101.0), 0)
+
+    def test_auth_limited_per_ip(self):
+        login = lambda ip: self.client.post('/api/auth/login/', {'email': 'x@kazi.test', 'password': 'nope'},  # noqa: E731
+                                            content_type='application/json', REMOTE_ADDR=ip)
+        self.assertEqual([login('10.0.0.1').status_code for _ in range(3)], [400, 400, 429])
+        resp = login('10.0.0.1')
+        self.assertEqual((resp.status_code, resp['Retry-After']), (429, '60'))
+        self.assertEqual(resp.json(), {"detail": "Too many requests."})
+        self.assertEqual(login('10.0.0.2').status_code, 400)
+        with override_settings(RATE_LIMIT_PROXY_HOPS=1):
+            resp = self.client.post('/api/auth/login/', {}, content_type='application/json',
+                                    REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='10.9.9.9')
+            self.assertEqual(resp.status_code, 400)
+
+    def test_ussd_limited_per_phone(self):
+        dial = lambda phone: self.client.post('/api/ussd/', {'sessionId': f'S-{phone}', 'phoneNumber': phone,  # noqa: E731
+                                                             'text': ''})
+        self.assertEqual(dial('+254700000401').status_code, 200)
+        resp = dial('+254700000401')
+        self.assertEqual(resp.status_code, 429)
+        self.assertTrue(resp.content.startswith(b'END '))
+        self.assertEqual(dial('+254700000402').status_code, 200)  # same gateway IP, other subscriber
+
+    def test_reads_limited_per_user(self):
+        employer, other = make_user('0700000411'), make_user('0700000412')
+        self.assertEqual(self.client.get('/api/jobs/', **self.bearer(employer)).status_code, 200)
+        self.assertEqual(self.client.get('/api/jobs/', **self.bearer(employer)).status_code, 429)
+        self.assertEqual(self.client.get('/api/jobs/', **self.bearer(other)).status_code, 200)
+        # Bad tokens fall back to the client IP (the view then answers 401)
+        self.assertEqual(self.client.get('/api/jobs/', HTTP_AUTHORIZATION='Bearer junk').status_code, 401)
+        self.assertEqual(self.client.get('/api/jobs/', HTTP_AUTHORIZATION='Bearer junk').status_code, 429)
+        # Unlisted classes ('writes' here) are not limited
+        self.assertEqual(self.client.post('/api/jobs/', {}, content_type='application/json').status_code, 401)
+
+    def test_rejected_requests_are_labelled_by_endpoint(self):
+        metrics.reset_metrics()
+        self.addCleanup(metrics.reset_metrics)
+        self.assertEqual([self.client.get('/api/jobs/').status_code for _ in range(2)], [401, 429])
+        body = metrics.render()
+        self.assertIn('kazi_requests_total{endpoint="job_listing_list_create",method="GET",status="429"} 1', body)
+        self.assertNotIn('endpoint="unmatched"', body)
+
+    def test_sheds_under_load(self):
+        with mock.patch.object(ratelimit, '_in_flight', 4):
+            resp = self.client.get('/api/jobs/')
+            self.assertEqual((resp.status_code, resp['Retry-After']), (503, '1'))
+            # Webhooks are shed later than reads
+            resp = self.client.post('/api/callbacks/mpesa/deposit/', {}, content_type='application/json')
+            self.assertNotEqual(resp.status_code, 503)
+
+        stale = f"t={timezone.now().timestamp() - 5:.3f}"
+        with override_settings(RATE_LIMIT_MAX_QUEUE_MS=2000):
+            self.assertEqual(self.client.get('/api/jobs/', HTTP_X_REQUEST_START=stale).status_code, 503)
+            self.assertEqual(self.client.get('/api/jobs/').status_code, 401)
+
+    def test_async_middleware(self):
+        employer = make_user('0700000413')
+        headers = {'Authorization': f"Bearer {RefreshToken.for_user(employer).access_token}"}
+        get = async_to_sync(AsyncClient().get)
+        self.assertEqual(get('/api/jobs/', headers=headers).status_code, 200)
+        self.assertEqual(get('/api/jobs/', headers=headers).status_code, 429)
+        self.assertEqual(ratelimit._in_flight, 0)
+
+
+class ArchivalTests(TestCase):
+    def setUp(self):
+        self.employer = make_user('0700000501')
+        self.worker = make_user('0700000502', user_type='employee')
+        self.old = timezone.now() - timezone.timedelta(days=400)
+
+    def session(self, n, old=True):
+        session = USSDTransaction.objects.create(session_id=f'AT-{n}', phone_number='+254700000502', text='1*2')
+        if old:
+            USSDTransaction.objects.filter(pk=session.pk).update(created_at=self.old, updated_at=self.old)
+        return session
+
+    def chat(self, status, old=True, messages=2):
+        job = make_job(self.employer, f'{status} job', employee=self.worker, status=status)
+        for i in range(messages):
+            JobMessage.objects.create(job_listing=job, sender=self.worker if i % 2 else self.employer, text=f'msg {i}')
+        if old:
+            JobListing.objects.filter(pk=job.pk).update(updated_at=self.old)
+        return job
+
+    def test_moves_closed_ussd_sessions_in_chunks(self):
+        closed = [self.session(1), self.session(2)]
+        live = self.session(3, old=False)
+        self.assertEqual(archival.archive_ussd_sessions(chunk_size=1, max_chunks=1), 1)
+        self.assertEqual(archival.archive_ussd_sessions(chunk_size=1), 1)
+        self.assertEqual(list(USSDTransaction.objects.values_list('pk', flat=True)), [live.pk])
+        archived = ArchivedUSSDTransaction.objects.order_by('pk')
+        self.assertEqual([a.pk for a in archived], [s.pk for s in closed])
+        self.assertEqual((archived[0].session_id, archived[0].text, archived[0].updated_at), ('AT-1', '1*2', self.old))
+
+    def test_finished_jobs_serve_archived_messages(self):
+        done, cancelled = self.chat('completed'), self.chat('cancelled', messages=1)
+        recent, active = self.chat('completed', old=False), self.chat('assigned')
+        self.assertEqual(archival.archive_job_messages(chunk_size=2), 3)
+        self.assertEqual(set(ArchivedJobMessage.objects.values_list('job_listing', flat=True)), {done.pk, cancelled.pk})
+        self.assertEqual(JobMessage.objects.filter(job_listing__in=[recent, active]).count(), 4)
+
+        api = APIClient()
+        api.force_authenticate(self.employer)
+        api.post(f'/api/jobs/{done.id}/messages/', {'text': 'Thanks again'}, format='json')
+        resp = api.get(f'/api/jobs/{done.id}/messages/')
+        self.assertEqual([m['text'] for m in resp.json()], ['msg 0', 'msg 1', 'Thanks again'])
+        self.assertEqual([m['is_mine'] for m in resp.json()], [True, False, True])
+
+    def test_archive_to_files(self):
+        sessions = [self.session(n) for n in range(3)]
+        job = self.chat('completed')
+        with tempfile.TemporaryDirectory() as directory, override_settings(ARCHIVE_DIR=directory):
+            out = io.StringIO()
+            call_command('archive_data', '--to', 'files', '--chunk-size', '2', stdout=out)
+            self.assertIn('Archived 3 USSD session(s) to files', out.getvalue())
+            files = sorted(os.listdir(os.path.join(directory, 'ussd_sessions')))
+            self.assertEqual(len(files), 2)
+            with gzip.open(os.path.join(directory, 'ussd_sessions', files[0]), 'rt') as f:
+                rows = [json.loads(line) for line in f]
+            self.assertEqual([r['id'] for r in rows], [s.pk for s in sessions[:2]])
+            self.assertEqual(rows[0]['session_id'], 'AT-0')
+            self.assertEqual(len(os.listdir(os.path.join(directory, 'job_messages'))), 1)
+        self.assertFalse(USSDTransaction.objects.exists())
+        self.assertFalse(JobMessage.objects.filter(job_listing=job).exists())
+        self.assertFalse(ArchivedJobMessage.objects.exists())
+
+    def test_partition_months(self):
+        utc = timezone.get_fixed_timezone(0)
+        months = archival.months_between(timezone.datetime(2025, 11, 30, 23, tzinfo=utc),
+                                         timezone.datetime(2026, 1, 1, tzinfo=utc))
+        self.assertEqual([(m.year, m.month) for m in months], [(2025, 11), (2025, 12), (2026, 1)])
+        if connection.vendor != 'postgresql':
+            self.assertEqual(archival.drop_partitions(ArchivedJobMessage, timezone.now()), [])
+
+
+    @skipUnless(connection.vendor == 'postgresql', "archive partitioning is Postgres only")
+    def test_chunk_across_a_month_boundary_fills_two_partitions(self):
+        utc = timezone.get_fixed_timezone(0)
+        for n, moment in enumerate((timezone.datetime(2025, 1, 31, 23, tzinfo=utc),
+                                    timezone.datetime(2025, 2, 1, 1, tzinfo=utc))):
+            session = self.session(n)
+            USSDTransaction.objects.filter(pk=session.pk).update(created_at=moment, updated_at=moment)
+        self.assertEqual(archival.archive_ussd_sessions(chunk_size=2, max_chunks=1), 2)
+        table = ArchivedUSSDTransaction._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT tableoid::regclass::text FROM {table} ORDER BY id")
+            self.assertEqual([row[0] for row in cursor.fetchall()], [f'{table}_p202501', f'{table}_p202502'])
+
+        dropped = archival.drop_partitions(ArchivedUSSDTransaction, timezone.datetime(2025, 2, 1, tzinfo=utc))
+        self.assertEqual(dropped, [f'{table}_p202501'])
+        self.assertEqual(list(ArchivedUSSDTransaction.objects.values_list('session_id', flat=True)), ['AT-1'])
+
+class BenchmarkSuiteTests(TestCase):
+    SCALE = {'employers': 3, 'workers': 6, 'jobs': 30, 'applications': 40, 'messages': 20, 'deposits': 10}
+
+    def test_seed_is_deterministic_and_consistent(self):
+        counts = seeding.seed(self.SCALE, seed=7)
+        self.assertEqual((counts['jobs'], counts['messages']), (30, 20))
+        self.assertEqual(JobApplication.objects.count(), counts['applications'])
+        titles = list(JobListing.objects.order_by('id').values_list('title', flat=True))
+        self.assertEqual(
+            EscrowContract.objects.filter(job_listing__status='completed').exclude(status='released').count(), 0
+        )
+        self.assertEqual(MobileMoneyPayout.objects.exclude(escrow_contract__status='released').count(), 0)
+        self.assertTrue(self.client.login(email=CustomUser.objects.first().email, password=seeding.SEED_PASSWORD))
+
+        seeding.seed(self.SCALE, seed=7)
+        self.assertEqual(list(JobListing.objects.order_by('id').values_list('title', flat=True))[30:], titles)
+
+    def test_seed_scale_command_shapes_the_data(self):
+        out = io.StringIO()
+        call_command('seed_scale', '--employers', '4', '--workers', '40', '--jobs', '200', '--applications', '1000',
+                     '--messages', '150', '--deposits', '30', '--chunk-size', '64', '--applicant-skew', '1.3', stdout=out)
+        self.assertIn('200 jobs', out.getvalue())
+        self.assertEqual((JobMessage.objects.count(), MpesaDeposit.objects.count()), (150, 30))
+        per_job = sorted(JobListing.objects.annotate(n=Count('applications')).values_list('n', flat=True))
+        self.assertGreater(per_job[-1], 4 * per_job[len(per_job) // 2])  # a few popular jobs
+        self.assertGreater(JobListing.objects.dates('created_at', 'month').count(), 3)
+        self.assertTrue(JobListing._meta.get_field('created_at').auto_now_add)  # restored afterwards
+
+    def test_scenarios_run_through_the_client(self):
+        seeding.seed(self.SCALE, seed=1)
+        scenarios = {s.name: s for s in benchmarks.build_scenarios()}
+        for name in ('transactions', 'ussd_callback', 'paystack_deposit_callback'):
+            stats = benchmarks.run_scenario(benchmarks.ClientDriver, scenarios[name], iterations=4, warmup=1)
+            self.assertEqual((stats['requests'], stats['errors']), (4, 0), name)
+            self.assertGreater(stats['queries_per_request'], 0)
+
+    def test_compare_flags_slower_or_chattier_endpoints(self):
+        def report(p50, queries):
+            return {'results': {'client': {'transactions': {
+                'latency_ms': {'p50': p50}, 'queries_per_request': queries, 'errors': 0,
+            }}}}
+        self.assertEqual(benchmarks.compare(report(10, 3), report(11, 3)), [])
+        self.assertEqual(len(benchmarks.compare(report(10, 3), report(13, 4))), 2)
+        self.assertEqual(benchmarks.percentile([1, 2, 3, 4], 50), 2)
+
+
+@mock.patch('product.escrow_service.get_intersend_client')
+@mock.patch('product.escrow_service.get_stellar_client')
+class EscrowTransitionTests(TransactionTestCase):
+    def setUp(self):
+        self.employer = make_user('0700000021')
+        self.worker = make_user('0700000022', user_type='employee', stellar_account_id='G' * 56)
+        self.job = make_job(self.employer, 'Roofing', budget='4000.00')
+        self.escrow = make_escrow(self.job)
+
+    def assign_and_fund(self):
+        escrow_service.assign_job(self.job, self.worker)
+        escrow_service.fund_escrow(self.escrow, Decimal('4000.00'))
+
+    def test_assign_keeps_funded_escrow_funded(self, stellar, intersend):
+        escrow_service.fund_escrow(self.escrow, Decimal('4000.00'))
+        escrow_service.assign_job(self.job, self.worker)
+        self.escrow.refresh_from_db()
+        self.assertEqual((self.escrow.status, self.escrow.employee_id), ('funded', self.worker.id))
+
+    def test_repeat_funding_is_a_noop(self, stellar, intersend):
+        self.assertTrue(escrow_service.fund_escrow(self.escrow, Decimal('4000.00')))
+        self.assertFalse(escrow_service.fund_escrow(self.escrow, Decimal('4000.00')))
+        self.assertEqual(stellar.return_value.fund_escrow_contract.call_count, 1)
+
+    def test_concurrent_funding_calls_stellar_once(self, stellar, intersend):
+        results = run_concurrently(lambda: escrow_service.fund_escrow(self.escrow, Decimal('4000.00')))
+        self.assertEqual(results.count(True), 1, results)
+        self.assertEqual(stellar.return_value.fund_escrow_contract.call_count, 1)
+        self.escrow.refresh_from_db()
+        self.assertEqual(self.escrow.status, 'funded')
+
+    def test_concurrent_completion_releases_and_pays_once(self, stellar, intersend):
+        intersend.return_value.send_mobile_money.return_value = {'transaction_id': 'TX1'}
+        self.assign_and_fund()
+        results = run_concurrently(lambda: escrow_service.complete_work(self.job, work_summary='Fixed roof'))
+        self.assertEqual(sum(1 for r in results if isinstance(r, tuple)), 1, results)
+        self.assertEqual(stellar.return_value.release_escrow_contract.call_count, 1)
+        self.assertEqual(intersend.return_value.send_mobile_money.call_count, 1)
+        payout = MobileMoneyPayout.objects.get()
+        # Accepted, not settled: the poller or status callback completes it
+        self.assertEqual((payout.status, payout.phone_number), ('processing', '254700000022'))
+        self.assertIsNotNone(payout.next_check_at)
+        self.escrow.refresh_from_db()
+        self.assertEqual(self.escrow.status, 'released')
+
+    def test_webhook_deposit_calls_stellar_after_commit(self, stellar, intersend):
+        def fund_escrow_contract(**kwargs):
+            # Nothing held open: the deposit and the processed event are already committed
+            self.assertFalse(connection.in_atomic_block)
+            self.assertEqual(WebhookEvent.objects.get().status, 'processed')
+            self.assertTrue(MpesaDeposit.objects.exists())
+            return True
+        stellar.return_value.fund_escrow_contract.side_effect = fund_escrow_contract
+        webhooks.ingest('mpesa', 'MPX1', {"TransID": "MPX1", "TransAmount": "4000.00",
+                                          "BillRefNumber": self.escrow.contract_id, "MSISDN": "254700000021"})
+        self.assertEqual(webhooks.process_pending(), 1)
+        self.assertEqual(stellar.return_value.fund_escrow_contract.call_count, 1)
+        self.assertFalse(DeferredOperation.objects.exists())
+
+    def test_failed_release_rolls_back_to_funded(self, stellar, intersend):
+        stellar.return_value.release_escrow_contract.return_value = False
+        self.assign_and_fund()
+        with self.assertRaises(escrow_service.ReleaseError):
+            escrow_service.complete_work(self.job)
+        self.escrow.refresh_from_db()
+        self.job.refresh_from_db()
+        self.assertEqual((self.escrow.status, self.job.status), ('funded', 'assigned'))
+        self.assertFalse(MobileMoneyPayout.objects.exists())
+
+
+class SQLiteTuningTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_new_connections_use_wal_and_busy_timeout(self):
+        connection.ensure_connection()
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), 20000)
+
+    def test_pragmas_follow_settings(self):
+        with self.settings(SQLITE_PRAGMAS={'cache_size': -1000, 'mmap_size': None}):
+            tuned = sqlite_tuning.pragmas()
+            self.assertEqual((tuned['cache_size'], tuned['journal_mode']), (-1000, 'WAL'))
+            self.assertNotIn('mmap_size', tuned)
+            self.assertEqual(sqlite_tuning.apply_pragmas(connection, {'cache_size': tuned['cache_size']}),
+                             {'cache_size': -1000})
+        self.assertEqual(self.pragma('cache_size'), -1000)
+        with self.settings(SQLITE_PRAGMAS=None):
+            self.assertEqual(sqlite_tuning.pragmas(), {})
+        sqlite_tuning.apply_pragmas(connection, {'cache_size': sqlite_tuning.pragmas()['cache_size']})
+        self.assertEqual(self.pragma('cache_size'), sqlite_tuning.DEFAULT_PRAGMAS['cache_size'])
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    def load_settings(self, **env):
+        with mock.patch.dict(os.environ, env):
+            return runpy.run_path(os.path.join(settings.BASE_DIR, 'backend', 'settings.py'))['DATABASES']
+
+    def test_postgres_profile_from_environment(self):
+        self.assertEqual(self.load_settings()['default']['ENGINE'], 'django.db.backends.sqlite3')
+        dbs = self.load_settings(KAZI_DB='postgres', PGHOST='db1', POSTGRES_REPLICA_HOST='db2', DB_CONN_MAX_AGE='120')
+        self.assertEqual((dbs['default']['HOST'], dbs['replica']['HOST']), ('db1', 'db2'))
+        self.assertEqual((dbs['default']['CONN_MAX_AGE'], dbs['default']['CONN_HEALTH_CHECKS']), (120, True))
+        self.assertEqual(dbs['replica']['TEST'], {'MIRROR': 'default'})
+        self.assertTrue(self.load_settings(KAZI_DB='postgres', KAZI_DB_POOL='pgbouncer')['default']['DISABLE_SERVER_SIDE_CURSORS'])
+        native = self.load_settings(KAZI_DB='postgres', KAZI_DB_POOL='native')['default']
+        self.assertEqual((native['CONN_MAX_AGE'], native['OPTIONS']['pool']['max_size']), (0, 10))
+
+    def test_router_sends_opted_in_reads_to_replica(self):
+        router = ReplicaRouter()
+        with read_replica():
+            self.assertIsNone(router.db_for_read(JobListing))  # no replica configured
+        with mock.patch.dict(settings.DATABASES, {'replica': {}}):
+            self.assertIsNone(router.db_for_read(JobListing))
+            with read_replica():
+                self.assertEqual((router.db_for_read(JobListing), router.db_for_write(JobListing)), ('replica', 'default'))
+            self.assertEqual(read_db(), 'replica')
+            self.assertFalse(router.allow_migrate('replica', 'product'))
+
+
+class MoneyPropertyTests(SimpleTestCase):
+    """Randomised round-trip properties (fixed seed so failures reproduce)."""
+    EXAMPLES = 2000
+
+    def setUp(self):
+        self.rng = random.Random(20261019)
+
+    def random_money(self, currency=None):
+        currency = currency or self.rng.choice(sorted(CURRENCY_EXPONENTS))
+        magnitude = self.rng.choice([10, 10 ** 4, 10 ** 9, 10 ** 15])
+        return Money(self.rng.randint(-magnitude, magnitude), currency)
+
+    def test_minor_units_round_trip(self):
+        for _ in range(self.EXAMPLES):
+            m = self.random_money()
+            self.assertEqual(Money.from_minor(m.to_minor(), m.currency), m)
+            self.assertEqual(Money.from_decimal(m.amount, m.currency), m)
+
+    def test_string_round_trip(self):
+        for _ in range(self.EXAMPLES):
+            m = self.random_money()
+            self.assertEqual(Money.parse(str(m), m.currency), m)
+            self.assertEqual(len(str(m).partition('.')[2]), m.exponent)
+
+    def test_stroops_round_trip(self):
+        for _ in range(self.EXAMPLES):
+            m = self.random_money('KES')
+            self.assertEqual(Money.from_stroops(m.to_stroops(), 'KES'), m)
+            self.assertEqual(Money.from_stroops(m.to_stroops(), 'XLM').to_stroops(), m.to_stroops())
+
+    def test_float_input_parses_as_written(self):
+        for _ in range(self.EXAMPLES):
+            m = self.random_money('NGN')
+            if abs(m.minor) < 10 ** 13:
+                self.assertEqual(Money.parse(float(str(m)), 'NGN'), m)
+
+    def test_addition_matches_minor_units(self):
+        for _ in range(self.EXAMPLES):
+            a, b = self.random_money('KES'), self.random_money('KES')
+            self.assertEqual((a + b).minor, a.minor + b.minor)
+            self.assertEqual((a + b - b), a)
+
+    def test_money_field_round_trip(self):
+        field = MoneyField(max_digits=20)
+        for _ in range(self.EXAMPLES):
+            m = self.random_money('KES')
+            self.assertEqual(field.to_representation(field.to_internal_value(str(m))), str(m))
+
+    def test_rounding_and_errors(self):
+        self.assertEqual(Money.parse('0.005').minor, 1)
+        self.assertEqual(Money.parse('1,250.10').to_minor(), 125010)
+        self.assertEqual(Money.parse('0.1').to_stroops(), 1_000_000)
+        with self.assertRaises(MoneyError):
+            Money.parse('abc')
+        with self.assertRaises(MoneyError):
+            Money.zero('KES') + Money.zero('NGN')
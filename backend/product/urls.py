@@ -3,16 +3,31 @@ from .views import (
     UserRegistrationView, UserLoginView,
     ussd_registration_callback,
     JobListingListCreateView, JobListingDetailView,
-    mpesa_deposit_callback, paystack_deposit_callback,
-    complete_work, apply_to_job, withdraw_application, job_applicants,
-    initiate_paystack, job_escrow, transactions,
-    employer_workers_overview,
+    mpesa_deposit_callback, paystack_deposit_callback, intersend_payout_callback, webhook_backlog, upstream_health,
+    slow_requests,
+    bulk_complete_work, apply_to_job, withdraw_application, job_applicants,
+    initiate_paystack, job_escrow, job_escrow_history, transactions, export_transactions, export_work_history,
+    employer_workers_overview, employer_summary, employee_summary,
     my_applications,
     employee_work_history,
+    recommended_jobs,
     job_messages,
     my_chats,
 )
 from .ussd import ussd_handler
+from . import async_views
+
+# Rate limit class per URL name (budgets in settings.RATE_LIMITS, see product/ratelimit.py).
+# Names not listed are 'reads' for GET/HEAD and 'writes' for other methods.
+RATE_LIMIT_CLASSES = {
+    'register': 'auth',
+    'login': 'auth',
+    'ussd_callback': 'ussd',
+    'ussd_register_callback': 'ussd',
+    'mpesa_deposit_callback': 'webhooks',
+    'paystack_deposit_callback': 'webhooks',
+    'intersend_payout_callback': 'webhooks',
+}
 
 urlpatterns = [
     # Authentication
@@ -31,19 +46,30 @@ urlpatterns = [
     path('jobs/<int:job_id>/applicants/', job_applicants, name='job_applicants'),
     path('jobs/<int:job_id>/initiate-paystack/', initiate_paystack, name='initiate_paystack'),
     path('jobs/<int:job_id>/escrow/', job_escrow, name='job_escrow'),
-    path('jobs/<int:job_id>/complete/', complete_work, name='complete_work'),
+    path('jobs/<int:job_id>/escrow/history/', job_escrow_history, name='job_escrow_history'),
+    path('jobs/<int:job_id>/complete/', async_views.complete_work, name='complete_work'),
+    path('jobs/bulk-complete/', bulk_complete_work, name='bulk_complete_work'),
     
     # Transactions
     path('transactions/', transactions, name='transactions'),
+    path('transactions/export/<str:fmt>/', export_transactions, name='export_transactions'),
     # Employee my applications
     path('employee/my-applications/', my_applications, name='my_applications'),
     path('employee/work-history/', employee_work_history, name='employee_work_history'),
+    path('employee/work-history/export/<str:fmt>/', export_work_history, name='export_work_history'),
+    path('employee/recommended-jobs/', recommended_jobs, name='recommended_jobs'),
+    path('employee/summary/', employee_summary, name='employee_summary'),
     path('chats/', my_chats, name='my_chats'),
     path('jobs/<int:job_id>/messages/', job_messages, name='job_messages'),
     # Employer Find Workers
     path('employer/workers-overview/', employer_workers_overview, name='employer_workers_overview'),
+    path('employer/summary/', employer_summary, name='employer_summary'),
     
     # Payment callbacks
     path('callbacks/mpesa/deposit/', mpesa_deposit_callback, name='mpesa_deposit_callback'),
     path('callbacks/paystack/deposit/', paystack_deposit_callback, name='paystack_deposit_callback'),
+    path('callbacks/intersend/payout/', intersend_payout_callback, name='intersend_payout_callback'),
+    path('ops/webhooks/', webhook_backlog, name='webhook_backlog'),
+    path('ops/upstreams/', upstream_health, name='upstream_health'),
+    path('ops/slow-requests/', slow_requests, name='slow_requests'),
 ]
\ No newline at end of file
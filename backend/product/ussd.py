@@ -3,6 +3,7 @@ from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from .models import CustomUser, USSDTransaction, Task
+from .money import Money
 import json
 import logging
 
@@ -334,7 +335,7 @@ User Type: {user.user_type}"""
             return "CON Enter task budget (KSh):"
         
         try:
-            price = float(inputs[2])
+            price = Money.parse(inputs[2]).amount
             
             # Create task
             task = Task.objects.create(
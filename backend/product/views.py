@@ -1,27 +1,30 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.decorators import api_view, permission_classes
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q
 from django.conf import settings
-from django.http import HttpResponse, HttpResponseBadRequest
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.decorators import method_decorator
 import hmac
 import hashlib
 import json
-import uuid
 import logging
 
-from .models import CustomUser, JobListing, EscrowContract, MpesaDeposit, MobileMoneyPayout, JobApplication, PaystackDeposit, JobMessage
+from .models import CustomUser, JobListing, EscrowContract, JobApplication, JobMessage
 from .serializers import (
     UserRegistrationSerializer, EmailPasswordLoginSerializer,
     JobListingSerializer, JobListingCreateSerializer, EscrowContractSerializer,
-    JobApplicationSerializer,
 )
-from .stellar_integration import get_stellar_client
-from .mobile_money_integration import get_intersend_client
+from .matching import recommend_jobs, invalidate_worker
+from . import webhooks, escrow_service, retry_queue, escrow_cache, rollups, exports, escrow_events, metrics, fast_serializers, conditional, payloads, archival
+from .circuit_breaker import breaker_states
+from .db_router import replica_reads, read_db
+from .money import Money
 from rest_framework_simplejwt.tokens import RefreshToken
 
 logger = logging.getLogger(__name__)
@@ -29,25 +32,28 @@ logger = logging.getLogger(__name__)
 
 def get_employee_work_history(employee):
     """Return verified work history for an employee (completed jobs) for employer trust."""
+    return get_employee_work_histories([employee.pk])[employee.pk]
+
+
+def get_employee_work_histories(employee_ids):
+    """Work history (as get_employee_work_history) for several employees in one query: {id: [...]}."""
+    histories = {pk: [] for pk in employee_ids}
     completed = JobListing.objects.filter(
-        employee=employee, status='completed'
-    ).select_related('employer').order_by('-completed_at')
-    out = []
-    for j in completed:
-        start = j.assigned_at or j.created_at
-        end = j.completed_at
-        duration_days = 0
-        if start and end:
-            delta = end - start
-            duration_days = getattr(delta, 'days', 0) if hasattr(delta, 'days') else 0
-        out.append({
-            "job_title": j.title,
-            "employer_name": j.employer.get_full_name() if j.employer else None,
-            "completed_at": j.completed_at.isoformat() if j.completed_at else None,
-            "duration_days": duration_days,
-            "work_summary": j.work_summary or None,
+        employee_id__in=histories, status='completed'
+    ).order_by('-completed_at').values_list(
+        'employee_id', 'title', 'employer_id', 'employer__first_name', 'employer__last_name', 'employer__email',
+        'employer__phone_number', 'assigned_at', 'created_at', 'completed_at', 'work_summary',
+    )
+    for employee_id, title, employer_id, first, last, email, phone, assigned_at, created_at, end, summary in completed:
+        start = assigned_at or created_at
+        histories[employee_id].append({
+            "job_title": title,
+            "employer_name": fast_serializers.full_name(first, last, email, phone) if employer_id else None,
+            "completed_at": end,
+            "duration_days": (end - start).days if start and end else 0,
+            "work_summary": summary or None,
         })
-    return out
+    return histories
 
 
 # ==================== USER REGISTRATION & AUTHENTICATION ====================
@@ -170,6 +176,9 @@ class JobListingListCreateView(APIView):
     """List all job listings or create a new one"""
     permission_classes = [IsAuthenticated]
 
+    @replica_reads
+    @method_decorator(conditional.etag(conditional.job_list))
+    @method_decorator(payloads.sparse_fields)
     def get(self, request):
         """Get all job listings"""
         user_type = request.user.user_type
@@ -186,8 +195,8 @@ class JobListingListCreateView(APIView):
             # Admin sees all
             listings = JobListing.objects.all()
         
-        serializer = JobListingSerializer(listings, many=True)
-        return Response(serializer.data)
+        # Same output as JobListingSerializer(listings, many=True), without per-row model instances
+        return Response(fast_serializers.JOB_LISTING.serialize(listings))
 
     def post(self, request):
         """Create a new job listing (employer only)"""
@@ -200,38 +209,11 @@ class JobListingListCreateView(APIView):
         serializer = JobListingCreateSerializer(data=request.data)
         
         if serializer.is_valid():
-            job_listing = serializer.save(employer=request.user)
-            
-            # Create escrow contract on Stellar
-            stellar_client = get_stellar_client()
-            employer_account = request.user.stellar_account_id or None
-            
-            # Create Stellar escrow contract
-            stellar_result = stellar_client.create_escrow_contract(
-                employer_account=employer_account or request.user.phone_number,  # Fallback to phone if no Stellar account
-                amount=float(job_listing.budget),
-                asset_code='XLM',
-                job_id=str(job_listing.id)
-            )
-            
-            if stellar_result:
-                contract_id = stellar_result.get('contract_id', f"ESCROW_{uuid.uuid4().hex[:16].upper()}")
-            else:
-                # Fallback to local contract ID if Stellar service unavailable
-                contract_id = f"ESCROW_{uuid.uuid4().hex[:16].upper()}"
-                logger.warning(f"Stellar contract creation failed, using local ID: {contract_id}")
-            
-            # Create escrow contract record
-            escrow_contract = EscrowContract.objects.create(
-                job_listing=job_listing,
-                contract_id=contract_id,
-                employer=request.user,
-                amount=job_listing.budget,
-                status='pending_deposit'
-            )
-            
-            job_listing.escrow_contract_id = contract_id
-            job_listing.save()
+            # Listing and pending escrow in one transaction; the contract is created on
+            # Stellar in the background (python manage.py provision_escrows --loop)
+            with transaction.atomic():
+                job_listing = serializer.save(employer=request.user)
+                escrow_service.open_escrow(job_listing, request.user)
             
             # Return full job listing with escrow info
             response_serializer = JobListingSerializer(job_listing)
@@ -281,18 +263,11 @@ class JobListingDetailView(APIView):
                     job_listing=job_listing,
                     status='pending'
                 )
-                employee = application.employee
-                application.status = 'accepted'
-                application.save()
-                job_listing.employee = employee
-                job_listing.status = 'assigned'
-                job_listing.assigned_at = timezone.now()
-                job_listing.save()
-                if job_listing.escrow_contract:
-                    ec = job_listing.escrow_contract
-                    ec.employee = employee
-                    ec.status = 'in_progress'
-                    ec.save()
+                if not escrow_service.assign_job(job_listing, application.employee, application=application):
+                    return Response(
+                        {"error": "Job is no longer open"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
                 serializer = JobListingSerializer(job_listing)
                 return Response(serializer.data)
             except JobApplication.DoesNotExist:
@@ -310,18 +285,11 @@ class JobListingDetailView(APIView):
                     status='pending'
                 ).first()
                 employee = CustomUser.objects.get(id=employee_id, user_type='employee')
-                if application:
-                    application.status = 'accepted'
-                    application.save()
-                job_listing.employee = employee
-                job_listing.status = 'assigned'
-                job_listing.assigned_at = timezone.now()
-                job_listing.save()
-                if job_listing.escrow_contract:
-                    ec = job_listing.escrow_contract
-                    ec.employee = employee
-                    ec.status = 'in_progress'
-                    ec.save()
+                if not escrow_service.assign_job(job_listing, employee, application=application):
+                    return Response(
+                        {"error": "Job is no longer open"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
                 serializer = JobListingSerializer(job_listing)
                 return Response(serializer.data)
             except CustomUser.DoesNotExist:
@@ -370,98 +338,22 @@ def mpesa_deposit_callback(request):
         "MiddleName": "Doe",
         "LastName": "Smith"
     }
+    Only records the callback in the webhook inbox; the deposit is applied by
+    the webhook processor (python manage.py process_webhooks).
     """
-    try:
-        # Extract M-Pesa transaction data
-        transaction_id = request.data.get('TransID')
-        amount = float(request.data.get('TransAmount', 0))
-        phone_number = request.data.get('MSISDN', '').replace('254', '0', 1)  # Format phone number
-        bill_ref = request.data.get('BillRefNumber', '')
-        
-        logger.info(f"M-Pesa deposit callback received: {transaction_id}, Amount: {amount}, Ref: {bill_ref}")
-        
-        # Extract escrow contract ID from bill reference
-        # Format: ESCROW_XXXXX or just the contract ID
-        if bill_ref.startswith('ESCROW_'):
-            contract_id = bill_ref
-        else:
-            # Try to find by job listing ID if bill_ref is a number
-            try:
-                job_listing = JobListing.objects.get(id=int(bill_ref))
-                contract_id = job_listing.escrow_contract_id
-            except (JobListing.DoesNotExist, ValueError):
-                return Response(
-                    {"error": "Invalid bill reference"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        
-        # Find escrow contract
-        try:
-            escrow_contract = EscrowContract.objects.get(contract_id=contract_id)
-        except EscrowContract.DoesNotExist:
-            return Response(
-                {"error": "Escrow contract not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Create or update M-Pesa deposit record
-        mpesa_deposit, created = MpesaDeposit.objects.get_or_create(
-            transaction_reference=transaction_id,
-            defaults={
-                'escrow_contract': escrow_contract,
-                'phone_number': phone_number,
-                'amount': amount,
-                'mpesa_receipt': transaction_id,
-                'status': 'completed',
-                'completed_at': timezone.now()
-            }
-        )
-        
-        if not created:
-            # Update existing deposit
-            mpesa_deposit.status = 'completed'
-            mpesa_deposit.completed_at = timezone.now()
-            mpesa_deposit.save()
-        
-        # Fund the Stellar escrow contract
-        stellar_client = get_stellar_client()
-        stellar_funded = stellar_client.fund_escrow_contract(
-            contract_id=contract_id,
-            amount=amount,
-            transaction_hash=transaction_id
-        )
-        
-        if stellar_funded:
-            # Update escrow contract status
-            escrow_contract.status = 'funded'
-            escrow_contract.funded_at = timezone.now()
-            escrow_contract.save()
-            
-            # Update job listing escrow status
-            escrow_contract.job_listing.escrow_contract_id = contract_id
-            escrow_contract.job_listing.save()
-        else:
-            logger.warning(f"Stellar escrow funding failed for contract: {contract_id}")
-            # Still update local status but mark as warning
-            escrow_contract.status = 'funded'
-            escrow_contract.funded_at = timezone.now()
-            escrow_contract.save()
-        
-        logger.info(f"Escrow contract {contract_id} funded successfully with {amount}")
-        
-        return Response({
-            "message": "Deposit processed successfully",
-            "contract_id": contract_id,
-            "amount": amount,
-            "status": "funded"
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        logger.error(f"M-Pesa deposit callback error: {str(e)}")
+    transaction_id = request.data.get('TransID')
+    if not transaction_id:
         return Response(
-            {"error": "Failed to process deposit"},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {"error": "TransID is required"},
+            status=status.HTTP_400_BAD_REQUEST
         )
+    created = webhooks.ingest('mpesa', transaction_id, dict(request.data.items()))
+    logger.info(f"M-Pesa deposit callback received: {transaction_id} (new={created})")
+    return Response({
+        "message": "Deposit received",
+        "transaction_id": transaction_id,
+        "status": "queued" if created else "duplicate"
+    }, status=status.HTTP_200_OK)
 
 
 # ==================== PAYSTACK DEPOSIT CALLBACK ====================
@@ -477,7 +369,7 @@ def _paystack_verify(raw_body, signature):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def paystack_deposit_callback(request):
-    """Paystack webhook: on charge.success credit escrow. Frontend uses ref=escrow_contract_id."""
+    """Paystack webhook: queue charge.success for the webhook processor. Frontend uses ref=escrow_contract_id."""
     raw_body = request.body
     sig = request.headers.get('x-paystack-signature', '')
     if not _paystack_verify(raw_body, sig):
@@ -488,170 +380,142 @@ def paystack_deposit_callback(request):
         return HttpResponseBadRequest(b"Invalid JSON")
     if payload.get('event') != 'charge.success':
         return HttpResponse(status=200)
-    data = payload.get('data') or {}
-    reference = data.get('reference') or data.get('id')
-    if not reference:
-        return HttpResponse(status=200)
-    amount_kobo = int(data.get('amount', 0))
-    amount_main = amount_kobo / 100.0
-    currency = (data.get('currency') or 'NGN').upper()
-    customer_email = (data.get('customer') or {}).get('email') or data.get('customer_email')
-    contract_id = reference if str(reference).startswith('ESCROW_') else None
-    if not contract_id:
-        try:
-            job = JobListing.objects.get(id=int(reference))
-            contract_id = job.escrow_contract_id
-        except (JobListing.DoesNotExist, ValueError):
-            return HttpResponse(status=200)
+    webhooks.ingest('paystack', webhooks.paystack_event_id(payload), payload)
+    return HttpResponse(status=200)
+
+
+# ==================== INTERSEND PAYOUT CALLBACK ====================
+
+def _intersend_verify(raw_body, signature, secret):
+    expected = hmac.new(secret.encode('utf-8'), raw_body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def intersend_payout_callback(request):
+    """
+    Intersend payout status update, e.g. {"transaction_id": "...", "status": "completed"}.
+    Queued in the webhook inbox; the processor settles or fails the payout. Only signed
+    callbacks are accepted: without INTERSEND_WEBHOOK_SECRET anyone could settle payouts.
+    """
+    secret = getattr(settings, 'INTERSEND_WEBHOOK_SECRET', '')
+    if not secret:
+        # 503 so Intersend retries the callback once the secret is configured
+        logger.error("INTERSEND_WEBHOOK_SECRET is not set; rejecting Intersend callback")
+        return HttpResponse(b"Callback verification not configured", status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    raw_body = request.body
+    if not _intersend_verify(raw_body, request.headers.get('x-intersend-signature', ''), secret):
+        return HttpResponseBadRequest(b"Invalid signature")
     try:
-        escrow_contract = EscrowContract.objects.get(contract_id=contract_id)
-    except EscrowContract.DoesNotExist:
-        return HttpResponse(status=200)
-    PaystackDeposit.objects.get_or_create(
-        transaction_reference=str(reference),
-        defaults={
-            'escrow_contract': escrow_contract,
-            'paystack_event_id': payload.get('id'),
-            'email': customer_email,
-            'amount': amount_main,
-            'amount_in_kobo': amount_kobo,
-            'currency': currency,
-            'status': 'completed',
-            'completed_at': timezone.now(),
-        },
-    )
-    get_stellar_client().fund_escrow_contract(contract_id=contract_id, amount=amount_main, transaction_hash=str(reference))
-    escrow_contract.status = 'funded'
-    escrow_contract.funded_at = timezone.now()
-    escrow_contract.save()
-    if escrow_contract.job_listing_id:
-        escrow_contract.job_listing.escrow_contract_id = contract_id
-        escrow_contract.job_listing.save(update_fields=['escrow_contract_id'])
+        payload = json.loads(raw_body.decode('utf-8'))
+    except Exception:
+        return HttpResponseBadRequest(b"Invalid JSON")
+    if not payload.get('transaction_id') or not payload.get('status'):
+        return HttpResponseBadRequest(b"transaction_id and status are required")
+    webhooks.ingest('intersend', webhooks.intersend_event_id(payload), payload)
     return HttpResponse(status=200)
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def webhook_backlog(request):
+    """Webhook inbox depth and lag (admin monitoring)."""
+    return Response(webhooks.backlog_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def upstream_health(request):
+    """Circuit breaker state and trip counts per upstream endpoint (this process), plus retry queue depth."""
+    return Response({
+        "breakers": breaker_states(),
+        "retry_queue": retry_queue.queue_stats(),
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def slow_requests(request):
+    """Recent requests slower than METRICS_SLOW_REQUEST_MS, with their SQL (this process)."""
+    return Response({
+        "threshold_ms": getattr(settings, 'METRICS_SLOW_REQUEST_MS', None),
+        "requests": metrics.slow_requests(),
+    })
+
+
+def prometheus_metrics(request):
+    """Per-endpoint request metrics for Prometheus. Requires 'Authorization: Bearer <METRICS_TOKEN>' when set."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 # ==================== WORK COMPLETION & ESCROW RELEASE ====================
 
+def completion_response(job_listing, escrow_contract, payout):
+    """Body and status for a completed job (async_views.complete_work serves POST jobs/<id>/complete/)."""
+    if payout is None:
+        # Stellar unreachable: release and payout run from the retry queue
+        return {
+            "message": "Work completed; payment release queued",
+            "job_id": job_listing.id,
+            "escrow_status": escrow_contract.status,
+            "payout_status": None,
+            "amount": escrow_contract.amount
+        }, status.HTTP_202_ACCEPTED
+    return {
+        "message": "Work completed and funds released",
+        "job_id": job_listing.id,
+        "escrow_status": escrow_contract.status,
+        "payout_status": payout.status,
+        "amount": escrow_contract.amount
+    }, status.HTTP_200_OK
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def complete_work(request, job_id):
+def bulk_complete_work(request):
     """
-    Mark work as complete and release escrow funds to employee
-    This triggers:
-    1. Update job status to completed
-    2. Update escrow contract status
-    3. Call Stellar contract to release funds
-    4. Trigger mobile money payout to employee
+    Complete many jobs in one request (e.g. closing a seasonal crew).
+    Body: {"jobs": [{"job_id": 1, "work_summary": "..."}, ...]} or {"job_ids": [1, 2, 3]}
+    Returns a result per job; jobs that cannot be completed do not block the others.
     """
-    try:
-        job_listing = get_object_or_404(JobListing, pk=job_id)
-        
-        # Only employer can mark work as complete
-        if job_listing.employer != request.user:
-            return Response(
-                {"error": "Only the employer can mark work as complete"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        if job_listing.status not in ('in_progress', 'assigned'):
-            return Response(
-                {"error": f"Job must be in progress or assigned. Current status: {job_listing.status}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Optional: tasks/work summary for verified work history (visible to other employers)
-        work_summary = (request.data.get('work_summary') or '').strip() or None
-        if work_summary:
-            job_listing.work_summary = work_summary
-        
-        # Update job listing status
-        job_listing.status = 'completed'
-        job_listing.completed_at = timezone.now()
-        job_listing.save()
-        
-        # Get escrow contract
-        escrow_contract = job_listing.escrow_contract
-        
-        if not escrow_contract:
-            return Response(
-                {"error": "Escrow contract not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        if escrow_contract.status != 'funded':
-            return Response(
-                {"error": f"Escrow not funded. Current status: {escrow_contract.status}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Update escrow contract status
-        escrow_contract.status = 'completed'
-        escrow_contract.save()
-        
-        # Call Stellar contract to release funds
-        # This would typically call your Stellar Rust contract
-        # For now, we'll simulate the contract callback
-        stellar_release_success = release_stellar_escrow(escrow_contract)
-        
-        if not stellar_release_success:
-            return Response(
-                {"error": "Failed to release funds from Stellar contract"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-        
-        # Employee must have M-Pesa (phone) number for payout
-        payout_phone = (job_listing.employee.phone_number or "").strip()
-        if not payout_phone:
-            return Response(
-                {"error": "Worker has no M-Pesa number. They must set a phone number for payment."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        # Normalize for payout (254...)
-        if payout_phone.startswith('0'):
-            payout_phone = '254' + payout_phone[1:]
-        elif not payout_phone.startswith('254'):
-            payout_phone = '254' + payout_phone
-
-        # Update escrow to released
-        escrow_contract.status = 'released'
-        escrow_contract.released_at = timezone.now()
-        escrow_contract.save()
-        
-        # Create mobile money payout record (use normalized payout_phone)
-        payout = MobileMoneyPayout.objects.create(
-            escrow_contract=escrow_contract,
-            employee=job_listing.employee,
-            phone_number=payout_phone,
-            amount=escrow_contract.amount,
-            status='pending'
+    raw = request.data.get('jobs')
+    if raw is None:
+        raw = [{'job_id': job_id} for job_id in (request.data.get('job_ids') or [])]
+    if not isinstance(raw, list) or not raw:
+        return Response({"error": "jobs must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(raw) > escrow_service.BULK_COMPLETE_MAX:
+        return Response(
+            {"error": f"At most {escrow_service.BULK_COMPLETE_MAX} jobs per request"},
+            status=status.HTTP_400_BAD_REQUEST
         )
-        
-        # Trigger mobile money payout (this would call Intersend API)
-        payout_success = trigger_mobile_money_payout(payout)
-        
-        if payout_success:
-            payout.status = 'completed'
-            payout.completed_at = timezone.now()
-            payout.save()
-        else:
-            payout.status = 'failed'
-            payout.failure_reason = "Failed to process mobile money payout"
-            payout.save()
-        
-        return Response({
-            "message": "Work completed and funds released",
-            "job_id": job_listing.id,
-            "escrow_status": escrow_contract.status,
-            "payout_status": payout.status,
-            "amount": str(escrow_contract.amount)
-        }, status=status.HTTP_200_OK)
-        
+    items = []
+    for entry in raw:
+        try:
+            job_id = int(entry.get('job_id') if isinstance(entry, dict) else entry)
+        except (TypeError, ValueError):
+            return Response({"error": f"Invalid job_id: {entry}"}, status=status.HTTP_400_BAD_REQUEST)
+        work_summary = entry.get('work_summary') if isinstance(entry, dict) else None
+        items.append((job_id, (work_summary or '').strip() or None))
+
+    try:
+        results = escrow_service.complete_jobs(request.user, items)
     except Exception as e:
-        logger.error(f"Work completion error: {str(e)}")
+        logger.error(f"Bulk work completion error: {str(e)}")
         return Response(
             {"error": "Failed to complete work"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    completed = sum(1 for r in results if r["success"])
+    return Response({
+        "message": f"{completed} of {len(results)} jobs completed",
+        "completed": completed,
+        "failed": len(results) - completed,
+        "results": results,
+    }, status=status.HTTP_200_OK)
 
 
 # ==================== APPLY TO JOB ====================
@@ -672,6 +536,7 @@ def apply_to_job(request, job_id):
     )
     if not created:
         return Response({"message": "Already applied", "application_id": app.id}, status=status.HTTP_200_OK)
+    invalidate_worker(request.user.id)
     return Response(
         {"message": "Application submitted", "application_id": app.id},
         status=status.HTTP_201_CREATED
@@ -701,6 +566,8 @@ def withdraw_application(request, job_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional.etag(conditional.my_applications)
+@payloads.sparse_fields
 def my_applications(request):
     """List current user's job applications (for workers to see applied jobs and withdraw)."""
     if request.user.user_type != 'employee':
@@ -712,31 +579,49 @@ def my_applications(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
+@conditional.etag(conditional.employee_work_history)
+@payloads.sparse_fields
 def employee_work_history(request):
     """Verifiable work history for current employee (completed jobs)."""
     if request.user.user_type != 'employee':
         return Response({"error": "Workers only"}, status=status.HTTP_403_FORBIDDEN)
-    jobs = JobListing.objects.filter(employee=request.user, status='completed').select_related('employer').order_by('-completed_at')
-    out = []
-    for j in jobs:
-        start = j.assigned_at or j.created_at
-        end = j.completed_at
-        duration_days = 0
-        if start and end:
-            delta = end - start
-            duration_days = getattr(delta, 'days', 0)
-        out.append({
-            "job_id": j.id,
-            "job_title": j.title,
-            "employer_name": j.employer.get_full_name() if j.employer else None,
-            "completed_at": j.completed_at.isoformat() if j.completed_at else None,
-            "duration_days": duration_days,
-            "work_summary": j.work_summary,
-            "budget": str(j.budget),
-        })
+    out = list(exports.work_history_rows(request.user))
+    out.reverse()
     return Response(out)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_work_history(request, fmt):
+    """Stream the current worker's completed jobs as CSV or JSONL. Optional ?from=&to= on completion date."""
+    if request.user.user_type != 'employee':
+        return Response({"error": "Workers only"}, status=status.HTTP_403_FORBIDDEN)
+    if fmt not in exports.FORMATS:
+        return Response({"error": f"Unsupported format: {fmt}"}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        start, end = _export_range(request)
+    except exports.ExportError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    rows = exports.work_history_rows(request.user, start, end, using=read_db())
+    return _export_response(rows, exports.WORK_HISTORY_FIELDS, fmt, "work-history")
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional.etag(conditional.recommended_jobs)
+@payloads.sparse_fields
+def recommended_jobs(request):
+    """Open jobs ranked against the worker's completed work and past applications."""
+    if request.user.user_type != 'employee':
+        return Response({"error": "Workers only"}, status=status.HTTP_403_FORBIDDEN)
+    listings = recommend_jobs(request.user)
+    data = JobListingSerializer(listings, many=True).data
+    for item, job in zip(data, listings):
+        item["match_score"] = job.match_score
+    return Response(data)
+
+
 # ==================== JOB CHAT (MESSAGES) ====================
 
 def _can_access_job_chat(user, job_listing):
@@ -750,13 +635,16 @@ def _can_access_job_chat(user, job_listing):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@conditional.etag(conditional.job_messages)
+@payloads.sparse_fields
 def job_messages(request, job_id):
     """List or send messages for a job (employer and assigned employee only)."""
     job_listing = get_object_or_404(JobListing, pk=job_id)
     if not _can_access_job_chat(request.user, job_listing):
         return Response({"error": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
     if request.method == 'GET':
-        messages = JobMessage.objects.filter(job_listing=job_listing).select_related('sender').order_by('created_at')
+        # Completed/cancelled jobs may have older messages in the archive table
+        messages = archival.job_messages(job_listing)
         data = [
             {
                 "id": m.id,
@@ -764,7 +652,7 @@ def job_messages(request, job_id):
                 "sender_name": m.sender.get_full_name() or str(m.sender),
                 "is_mine": m.sender_id == request.user.id,
                 "text": m.text,
-                "created_at": m.created_at.isoformat(),
+                "created_at": m.created_at,
             }
             for m in messages
         ]
@@ -779,12 +667,14 @@ def job_messages(request, job_id):
         "sender_name": msg.sender.get_full_name() or str(msg.sender),
         "is_mine": True,
         "text": msg.text,
-        "created_at": msg.created_at.isoformat(),
+        "created_at": msg.created_at,
     }, status=status.HTTP_201_CREATED)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional.etag(conditional.my_chats)
+@payloads.sparse_fields
 def my_chats(request):
     """List jobs where current user can chat (employer or assigned employee; only jobs with assigned worker)."""
     from django.db.models import Q
@@ -807,8 +697,14 @@ def my_chats(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
+@conditional.etag(conditional.employer_workers_overview)
+@payloads.sparse_fields
 def employer_workers_overview(request):
-    """List hired workers (with duration) and open jobs with applicant counts for Find Workers page."""
+    """
+    List hired workers (with duration) and open jobs with applicant counts for Find Workers page.
+    ?normalize=1 sends each applicant's work history once, in work_histories keyed by employee id.
+    """
     if request.user.user_type != 'employer':
         return Response({"error": "Employer only"}, status=status.HTTP_403_FORBIDDEN)
     from django.utils import timezone as tz
@@ -825,54 +721,97 @@ def employer_workers_overview(request):
                 "employee_id": job.employee.id,
                 "employee_name": job.employee.get_full_name(),
                 "employee_phone": job.employee.phone_number,
-                "assigned_at": job.assigned_at.isoformat() if job.assigned_at else None,
-                "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+                "assigned_at": job.assigned_at,
+                "completed_at": job.completed_at,
                 "status": job.status,
                 "duration_days": delta,
             })
-    open_jobs = []
-    for job in JobListing.objects.filter(employer=request.user, status='open'):
-        try:
-            applications = JobApplication.objects.filter(
-                job_listing=job, status='pending'
-            ).select_related('employee')
-            count = applications.count()
-            applicants = [
-                {
-                    "id": a.id,
-                    "employee_id": a.employee_id,
-                    "employee_name": a.employee.get_full_name() or "Worker",
-                    "employee_phone": a.employee.phone_number or "",
-                    "work_history": get_employee_work_history(a.employee),
-                }
-                for a in applications
-            ]
-        except Exception:
-            count = 0
-            applicants = []
-        open_jobs.append({
-            "job_id": job.id,
-            "job_title": job.title,
-            "applicant_count": count,
-            "applicants": applicants,
+    open_jobs = {
+        job_id: {"job_id": job_id, "job_title": title, "applicant_count": 0, "applicants": []}
+        for job_id, title in JobListing.objects.filter(employer=request.user, status='open').values_list('id', 'title')
+    }
+    applications = JobApplication.objects.filter(
+        job_listing__in=list(open_jobs), status='pending'
+    ).select_related('employee').order_by('id')
+    for a in applications:
+        job = open_jobs[a.job_listing_id]
+        job["applicant_count"] += 1
+        job["applicants"].append({
+            "id": a.id,
+            "employee_id": a.employee_id,
+            "employee_name": a.employee.get_full_name() or "Worker",
+            "employee_phone": a.employee.phone_number or "",
         })
-    return Response({"hired_workers": hired, "open_jobs_with_applicants": open_jobs})
+    out = {"hired_workers": hired, "open_jobs_with_applicants": list(open_jobs.values())}
+    applicants = [a for job in out["open_jobs_with_applicants"] for a in job["applicants"]]
+    if payloads.histories_wanted(request, 'applicants'):
+        # One query for every applicant's history, however many jobs they applied to
+        histories = get_employee_work_histories({a["employee_id"] for a in applicants})
+        for a in applicants:
+            a["work_history"] = histories[a["employee_id"]]
+        if payloads.normalized(request):
+            out["work_histories"] = payloads.split_work_histories(applicants)
+    return Response(out)
+
+
+# ==================== DASHBOARD SUMMARY ====================
+
+def _summary(rollup):
+    counts = rollup.job_counts
+    return {
+        "jobs_total": sum(counts.values()),
+        "jobs_by_status": counts,
+        "total_escrowed": rollup.total_escrowed,
+        "total_released": rollup.total_released,
+        "as_of": rollup.refreshed_at,
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def employer_summary(request):
+    """Dashboard totals for the employer: jobs by status, workers hired, money held and released."""
+    if request.user.user_type != 'employer':
+        return Response({"error": "Employer only"}, status=status.HTTP_403_FORBIDDEN)
+    rollup = rollups.get_rollup(request.user)
+    return Response({**_summary(rollup), "workers_hired": rollup.workers_hired})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def employee_summary(request):
+    """Dashboard totals for the worker: their jobs by status, money held for them, released and earned."""
+    if request.user.user_type != 'employee':
+        return Response({"error": "Workers only"}, status=status.HTTP_403_FORBIDDEN)
+    rollup = rollups.get_rollup(request.user)
+    return Response({
+        **_summary(rollup),
+        "total_earned": rollup.total_earned,
+        "open_jobs": rollups.open_jobs_count(),
+    })
 
 
 # ==================== JOB APPLICANTS ====================
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@conditional.etag(conditional.job_applicants)
+@payloads.sparse_fields
 def job_applicants(request, job_id):
-    """List applicants for a job (employer only)."""
+    """List applicants for a job (employer only). ?normalize=1: {"applicants": [...], "work_histories": {id: [...]}}."""
     job_listing = get_object_or_404(JobListing, pk=job_id)
-    if job_listing.employer != request.user:
+    if job_listing.employer_id != request.user.id:
         return Response({"error": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
-    applications = JobApplication.objects.filter(job_listing=job_listing, status='pending').select_related('employee')
-    serializer = JobApplicationSerializer(applications, many=True)
-    data = list(serializer.data)
-    for i, app in enumerate(applications):
-        data[i]["work_history"] = get_employee_work_history(app.employee)
+    applications = JobApplication.objects.filter(job_listing=job_listing, status='pending')
+    data = fast_serializers.JOB_APPLICATION.serialize(applications)
+    normalize = payloads.normalized(request)
+    # Normalized rows sit under "applicants" (?fields=applicants.employee_name)
+    if payloads.histories_wanted(request, *(['applicants'] if normalize else [])):
+        histories = get_employee_work_histories([item["employee"] for item in data])
+        for item in data:
+            item["work_history"] = histories[item["employee"]]
+    if normalize:
+        return Response({"applicants": data, "work_histories": payloads.split_work_histories(data, key='employee')})
     return Response(data)
 
 
@@ -889,13 +828,12 @@ def initiate_paystack(request, job_id):
     contract_id = escrow.contract_id or job_listing.escrow_contract_id
     if not contract_id:
         return Response({"error": "No escrow contract"}, status=status.HTTP_400_BAD_REQUEST)
-    amount = float(escrow.amount)
-    amount_kobo = int(round(amount * 100))
+    amount = Money.from_decimal(escrow.amount, 'KES')
     email = request.user.email or (request.user.phone_number + '@trustwork.placeholder')
     return Response({
         "reference": contract_id,
-        "amount_kobo": amount_kobo,
-        "amount_kes": amount,
+        "amount_kobo": amount.to_minor(),
+        "amount_kes": str(amount),
         "currency": "KES",
         "email": email,
         "job_id": job_listing.id,
@@ -908,154 +846,89 @@ def initiate_paystack(request, job_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def job_escrow(request, job_id):
-    """Escrow balance and status for a job (employer or assigned worker)."""
+    """
+    Escrow balance and status for a job (employer or assigned worker), served from the
+    escrow status cache. ?live=1 adds the last known on-chain balance (refreshed in the background).
+    """
+    entry = escrow_cache.get_status(job_id)
+    if request.user.pk not in (entry["employer_id"], entry["employee_id"]):
+        return Response({"error": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
+    data = entry["data"]
+    if request.query_params.get('live') in ('1', 'true'):
+        data = {**data, **escrow_cache.onchain_balance(data["contract_id"])}
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional.etag(conditional.job_escrow_history)
+@payloads.sparse_fields
+def job_escrow_history(request, job_id):
+    """
+    Escrow timeline for a job (employer or assigned worker) from the event ledger.
+    Optional ?from=&to= bound the events; ?as_of= also returns the escrow state at that time.
+    """
     job_listing = get_object_or_404(JobListing, pk=job_id)
-    if job_listing.employer != request.user and job_listing.employee != request.user:
+    if request.user.pk not in (job_listing.employer_id, job_listing.employee_id):
         return Response({"error": "Not allowed"}, status=status.HTTP_403_FORBIDDEN)
+    escrow = get_object_or_404(EscrowContract, job_listing=job_listing)
     try:
-        escrow = EscrowContract.objects.get(job_listing=job_listing)
-    except EscrowContract.DoesNotExist:
-        return Response({
-            "job_id": job_id,
-            "job_title": getattr(job_listing, 'title', ''),
-            "contract_id": "",
-            "amount_held": "0",
-            "amount_held_kes": "0",
-            "amount_held_xlm": "0",
-            "status": "pending_deposit",
-            "funded_at": None,
-            "released_at": None,
-            "when_release": None,
-        })
-    amount = str(escrow.amount)
-    return Response({
-        "job_id": job_id,
-        "job_title": job_listing.title,
+        start = exports.parse_bound(request.query_params.get('from'))
+        end = exports.parse_bound(request.query_params.get('to'), end=True)
+        as_of = exports.parse_bound(request.query_params.get('as_of'))
+    except exports.ExportError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    events = escrow_events.history(escrow.pk, start, end)
+    out = {
+        "job_id": job_listing.id,
         "contract_id": escrow.contract_id,
-        "amount_held": amount,
-        "amount_held_kes": amount,
-        "amount_held_xlm": amount,
-        "status": escrow.status,
-        "funded_at": escrow.funded_at.isoformat() if escrow.funded_at else None,
-        "released_at": escrow.released_at.isoformat() if escrow.released_at else None,
-        "when_release": "When employer marks work done" if escrow.status == "funded" else (escrow.released_at.isoformat() if escrow.released_at else None),
-    })
+        "events": [
+            {"kind": e.kind, "status": e.status, "changes": e.changes, "at": e.created_at}
+            for e in events
+        ],
+    }
+    if as_of:
+        out["state_as_of"] = escrow_events.state_at(escrow.pk, as_of)
+    return Response(out)
 
 
 # ==================== TRANSACTIONS HISTORY ====================
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@replica_reads
+@conditional.etag(conditional.transactions)
+@payloads.sparse_fields
 def transactions(request):
-    """List deposits and payouts for current user."""
-    user = request.user
-    out = []
-    if user.user_type == 'employer':
-        for ec in EscrowContract.objects.filter(employer=user).select_related('job_listing'):
-            job = ec.job_listing
-            for dep in MpesaDeposit.objects.filter(escrow_contract=ec):
-                out.append({
-                    "type": "deposit",
-                    "id": dep.id,
-                    "job_id": job.id,
-                    "job_title": job.title,
-                    "amount": str(dep.amount),
-                    "currency": "KES",
-                    "reference": dep.transaction_reference,
-                    "status": dep.status,
-                    "created_at": dep.created_at.isoformat(),
-                    "completed_at": dep.completed_at.isoformat() if dep.completed_at else None,
-                })
-            for dep in PaystackDeposit.objects.filter(escrow_contract=ec):
-                    out.append({
-                        "type": "deposit",
-                        "id": dep.id,
-                        "job_id": job.id,
-                        "job_title": job.title,
-                        "amount": str(dep.amount),
-                        "currency": dep.currency,
-                        "reference": dep.transaction_reference,
-                        "status": dep.status,
-                        "created_at": dep.created_at.isoformat(),
-                        "completed_at": dep.completed_at.isoformat() if dep.completed_at else None,
-                    })
-    if user.user_type == 'employee':
-        for payout in MobileMoneyPayout.objects.filter(employee=user).select_related('escrow_contract'):
-            ec = payout.escrow_contract
-            job = ec.job_listing
-            out.append({
-                "type": "payout",
-                "id": payout.id,
-                "job_id": job.id,
-                "job_title": job.title,
-                "amount": str(payout.amount),
-                "currency": "KES",
-                "reference": payout.transaction_reference or "",
-                "status": payout.status,
-                "created_at": payout.created_at.isoformat(),
-                "completed_at": payout.completed_at.isoformat() if payout.completed_at else None,
-            })
-    out.sort(key=lambda x: x['created_at'], reverse=True)
+    """List deposits and payouts for current user, newest first."""
+    out = list(exports.transaction_rows(request.user))
+    out.reverse()
     return Response(out)
 
 
-# ==================== HELPER FUNCTIONS ====================
+def _export_response(rows, fields, fmt, filename):
+    content = exports.render(rows, fmt, fields)
+    response = StreamingHttpResponse(content, content_type=exports.FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
 
-def release_stellar_escrow(escrow_contract):
-    """
-    Call Stellar Rust contract to release escrow funds
-    """
-    try:
-        stellar_client = get_stellar_client()
-        
-        # Get employee's Stellar account
-        employee_account = escrow_contract.employee.stellar_account_id if escrow_contract.employee else None
-        
-        if not employee_account:
-            logger.warning(f"No Stellar account for employee; skipping on-chain release, payout via mobile money only")
-            return True  # Still allow mobile money payout
-        
-        # Release escrow funds
-        success = stellar_client.release_escrow_contract(
-            contract_id=escrow_contract.contract_id,
-            employee_account=employee_account,
-            amount=float(escrow_contract.amount)
-        )
-        
-        if success:
-            logger.info(f"Stellar escrow released: {escrow_contract.contract_id} -> {employee_account}")
-        
-        return success
-        
-    except Exception as e:
-        logger.error(f"Stellar escrow release error: {str(e)}")
-        return False
 
+def _export_range(request):
+    return (
+        exports.parse_bound(request.query_params.get('from')),
+        exports.parse_bound(request.query_params.get('to'), end=True),
+    )
 
-def trigger_mobile_money_payout(payout):
-    """
-    Trigger mobile money payout via Intersend API
-    """
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_transactions(request, fmt):
+    """Stream the current user's deposits/payouts as CSV or JSONL. Optional ?from=&to= (dates or ISO datetimes)."""
+    if fmt not in exports.FORMATS:
+        return Response({"error": f"Unsupported format: {fmt}"}, status=status.HTTP_404_NOT_FOUND)
     try:
-        intersend_client = get_intersend_client()
-        
-        # Send mobile money
-        result = intersend_client.send_mobile_money(
-            phone_number=payout.phone_number,
-            amount=float(payout.amount),
-            currency='KES',
-            reference=payout.transaction_reference
-        )
-        
-        if result:
-            payout.transaction_reference = result.get('transaction_id', payout.transaction_reference)
-            payout.save()
-            logger.info(f"Mobile money payout initiated: {payout.transaction_reference}")
-            return True
-        else:
-            logger.error(f"Failed to initiate mobile money payout")
-            return False
-        
-    except Exception as e:
-        logger.error(f"Mobile money payout error: {str(e)}")
-        return False
+        start, end = _export_range(request)
+    except exports.ExportError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    rows = exports.transaction_rows(request.user, start, end, using=read_db())
+    return _export_response(rows, exports.TRANSACTION_FIELDS, fmt, "transactions")
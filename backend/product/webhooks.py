@@ -0,0 +1,214 @@
+"""
+Webhook Inbox Module
+Fast-ack ingestion and background processing of payment provider callbacks
+(M-Pesa and Paystack deposits, Intersend payout status).
+
+The callback views only verify the request, append the raw payload to WebhookEvent
+(deduplicated on provider + provider event id) and return 200. process_pending()
+then applies each event inside a transaction that also marks it processed, so a
+deposit is applied exactly once no matter how often the provider retries. Stellar
+calls a deposit triggers (escrow_service.fund_escrow) run after that transaction
+commits, so the event and escrow locks are never held across a network call.
+
+Run the processor with: python manage.py process_webhooks --loop
+"""
+import logging
+from django.db import transaction, IntegrityError
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import WebhookEvent, JobListing, EscrowContract, MpesaDeposit, PaystackDeposit, MobileMoneyPayout
+from . import escrow_service, payouts, reconciliation
+from .money import Money, MoneyError
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+
+
+class IgnoreEvent(Exception):
+    """Event is valid but cannot be applied (unknown escrow, bad reference); do not retry."""
+
+
+# ==================== INGESTION ====================
+
+def ingest(provider, event_id, payload):
+    """Append a webhook to the inbox. Returns False if this event id was already received."""
+    try:
+        with transaction.atomic():
+            WebhookEvent.objects.create(provider=provider, event_id=str(event_id), payload=payload)
+        return True
+    except IntegrityError:
+        return False
+
+
+def paystack_event_id(payload):
+    data = payload.get('data') or {}
+    return f"{payload.get('event')}:{data.get('id') or data.get('reference')}"
+
+
+def intersend_event_id(payload):
+    return f"{payload.get('transaction_id')}:{payload.get('status')}"
+
+
+# ==================== APPLYING EVENTS ====================
+
+def _escrow_for_reference(reference):
+    """Escrow by contract id (ESCROW_...) or by job listing id."""
+    if str(reference).startswith('ESCROW_'):
+        contract_id = str(reference)
+    else:
+        try:
+            contract_id = JobListing.objects.get(id=int(reference)).escrow_contract_id
+        except (JobListing.DoesNotExist, ValueError, TypeError):
+            raise IgnoreEvent(f"Invalid reference: {reference}")
+    try:
+        return EscrowContract.objects.select_related('job_listing').get(contract_id=contract_id)
+    except EscrowContract.DoesNotExist:
+        raise IgnoreEvent(f"Escrow contract not found: {contract_id}")
+
+
+def apply_mpesa_deposit(payload):
+    transaction_id = payload.get('TransID')
+    try:
+        amount = Money.parse(payload.get('TransAmount', 0), 'KES')
+    except MoneyError:
+        raise IgnoreEvent(f"Invalid amount: {payload.get('TransAmount')}")
+    phone_number = (payload.get('MSISDN') or '').replace('254', '0', 1)
+    escrow_contract = _escrow_for_reference(payload.get('BillRefNumber', ''))
+    _, created = MpesaDeposit.objects.get_or_create(
+        transaction_reference=transaction_id,
+        defaults={
+            'escrow_contract': escrow_contract,
+            'phone_number': phone_number,
+            'amount': amount.amount,
+            'mpesa_receipt': transaction_id,
+            'status': 'completed',
+            'completed_at': timezone.now()
+        }
+    )
+    if not created:
+        # Deposit already recorded; funding happened (or was skipped) then
+        logger.info(f"M-Pesa deposit {transaction_id} already recorded")
+        return
+    reconciliation.mark_changed([escrow_contract.pk])
+    if escrow_service.fund_escrow(escrow_contract, amount, transaction_hash=transaction_id):
+        logger.info(f"Escrow contract {escrow_contract.contract_id} funded with {amount} (M-Pesa {transaction_id})")
+
+
+def apply_paystack_deposit(payload):
+    data = payload.get('data') or {}
+    reference = data.get('reference') or data.get('id')
+    if not reference:
+        raise IgnoreEvent("Missing reference")
+    currency = (data.get('currency') or 'NGN').upper()
+    try:
+        amount = Money.from_minor(data.get('amount', 0), currency)
+    except MoneyError:
+        raise IgnoreEvent(f"Invalid amount: {data.get('amount')} {currency}")
+    customer_email = (data.get('customer') or {}).get('email') or data.get('customer_email')
+    escrow_contract = _escrow_for_reference(reference)
+    _, created = PaystackDeposit.objects.get_or_create(
+        transaction_reference=str(reference),
+        defaults={
+            'escrow_contract': escrow_contract,
+            'paystack_event_id': payload.get('id') or data.get('id'),
+            'email': customer_email,
+            'amount': amount.amount,
+            'amount_in_kobo': amount.to_minor(),
+            'currency': currency,
+            'status': 'completed',
+            'completed_at': timezone.now(),
+        },
+    )
+    if not created:
+        logger.info(f"Paystack deposit {reference} already recorded")
+        return
+    reconciliation.mark_changed([escrow_contract.pk])
+    if escrow_service.fund_escrow(escrow_contract, amount, transaction_hash=str(reference)):
+        logger.info(f"Escrow contract {escrow_contract.contract_id} funded with {amount} {currency} (Paystack {reference})")
+
+
+def apply_intersend_payout(payload):
+    transaction_id = payload.get('transaction_id')
+    try:
+        payout = MobileMoneyPayout.objects.get(transaction_reference=transaction_id)
+    except MobileMoneyPayout.DoesNotExist:
+        raise IgnoreEvent(f"Payout not found: {transaction_id}")
+    status = payouts.apply_status(payout, payload.get('status'), payload.get('reason') or payload.get('message'))
+    logger.info(f"Payout {transaction_id} is {status} after Intersend callback")
+
+
+HANDLERS = {
+    'mpesa': apply_mpesa_deposit,
+    'paystack': apply_paystack_deposit,
+    'intersend': apply_intersend_payout,
+}
+
+
+# ==================== PROCESSOR ====================
+
+def process_event(event_pk):
+    """
+    Apply one pending event. The event row is locked and flipped to processed in the same
+    transaction as the deposit writes, so concurrent processors cannot apply it twice.
+    Chain calls queued with transaction.on_commit run once that transaction has committed.
+    Returns the resulting status, or None if another processor already handled it.
+    """
+    try:
+        with transaction.atomic():
+            event = (
+                WebhookEvent.objects.select_for_update(skip_locked=True)
+                .filter(pk=event_pk, status='pending')
+                .first()
+            )
+            if event is None:
+                return None
+            try:
+                with transaction.atomic():
+                    HANDLERS[event.provider](event.payload)
+                event.status = 'processed'
+            except IgnoreEvent as e:
+                logger.warning(f"Webhook {event.provider}:{event.event_id} ignored: {e}")
+                event.status = 'ignored'
+                event.last_error = str(e)
+            event.attempts += 1
+            event.processed_at = timezone.now()
+            event.save(update_fields=['status', 'attempts', 'last_error', 'processed_at'])
+            return event.status
+    except Exception as e:
+        logger.error(f"Webhook {event_pk} processing error: {str(e)}")
+        WebhookEvent.objects.filter(pk=event_pk, status='pending').update(
+            attempts=F('attempts') + 1, last_error=str(e)
+        )
+        WebhookEvent.objects.filter(pk=event_pk, status='pending', attempts__gte=MAX_ATTEMPTS).update(
+            status='failed'
+        )
+        return 'error'
+
+
+def process_pending(batch_size=100):
+    """Apply up to batch_size pending events, oldest first. Returns the number handled."""
+    pks = list(
+        WebhookEvent.objects.filter(status='pending')
+        .order_by('received_at', 'id')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    handled = 0
+    for pk in pks:
+        if process_event(pk) is not None:
+            handled += 1
+    return handled
+
+
+def backlog_stats():
+    """Inbox depth and lag (age of the oldest pending event) for monitoring."""
+    pending = WebhookEvent.objects.filter(status='pending')
+    agg = pending.aggregate(oldest=Min('received_at'))
+    oldest = agg['oldest']
+    return {
+        "pending": pending.count(),
+        "failed": WebhookEvent.objects.filter(status='failed').count(),
+        "oldest_pending_at": oldest.isoformat() if oldest else None,
+        "lag_seconds": round((timezone.now() - oldest).total_seconds(), 3) if oldest else 0.0,
+    }
@@ -6,7 +6,7 @@ import { Briefcase, Users, Clock, CheckCircle, Wallet, History } from 'lucide-re
 import { PageHeader } from '@/components/layout';
 import { Card, Badge, Button } from '@/components/ui';
 import { PaystackButton } from '@/components/PaystackButton';
-import { jobService } from '@/services/api';
+import { jobService, employerService, type EmployerSummary } from '@/services/api';
 import { getToken } from '@/lib/auth';
 import { useRouter } from 'next/navigation';
 import type { JobListing } from '@/types';
@@ -37,10 +37,12 @@ function formatDuration(days: number): string {
 export default function EmployerDashboardPage() {
   const router = useRouter();
   const [jobs, setJobs] = useState<JobListing[]>([]);
+  const [summary, setSummary] = useState<EmployerSummary | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
 
   const loadJobs = () => {
+    employerService.summary().then(setSummary).catch(() => setSummary(null));
     jobService
       .list()
       .then((list) => setJobs(Array.isArray(list) ? list : []))
@@ -57,8 +59,8 @@ export default function EmployerDashboardPage() {
     loadJobs();
   }, [router]);
 
-  const active = jobs.filter((j) => ['open', 'assigned', 'in_progress'].includes(j.status)).length;
-  const completed = jobs.filter((j) => j.status === 'completed').length;
+  const counts = summary?.jobs_by_status;
+  const active = counts ? counts.open + counts.assigned + counts.in_progress : 0;
   const hired = jobs.filter((j) => j.employee != null);
   const needsDeposit = jobs.filter((j) => j.status === 'open' && j.escrow_contract_id);
   const canComplete = jobs.filter((j) => ['assigned', 'in_progress'].includes(j.status) && j.employee);
@@ -99,7 +101,7 @@ export default function EmployerDashboardPage() {
               <Briefcase className="text-blue-600" size={24} />
             </div>
             <div>
-              <p className="text-2xl font-bold text-gray-900">{jobs.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{summary?.jobs_total ?? 0}</p>
               <p className="text-sm text-gray-600">Total Jobs</p>
             </div>
           </div>
@@ -110,7 +112,7 @@ export default function EmployerDashboardPage() {
               <Users className="text-emerald-600" size={24} />
             </div>
             <div>
-              <p className="text-2xl font-bold text-gray-900">{hired.length}</p>
+              <p className="text-2xl font-bold text-gray-900">{summary?.workers_hired ?? 0}</p>
               <p className="text-sm text-gray-600">Workers Hired</p>
             </div>
           </div>
@@ -132,7 +134,7 @@ export default function EmployerDashboardPage() {
               <CheckCircle className="text-green-600" size={24} />
             </div>
             <div>
-              <p className="text-2xl font-bold text-gray-900">{completed}</p>
+              <p className="text-2xl font-bold text-gray-900">{counts?.completed ?? 0}</p>
               <p className="text-sm text-gray-600">Completed</p>
             </div>
           </div>
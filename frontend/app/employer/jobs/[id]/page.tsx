@@ -118,6 +118,14 @@ export default function EmployerJobDetailPage() {
             <span className="font-medium">{escrow.amount_held_kes ?? escrow.amount_held}</span>
             <span className="text-gray-600">Status:</span>
             <span className="font-medium">{escrow.status}</span>
+            <span className="text-gray-600">On Stellar:</span>
+            <span className="font-medium">
+              {escrow.chain_status === 'provisioning'
+                ? 'Setting up contract…'
+                : escrow.chain_status === 'failed'
+                  ? 'Setup failed, contact support'
+                  : 'Contract ready'}
+            </span>
             <span className="text-gray-600">When release:</span>
             <span className="font-medium">{escrow.when_release ?? '—'}</span>
           </div>
@@ -5,7 +5,7 @@ import Link from 'next/link';
 import { Briefcase, DollarSign, Wallet, History, Phone, TrendingUp, Coins } from 'lucide-react';
 import { PageHeader } from '@/components/layout';
 import { Card, Badge, Button } from '@/components/ui';
-import { jobService, transactionService, type EscrowInfo, type TransactionItem } from '@/services/api';
+import { jobService, employeeService, type EscrowInfo, type EmployeeSummary } from '@/services/api';
 import { getToken, getUser } from '@/lib/auth';
 import { useRouter } from 'next/navigation';
 import type { JobListing } from '@/types';
@@ -15,7 +15,7 @@ export default function WorkerDashboardPage() {
   const user = getUser();
   const [jobs, setJobs] = useState<JobListing[]>([]);
   const [escrows, setEscrows] = useState<EscrowInfo[]>([]);
-  const [transactions, setTransactions] = useState<TransactionItem[]>([]);
+  const [summary, setSummary] = useState<EmployeeSummary | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
 
@@ -26,12 +26,12 @@ export default function WorkerDashboardPage() {
     }
     Promise.all([
       jobService.list(),
-      transactionService.list().catch(() => []),
+      employeeService.summary().catch(() => null),
     ])
-      .then(([list, txList]) => {
+      .then(([list, totals]) => {
         const arr = Array.isArray(list) ? list : [];
         setJobs(arr);
-        setTransactions(Array.isArray(txList) ? (txList as TransactionItem[]) : []);
+        setSummary(totals);
         const myJobs = user ? arr.filter((j) => j.employee === user.id) : [];
         return Promise.all(myJobs.map((j) => jobService.escrow(j.id).catch(() => null)));
       })
@@ -41,14 +41,10 @@ export default function WorkerDashboardPage() {
   }, [router, user?.id]);
 
   const myJobs = user ? jobs.filter((j) => j.employee === user.id) : [];
-  const openCount = jobs.filter((j) => j.status === 'open').length;
-  const activeCount = myJobs.filter((j) => ['assigned', 'in_progress'].includes(j.status)).length;
-  const totalHeld = escrows
-    .filter((e) => e.status === 'funded' || e.status === 'in_progress')
-    .reduce((sum, e) => sum + parseFloat(e.amount_held || '0'), 0);
-  const totalEarnings = (transactions || [])
-    .filter((t) => t.type === 'payout' && String(t.status).toLowerCase() === 'completed')
-    .reduce((sum, t) => sum + parseFloat(String(t.amount || '0')), 0);
+  const openCount = summary?.open_jobs ?? 0;
+  const activeCount = summary ? summary.jobs_by_status.assigned + summary.jobs_by_status.in_progress : 0;
+  const totalHeld = parseFloat(summary?.total_escrowed || '0');
+  const totalEarnings = parseFloat(summary?.total_earned || '0');
   const mpesaNumber = user?.phone_number || null;
   const stellarInvested = 0;
   const stellarReturnRate = 5;
@@ -95,15 +95,21 @@ export interface EscrowInfo {
   amount_held_kes: string;
   amount_held_xlm: string;
   status: string;
+  /** On-chain provisioning: the contract is created on Stellar shortly after the job is posted */
+  chain_status: 'provisioning' | 'created' | 'failed' | null;
+  payout_status: 'pending' | 'processing' | 'completed' | 'failed' | null;
   funded_at: string | null;
   released_at: string | null;
   when_release: string | null;
+  /** Only with ?live=1: last known on-chain balance, refreshed in the background */
+  onchain_balance_stroops?: number | null;
+  onchain_balance_as_of?: string | null;
 }
 
 export interface PaystackInit {
   reference: string;
   amount_kobo: number;
-  amount_kes: number;
+  amount_kes: string;
   currency: string;
   email: string;
   job_id: number;
@@ -160,16 +166,38 @@ export const jobService = {
       method: 'POST',
     }),
 
-  escrow: (id: number | string) =>
-    fetchAPI<EscrowInfo>(`/jobs/${id}/escrow/`),
+  escrow: (id: number | string, live = false) =>
+    fetchAPI<EscrowInfo>(`/jobs/${id}/escrow/${live ? '?live=1' : ''}`),
 
   complete: (id: number | string, data?: { work_summary?: string }) =>
     fetchAPI<{ message: string; job_id: number }>(`/jobs/${id}/complete/`, {
       method: 'POST',
       body: JSON.stringify(data || {}),
     }),
+
+  bulkComplete: (jobs: { job_id: number; work_summary?: string }[]) =>
+    fetchAPI<BulkCompleteResponse>('/jobs/bulk-complete/', {
+      method: 'POST',
+      body: JSON.stringify({ jobs }),
+    }),
 };
 
+export interface BulkCompleteResult {
+  job_id: number;
+  success: boolean;
+  error?: string;
+  escrow_status?: string;
+  payout_status?: string;
+  amount?: string;
+}
+
+export interface BulkCompleteResponse {
+  message: string;
+  completed: number;
+  failed: number;
+  results: BulkCompleteResult[];
+}
+
 export const transactionService = {
   list: () => fetchAPI<TransactionItem[]>('/transactions/'),
 };
@@ -201,11 +229,30 @@ export interface OpenJobWithApplicants {
   applicants: JobApplicantSummary[];
 }
 
+/** Dashboard totals, precomputed per user on the server */
+export interface DashboardSummary {
+  jobs_total: number;
+  jobs_by_status: Record<'open' | 'assigned' | 'in_progress' | 'completed' | 'cancelled', number>;
+  total_escrowed: string;
+  total_released: string;
+  as_of: string | null;
+}
+
+export interface EmployerSummary extends DashboardSummary {
+  workers_hired: number;
+}
+
+export interface EmployeeSummary extends DashboardSummary {
+  total_earned: string;
+  open_jobs: number;
+}
+
 export const employerService = {
   workersOverview: () =>
     fetchAPI<{ hired_workers: HiredWorker[]; open_jobs_with_applicants: OpenJobWithApplicants[] }>(
       '/employer/workers-overview/'
     ),
+  summary: () => fetchAPI<EmployerSummary>('/employer/summary/'),
 };
 
 export interface MyApplication {
@@ -227,6 +274,8 @@ export interface WorkHistoryEntry {
 export const employeeService = {
   myApplications: () => fetchAPI<MyApplication[]>('/employee/my-applications/'),
   workHistory: () => fetchAPI<WorkHistoryEntry[]>('/employee/work-history/'),
+  recommendedJobs: () => fetchAPI<(JobListing & { match_score: number })[]>('/employee/recommended-jobs/'),
+  summary: () => fetchAPI<EmployeeSummary>('/employee/summary/'),
 };
 
 export interface ChatJob {
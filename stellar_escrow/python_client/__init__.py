@@ -4,17 +4,27 @@
 from .escrow_client import (
     EscrowClient,
     create_escrow,
+    create_escrows,
     fund_escrow,
     release_escrow,
+    release_escrows,
     get_balance,
+    get_balances,
     get_escrow_status,
+    to_stroops,
+    reset_local_balances,
 )
 
 __all__ = [
     "EscrowClient",
     "create_escrow",
+    "create_escrows",
     "fund_escrow",
     "release_escrow",
+    "release_escrows",
     "get_balance",
+    "get_balances",
     "get_escrow_status",
+    "to_stroops",
+    "reset_local_balances",
 ]
@@ -1,10 +1,36 @@
 
 
 import logging
-from typing import Optional, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional, Dict, Any, Union, Iterable, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Amounts may be Decimal (preferred), str or int; floats are accepted for backward compatibility
+Amount = Union[Decimal, str, int, float]
+
+STROOPS_PER_UNIT = 10_000_000
+
+
+def to_stroops(amount: Amount) -> int:
+    """Convert a unit amount to contract i128 stroops (7 decimals) without float rounding."""
+    if isinstance(amount, float):
+        amount = repr(amount)
+    return int((Decimal(amount) * STROOPS_PER_UNIT).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+# Local mode keeps balances in memory (per process) so callers can be exercised offline.
+# Escrows this process has never seen report None, as before.
+_local_balances: Dict[str, int] = {}
+_local_lock = threading.Lock()
+
+
+def reset_local_balances():
+    with _local_lock:
+        _local_balances.clear()
+
 
 def _get_config():
     """Load config from Django settings or env when available."""
@@ -54,7 +80,7 @@ class EscrowClient:
         self,
         escrow_id: str,
         employer_account: str,
-        amount: float,
+        amount: Amount,
         asset_code: str = "XLM",
         job_id: str = None,
     ) -> Optional[Dict[str, Any]]:
@@ -65,11 +91,13 @@ class EscrowClient:
         result = {"contract_id": escrow_id, "amount": str(amount), "asset_code": asset_code}
         if self._local_mode():
             logger.info("create_escrow (local): %s", escrow_id)
+            with _local_lock:
+                _local_balances.setdefault(escrow_id, 0)
             return result
         return self._invoke_create(escrow_id, employer_account, amount, asset_code) or result
 
     def _invoke_create(
-        self, escrow_id: str, employer_account: str, amount: float, asset_code: str
+        self, escrow_id: str, employer_account: str, amount: Amount, asset_code: str
     ) -> Optional[Dict[str, Any]]:
         try:
             from stellar_sdk import SorobanServer, Keypair, TransactionBuilder, Contract
@@ -105,7 +133,7 @@ class EscrowClient:
     def fund_escrow(
         self,
         contract_id: str,
-        amount: float,
+        amount: Amount,
         transaction_hash: str = None,
     ) -> bool:
         """
@@ -113,17 +141,19 @@ class EscrowClient:
         """
         if self._local_mode():
             logger.info("fund_escrow (local): %s amount=%s", contract_id, amount)
+            with _local_lock:
+                _local_balances[contract_id] = _local_balances.get(contract_id, 0) + to_stroops(amount)
             return True
         return self._invoke_deposit(contract_id, amount)
 
-    def _invoke_deposit(self, contract_id: str, amount: float) -> bool:
+    def _invoke_deposit(self, contract_id: str, amount: Amount) -> bool:
         try:
             from stellar_sdk import SorobanServer, Keypair, TransactionBuilder, Contract
             server = SorobanServer(self.soroban_rpc_url)
             kp = Keypair.from_secret(self.admin_secret)
             contract = Contract(self.contract_id)
             sym = contract_id.replace("-", "_")[:32]
-            amount_i128 = int(round(amount * 10_000_000))
+            amount_i128 = to_stroops(amount)
             from_addr = kp.public_key
             tx = (
                 TransactionBuilder(kp.public_key, server)
@@ -167,7 +197,7 @@ class EscrowClient:
         self,
         contract_id: str,
         employee_account: str,
-        amount: float = None,
+        amount: Amount = None,
     ) -> bool:
         """
         Withdraw: release escrow to employee. Sets beneficiary then calls release().
@@ -175,6 +205,8 @@ class EscrowClient:
         """
         if self._local_mode():
             logger.info("release_escrow (local): %s -> %s", contract_id, employee_account)
+            with _local_lock:
+                _local_balances[contract_id] = 0
             return True
         self.set_beneficiary(contract_id, employee_account)
         try:
@@ -197,21 +229,124 @@ class EscrowClient:
             logger.exception("release_escrow: %s", e)
             return False
 
+    def create_escrows(self, creates: Iterable[Tuple[str, str, Amount]]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Create many escrows: [(escrow_id, employer_account, amount)] -> {escrow_id: result or None}.
+        One RPC client and admin account load for the batch (one transaction per escrow).
+        """
+        creates = list(creates)
+        if self._local_mode():
+            return {eid: self.create_escrow(eid, account, amount) for eid, account, amount in creates}
+        try:
+            from stellar_sdk import SorobanServer, Keypair, scval
+            server = SorobanServer(self.soroban_rpc_url)
+            kp = Keypair.from_secret(self.admin_secret)
+            account = server.load_account(kp.public_key)
+            asset = scval.to_address(self._native_asset_address(server))
+        except Exception as e:
+            logger.exception("create_escrows setup: %s", e)
+            return {eid: None for eid, _, _ in creates}
+        results = {}
+        for eid, employer_account, amount in creates:
+            sym = scval.to_symbol(eid.replace("-", "_")[:32])
+            ok = self._submit(server, kp, account, "create", [sym, scval.to_address(employer_account), asset])
+            results[eid] = {"contract_id": eid, "amount": str(amount), "asset_code": "XLM"} if ok else None
+        return results
+
+    def release_escrows(self, releases: Iterable[Tuple[str, str]]) -> Dict[str, bool]:
+        """
+        Release many escrows: [(contract_id, employee_account)] -> {contract_id: released}.
+        Soroban allows one contract call per transaction, so the batch shares one RPC client
+        and loads the admin account once, numbering the transactions locally.
+        """
+        releases = list(releases)
+        if self._local_mode():
+            return {cid: self.release_escrow(cid, account) for cid, account in releases}
+        try:
+            from stellar_sdk import SorobanServer, Keypair, scval
+            server = SorobanServer(self.soroban_rpc_url)
+            kp = Keypair.from_secret(self.admin_secret)
+            account = server.load_account(kp.public_key)
+        except Exception as e:
+            logger.exception("release_escrows setup: %s", e)
+            return {cid: False for cid, _ in releases}
+        results = {}
+        for cid, employee_account in releases:
+            sym = scval.to_symbol(cid.replace("-", "_")[:32])
+            results[cid] = (
+                self._submit(server, kp, account, "set_beneficiary", [sym, scval.to_address(employee_account)])
+                and self._submit(server, kp, account, "release", [sym])
+            )
+        return results
+
+    def _submit(self, server, kp, account, function_name: str, parameters) -> bool:
+        """Invoke a contract function from a shared account; resyncs the sequence after a failure."""
+        try:
+            from stellar_sdk import TransactionBuilder
+            tx = (
+                TransactionBuilder(account, self.network_passphrase)
+                .append_invoke_contract_function_op(self.contract_id, function_name, parameters)
+                .build()
+            )
+            tx = server.prepare_transaction(tx)
+            tx.sign(kp)
+            r = server.send_transaction(tx)
+            if str(getattr(r.status, "value", r.status)) in ("PENDING", "SUCCESS", "DUPLICATE"):
+                return True
+        except Exception as e:
+            logger.exception("%s: %s", function_name, e)
+        try:
+            account.sequence = server.load_account(kp.public_key).sequence
+        except Exception:
+            pass
+        return False
+
     def get_balance(self, contract_id: str) -> Optional[int]:
-        """Current held amount. Returns None in local mode or on error."""
+        """Current held amount in stroops. Local mode: in-memory ledger (None if unknown). None on error."""
+        return self.get_balances([contract_id], max_workers=1).get(contract_id)
+
+    def get_balances(self, contract_ids: Iterable[str], max_workers: int = 8) -> Dict[str, Optional[int]]:
+        """
+        Held amounts for many escrows: {contract_id: stroops or None}.
+        Soroban simulates one invocation per call, so balances are simulated concurrently
+        on a shared RPC client, with the admin account loaded once for the whole batch.
+        """
+        contract_ids = list(contract_ids)
         if self._local_mode():
-            return None
+            with _local_lock:
+                return {cid: _local_balances.get(cid) for cid in contract_ids}
+        if not contract_ids:
+            return {}
         try:
-            from stellar_sdk import SorobanServer, Contract
+            from stellar_sdk import SorobanServer, Keypair
             server = SorobanServer(self.soroban_rpc_url)
-            contract = Contract(self.contract_id)
+            public_key = Keypair.from_secret(self.admin_secret).public_key
+            sequence = server.load_account(public_key).sequence
+        except Exception as e:
+            logger.debug("get_balances setup: %s", e)
+            return {cid: None for cid in contract_ids}
+
+        def fetch(cid):
+            return cid, self._simulate_balance(server, public_key, sequence, cid)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(contract_ids)))) as pool:
+            return dict(pool.map(fetch, contract_ids))
+
+    def _simulate_balance(self, server, public_key: str, sequence: int, contract_id: str) -> Optional[int]:
+        try:
+            from stellar_sdk import Account, TransactionBuilder, scval
             sym = contract_id.replace("-", "_")[:32]
-            result = server.simulate_transaction(
-                contract.call("balance", sym)
+            tx = (
+                TransactionBuilder(Account(public_key, sequence), self.network_passphrase)
+                .append_invoke_contract_function_op(self.contract_id, "balance", [scval.to_symbol(sym)])
+                .build()
             )
-            return result
+            sim = server.simulate_transaction(tx)
+            if sim.error or not sim.results:
+                return None
+            return int(scval.to_native(sim.results[0].xdr))
         except Exception as e:
-            logger.debug("get_balance: %s", e)
+            logger.debug("get_balance %s: %s", contract_id, e)
             return None
 
     def get_escrow_status(self, contract_id: str) -> Optional[Dict[str, Any]]:
@@ -234,21 +369,21 @@ def _client() -> EscrowClient:
 def create_escrow(
     escrow_id: str,
     employer_account: str,
-    amount: float,
+    amount: Amount,
     asset_code: str = "XLM",
     job_id: str = None,
 ) -> Optional[Dict[str, Any]]:
     return _client().create_escrow(escrow_id, employer_account, amount, asset_code, job_id)
 
 
-def fund_escrow(contract_id: str, amount: float, transaction_hash: str = None) -> bool:
+def fund_escrow(contract_id: str, amount: Amount, transaction_hash: str = None) -> bool:
     return _client().fund_escrow(contract_id, amount, transaction_hash)
 
 
 def release_escrow(
     contract_id: str,
     employee_account: str,
-    amount: float = None,
+    amount: Amount = None,
 ) -> bool:
     return _client().release_escrow(contract_id, employee_account, amount)
 
@@ -257,5 +392,17 @@ def get_balance(contract_id: str) -> Optional[int]:
     return _client().get_balance(contract_id)
 
 
+def create_escrows(creates: Iterable[Tuple[str, str, Amount]]) -> Dict[str, Optional[Dict[str, Any]]]:
+    return _client().create_escrows(creates)
+
+
+def release_escrows(releases: Iterable[Tuple[str, str]]) -> Dict[str, bool]:
+    return _client().release_escrows(releases)
+
+
+def get_balances(contract_ids: Iterable[str], max_workers: int = 8) -> Dict[str, Optional[int]]:
+    return _client().get_balances(contract_ids, max_workers)
+
+
 def get_escrow_status(contract_id: str) -> Optional[Dict[str, Any]]:
     return _client().get_escrow_status(contract_id)